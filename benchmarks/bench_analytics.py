@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark deal analytics: the old per-row Python loop vs. the SQL GROUP BY engine
+vs. reading the maintained rollup counters. Reports latency and peak Python memory
+at each deal volume.
+
+Usage: python benchmarks/bench_analytics.py [--sizes 1000 100000 1000000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+# Use a throwaway database so the real instance/deals.db is never touched
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench_analytics.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import app, db, User, Role, Deal, compute_deal_analytics, rebuild_deal_rollups, read_deal_rollups
+
+STATUSES = ['Lead', 'Pending', 'Under Contract', 'Closed', 'Dead']
+STATES = ['Texas', 'California', 'Florida', 'Ohio', 'Georgia', 'Arizona']
+USERS = 20
+CHUNK = 50000
+
+def legacy_analytics():
+    """The previous implementation: load every Deal and count in Python."""
+    status_counts = defaultdict(int)
+    state_counts = defaultdict(int)
+    user_counts = defaultdict(int)
+    deals_by_month = defaultdict(int)
+    for deal in Deal.query.all():
+        status_counts[deal.status] += 1
+        state_counts[deal.state] += 1
+        user_counts[deal.user_id] += 1
+        deals_by_month[deal.created_at.strftime('%Y-%m')] += 1
+    user_names = {user.id: user.username for user in User.query.all()}
+    return {
+        'status_counts': dict(status_counts),
+        'state_counts': dict(state_counts),
+        'user_counts': {user_names[user_id]: count for user_id, count in user_counts.items()},
+        'deals_by_month': dict(deals_by_month)
+    }
+
+def seed(total):
+    """Grow the deal table to `total` rows using bulk inserts."""
+    current = db.session.query(Deal).count()
+    start = datetime(2023, 1, 1)
+    rng = random.Random(current)
+    while current < total:
+        batch = min(CHUNK, total - current)
+        rows = [{
+            'deal_name': f'Deal {current + i}',
+            'state': rng.choice(STATES),
+            'city': 'Springfield',
+            'status': rng.choice(STATUSES),
+            'user_id': rng.randint(1, USERS),
+            'created_at': start + timedelta(minutes=rng.randint(0, 1000000)),
+            'updated_at': start
+        } for i in range(batch)]
+        db.session.execute(db.insert(Deal), rows)
+        db.session.commit()
+        current += batch
+
+def measure(func):
+    db.session.expunge_all()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark deal analytics aggregation')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--skip-legacy-above', type=int, default=None,
+                        help='Skip the Python loop for volumes larger than this')
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        role = Role(name='User')
+        db.session.add(role)
+        db.session.commit()
+        for i in range(1, USERS + 1):
+            db.session.add(User(id=i, username=f'user{i}', password='x', role_id=role.id))
+        db.session.commit()
+
+        print(f"{'deals':>9}  {'method':<8} {'latency (ms)':>12} {'peak mem (KiB)':>15}")
+        for size in sorted(args.sizes):
+            seed(size)
+            sql_result, sql_time, sql_peak = measure(compute_deal_analytics)
+            print(f"{size:>9}  {'sql':<8} {sql_time * 1000:>12.1f} {sql_peak / 1024:>15.1f}")
+            rebuild_deal_rollups()
+            rollup_result, rollup_time, rollup_peak = measure(read_deal_rollups)
+            print(f"{size:>9}  {'rollup':<8} {rollup_time * 1000:>12.1f} {rollup_peak / 1024:>15.1f}")
+            assert rollup_result == sql_result, 'Rollup counters diverged from the deal table'
+            if args.skip_legacy_above is not None and size > args.skip_legacy_above:
+                continue
+            legacy_result, legacy_time, legacy_peak = measure(legacy_analytics)
+            print(f"{size:>9}  {'python':<8} {legacy_time * 1000:>12.1f} {legacy_peak / 1024:>15.1f}")
+            assert legacy_result == sql_result, 'SQL analytics diverged from the Python loop'
+
+    os.remove(DB_PATH)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark moving many deals to a new status: one PUT /api/deals/<id> per deal
+vs. a single POST /api/deals/status with an id list or a filter.
+
+Usage: python benchmarks/bench_bulk_status.py [--deals 10000] [--single-deals 500]
+"""
+import io
+import os
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+
+# Use a throwaway database so the real instance/deals.db is never touched
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench_bulk_status.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import app, db, User, Role, Deal, invalidate_role_cache, rebuild_deal_rollups
+
+def seed(user_id, count, status):
+    with app.app_context():
+        db.session.execute(db.insert(Deal), [{
+            'deal_name': f'Deal {n}', 'state': 'Texas', 'city': 'Austin', 'status': status, 'user_id': user_id
+        } for n in range(count)])
+        db.session.commit()
+        rebuild_deal_rollups()
+        return [deal_id for (deal_id,) in db.session.query(Deal.id).filter_by(status=status).order_by(Deal.id)]
+
+def single_puts(client, ids, status):
+    for deal_id in ids:
+        client.put(f'/api/deals/{deal_id}', json={'deal_name': 'Deal', 'state': 'Texas', 'city': 'Austin', 'status': status})
+
+def bulk_ids(client, ids, status):
+    client.post('/api/deals/status', json={'ids': ids, 'status': status})
+
+def bulk_filter(client, ids, status):
+    client.post('/api/deals/status', json={'filter': {'status': 'Pending'}, 'status': status})
+
+def setup():
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        db.create_all()
+        role = Role.query.filter_by(name='User').first()
+        if role is None:
+            role = Role(name='User')
+            db.session.add(role)
+            db.session.commit()
+        invalidate_role_cache()
+        user = User(username='bench', role_id=role.id)
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bulk deal status changes')
+    parser.add_argument('--deals', type=int, default=10000)
+    parser.add_argument('--single-deals', type=int, default=500,
+                        help='deals changed one PUT at a time (the single-deal path is slow)')
+    args = parser.parse_args()
+
+    user_id = setup()
+    client = app.test_client()
+    client.post('/login', data={'username': 'bench', 'password': 'bench'})
+
+    print(f"{'mode':<16} {'deals':>7} {'seconds':>8} {'deals/s':>9}")
+    modes = [
+        ('single PUT', single_puts, args.single_deals),
+        ('bulk by ids', bulk_ids, args.deals),
+        ('bulk by filter', bulk_filter, args.deals)
+    ]
+    for n, (name, run, count) in enumerate(modes):
+        # Each mode starts from its own set of Pending deals
+        with app.app_context():
+            db.session.query(Deal).filter_by(status='Pending').update({'status': f'Done {n}'})
+            db.session.commit()
+        ids = seed(user_id, count, 'Pending')
+        # The endpoints print a line per request; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            run(client, ids, 'Closed')
+            elapsed = time.perf_counter() - started
+        with app.app_context():
+            assert Deal.query.filter_by(status='Pending').count() == 0, f'{name} left deals unchanged'
+        print(f"{name:<16} {count:>7} {elapsed:>8.2f} {count / elapsed:>9.0f}")
+
+    os.remove(DB_PATH)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark bulk deal import: one POST /api/deals per row vs. a single
+POST /api/deals/import as a JSON array, NDJSON body and CSV upload.
+Reports rows/sec for each path.
+
+Usage: python benchmarks/bench_import.py [--rows 5000] [--single-rows 500]
+"""
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import contextlib
+
+# Use a throwaway database so the real instance/deals.db is never touched
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench_import.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import app, db, User, Role, Deal, invalidate_role_cache
+
+STATUSES = ['Lead', 'Pending', 'Under Contract', 'Closed', 'Dead']
+STATES = ['Texas', 'California', 'Florida', 'Ohio', 'Georgia', 'Arizona']
+
+def make_rows(count):
+    rng = random.Random(7)
+    return [{
+        'deal_name': f'Deal {n}',
+        'state': rng.choice(STATES),
+        'city': f'City {n % 50}',
+        'status': rng.choice(STATUSES)
+    } for n in range(count)]
+
+def single_rows(client, rows):
+    for row in rows:
+        client.post('/api/deals', data=row)
+
+def json_array(client, rows):
+    client.post('/api/deals/import', json=rows)
+
+def ndjson(client, rows):
+    body = '\n'.join(json.dumps(row) for row in rows)
+    client.post('/api/deals/import', data=body, content_type='application/x-ndjson')
+
+def csv_upload(client, rows):
+    lines = ['deal_name,state,city,status'] + [
+        f"{r['deal_name']},{r['state']},{r['city']},{r['status']}" for r in rows
+    ]
+    upload = io.BytesIO('\n'.join(lines).encode())
+    client.post('/api/deals/import', data={'file': (upload, 'deals.csv')}, content_type='multipart/form-data')
+
+def setup():
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        db.create_all()
+        role = Role.query.filter_by(name='User').first()
+        if role is None:
+            role = Role(name='User')
+            db.session.add(role)
+            db.session.commit()
+        invalidate_role_cache()
+        user = User(username='bench', role_id=role.id)
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bulk deal import')
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--single-rows', type=int, default=500,
+                        help='rows posted one at a time (the single-row path is slow)')
+    args = parser.parse_args()
+
+    setup()
+    client = app.test_client()
+    client.post('/login', data={'username': 'bench', 'password': 'bench'})
+
+    print(f"{'mode':<18} {'rows':>7} {'seconds':>8} {'rows/s':>9}")
+    modes = [
+        ('single POST', single_rows, args.single_rows),
+        ('import JSON', json_array, args.rows),
+        ('import NDJSON', ndjson, args.rows),
+        ('import CSV', csv_upload, args.rows)
+    ]
+    for name, run, count in modes:
+        rows = make_rows(count)
+        with app.app_context():
+            before = Deal.query.count()
+        # The endpoints print a line per request; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            run(client, rows)
+            elapsed = time.perf_counter() - started
+        with app.app_context():
+            assert Deal.query.count() - before == count, f'{name} did not create every row'
+        print(f"{name:<18} {count:>7} {elapsed:>8.2f} {count / elapsed:>9.0f}")
+
+    os.remove(DB_PATH)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Serialization time and bytes on the wire for the JSON list endpoints, at each
+data size given. An Admin (who sees every deal) requests each endpoint with
+the stdlib and the orjson provider, uncompressed and with gzip and brotli.
+Separately, the full deal list is serialized the old way (isoformat() per row,
+then json.dumps) and through each provider.
+
+Usage: python benchmarks/bench_json.py [--rows 10000 100000] [--repeat 5]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from statistics import median
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Use a throwaway database so the real instance/deals.db is never touched
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench_json.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+sys.path.append(ROOT)
+from flask_login import login_user
+from main import app, db, Deal, File, User, deal_to_dict
+from fastjson import FastJSONProvider
+from compression import available_encodings
+from datagen import generate, PASSWORD
+
+app.config['SQL_PROFILE'] = False
+app.config['WTF_CSRF_ENABLED'] = False
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return median(times), result
+
+def old_serialization(deals):
+    rows = [dict(deal_to_dict(d), created_at=d.created_at.isoformat(), updated_at=d.updated_at.isoformat()) for d in deals]
+    return json.dumps(rows, separators=(',', ':')).encode()
+
+def serialization(rows, repeat):
+    """Seconds to turn the whole visible deal list into a response body, by method."""
+    results = {}
+    with app.test_request_context():
+        login_user(User.query.filter_by(username='bench-admin').one())
+        deals = Deal.query.order_by(Deal.id).all()
+        results['isoformat + json.dumps'] = timed(lambda: old_serialization(deals), repeat)[0]
+        for name, use_orjson in (('stdlib provider', False), ('orjson provider', True)):
+            provider = FastJSONProvider(app, use_orjson=use_orjson)
+            results[name] = timed(lambda: provider.response([deal_to_dict(d) for d in deals]).get_data(), repeat)[0]
+    return results
+
+def endpoints(repeat):
+    """(path, provider, encoding) -> (median seconds, bytes) through the full request cycle."""
+    client = app.test_client()
+    if client.post('/login', data={'username': 'bench-admin', 'password': PASSWORD}).status_code != 302:
+        raise RuntimeError('login as bench-admin failed')
+    with app.app_context():
+        deal_id = db.session.query(File.deal_id).group_by(File.deal_id).order_by(db.func.count().desc()).first()[0]
+    paths = ['/api/deals?all=1', '/api/deals?limit=200', f'/api/files/{deal_id}', '/api/analytics']
+    results = {}
+    for use_orjson in (False, True):
+        app.json = FastJSONProvider(app, use_orjson=use_orjson)
+        for path in paths:
+            for encoding in ['identity'] + available_encodings():
+                # No If-None-Match: every request builds and encodes the body
+                seconds, response = timed(lambda: client.get(path, headers={'Accept-Encoding': encoding}), repeat)
+                results[(path, 'orjson' if use_orjson else 'stdlib', encoding)] = (seconds, len(response.data))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='JSON serialization time and response size per endpoint')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        with app.app_context():
+            db.drop_all()
+            generate(users=20, deals=rows, max_files=4)
+        print(f'\n{rows} deals')
+        for name, seconds in serialization(rows, args.repeat).items():
+            print(f'  full list, {name:<24} {seconds * 1000:8.1f} ms')
+        print(f"  {'endpoint':<24} {'json':<7} {'encoding':<9} {'ms':>8} {'bytes':>10}")
+        for (path, provider, encoding), (seconds, size) in endpoints(args.repeat).items():
+            print(f'  {path:<24} {provider:<7} {encoding:<9} {seconds * 1000:8.1f} {size:>10}')
+    os.remove(DB_PATH)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Repeatable load test of the real routes. Seeds a throwaway SQLite database with
+synthetic users, deals, status histories and files (see datagen.py), serves it
+with gunicorn, and has concurrent logged-in clients browse and edit their deals:
+login, the deal list, analytics, deal pages, file lists, and deal
+create/update/delete.
+
+p50/p99 latency per route, throughput, errors and the server's peak memory go to
+test_reports/load_report_<timestamp>.json. Pass --compare with an earlier report
+to see what changed.
+
+Usage: python benchmarks/bench_load.py [--users 20] [--deals 10000] [--clients 8] [--seconds 20]
+                                       [--workers 2] [--threads 4] [--compare test_reports/load_report_X.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Use a throwaway database so the real instance/deals.db is never touched
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench_load.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+
+sys.path.append(ROOT)
+from main import app, db, Deal, DealStatusHistory, File
+from datagen import generate, MARKETS, PIPELINE, PASSWORD
+from loadclient import Client, free_port, wait_until_serving
+
+# How often each client action is picked
+MIX = {
+    'GET /api/deals': 25,
+    'GET /api/analytics': 15,
+    'GET /deal/<id>': 15,
+    'GET /api/files/<id>': 15,
+    'POST /api/deals': 10,
+    'PUT /api/deals/<id>': 12,
+    'DELETE /api/deals/<id>': 8,
+}
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+    }
+
+class LoadClient:
+    """A logged-in user working through their own deals."""
+
+    def __init__(self, port, username, deal_ids, rng):
+        started = time.perf_counter()
+        self.client = Client(port, username, PASSWORD)
+        self.login_seconds = time.perf_counter() - started
+        self.deal_ids = list(deal_ids)
+        self.created = []
+        self.rng = rng
+
+    def send(self, action):
+        rng = self.rng
+        json_headers = {'Content-Type': 'application/json', 'X-CSRFToken': self.client.csrf_token}
+        if action == 'GET /api/deals':
+            return self.client.request('GET', '/api/deals')[0]
+        if action == 'GET /api/analytics':
+            return self.client.request('GET', '/api/analytics')[0]
+        if action == 'POST /api/deals':
+            status, body = self.client.request('POST', '/api/deals', json.dumps(self.new_deal()), json_headers)
+            if status < 400:
+                self.created.append(json.loads(body)['id'])
+            return status
+        if action == 'DELETE /api/deals/<id>' and self.created:
+            deal_id = self.created.pop()
+            return self.client.request('DELETE', f'/api/deals/{deal_id}', None,
+                                       {'X-CSRFToken': self.client.csrf_token})[0]
+        # Deletes only remove deals this client created, so the seeded ones stay for reads
+        deal_id = rng.choice(self.deal_ids + self.created)
+        if action == 'GET /deal/<id>':
+            return self.client.request('GET', f'/deal/{deal_id}')[0]
+        if action == 'GET /api/files/<id>':
+            return self.client.request('GET', f'/api/files/{deal_id}')[0]
+        return self.client.request('PUT', f'/api/deals/{deal_id}', json.dumps(self.new_deal()), json_headers)[0]
+
+    def new_deal(self):
+        state = self.rng.choice(list(MARKETS))
+        return {'deal_name': f'Load deal {self.rng.randrange(10 ** 6)}', 'state': state,
+                'city': self.rng.choice(MARKETS[state][1]), 'status': self.rng.choice(PIPELINE)}
+
+def run_load(port, owned, clients, seconds):
+    # The busiest users first, so every client has deals to work on
+    users = sorted((name for name in owned if owned[name]), key=lambda name: -len(owned[name]))
+    latencies = {action: [] for action in ['POST /login'] + list(MIX)}
+    errors = {action: 0 for action in latencies}
+    lock = threading.Lock()
+    ready = threading.Barrier(clients + 1)
+    go = threading.Event()
+    deadline = [None]
+
+    def worker(n):
+        rng = random.Random(n)
+        user = users[n % len(users)]
+        load_client = LoadClient(port, user, owned[user], rng)
+        local = {action: [] for action in latencies}
+        local_errors = dict.fromkeys(latencies, 0)
+        local['POST /login'].append(load_client.login_seconds)
+        ready.wait()
+        go.wait()
+        while time.perf_counter() < deadline[0]:
+            action = rng.choices(list(MIX), weights=list(MIX.values()))[0]
+            if action == 'DELETE /api/deals/<id>' and not load_client.created:
+                action = 'POST /api/deals'
+            started = time.perf_counter()
+            status = load_client.send(action)
+            local[action].append(time.perf_counter() - started)
+            if status >= 400:
+                local_errors[action] += 1
+        load_client.client.close()
+        with lock:
+            for action in latencies:
+                latencies[action].extend(local[action])
+                errors[action] += local_errors[action]
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    # Clients log in first; the timed run starts once all of them are ready
+    ready.wait()
+    started = time.perf_counter()
+    deadline[0] = started + seconds
+    go.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    timed = [latency for action in MIX for latency in latencies[action]]
+    return {
+        'overall': summarize(timed, sum(errors[action] for action in MIX), elapsed),
+        'routes': {action: summarize(latencies[action], errors[action], elapsed) for action in latencies},
+    }
+
+def process_tree(pid):
+    pids = [pid]
+    for child in open(f'/proc/{pid}/task/{pid}/children').read().split():
+        pids += process_tree(int(child))
+    return pids
+
+def peak_rss_mb(pid):
+    for line in open(f'/proc/{pid}/status'):
+        if line.startswith('VmHWM:'):
+            return int(line.split()[1]) / 1024
+
+def serve_and_load(args, owned):
+    port = free_port()
+    command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+               '--workers', str(args.workers), '--threads', str(args.threads), 'wsgi:app']
+    process = subprocess.Popen(command, cwd=ROOT, env=dict(os.environ, PORT=str(port), LOG_LEVEL='WARNING'),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_serving(port, process)
+        result = run_load(port, owned, args.clients, args.seconds)
+        peaks = {pid: peak_rss_mb(pid) for pid in process_tree(process.pid)}
+        result['memory'] = {
+            'peak_rss_mb_total': round(sum(peaks.values()), 1),
+            'peak_rss_mb_max_process': round(max(peaks.values()), 1),
+            'processes': len(peaks),
+        }
+        return result
+    finally:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def change(new, old):
+    if new is None or not old:
+        return ''
+    return f'{(new / old - 1) * 100:+.0f}%'
+
+def print_report(report, baseline=None):
+    base_routes = baseline['routes'] if baseline else {}
+    print(f"{'route':<24} {'requests':>9} {'errors':>7} {'p50 ms':>8} {'p99 ms':>8}"
+          + (f" {'p50 chg':>8} {'p99 chg':>8}" if baseline else ''))
+    for action, stats in list(report['routes'].items()) + [('overall', report['overall'])]:
+        base = baseline['overall'] if baseline and action == 'overall' else base_routes.get(action, {})
+        line = (f"{action:<24} {stats['requests']:>9} {stats['errors']:>7} "
+                f"{stats['p50_ms'] or 0:>8.1f} {stats['p99_ms'] or 0:>8.1f}")
+        if baseline:
+            line += f" {change(stats['p50_ms'], base.get('p50_ms')):>8} {change(stats['p99_ms'], base.get('p99_ms')):>8}"
+        print(line)
+    overall, memory = report['overall'], report['memory']
+    print(f"throughput {overall['rps']:.0f} req/s"
+          + (f" ({change(overall['rps'], baseline['overall']['rps'])})" if baseline else ''))
+    print(f"server peak RSS {memory['peak_rss_mb_total']:.0f} MB over {memory['processes']} processes"
+          + (f" ({change(memory['peak_rss_mb_total'], baseline['memory']['peak_rss_mb_total'])})" if baseline else ''))
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the real routes against synthetic data')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--deals', type=int, default=10000)
+    parser.add_argument('--max-files', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--compare', help='an earlier report to compare against')
+    parser.add_argument('--output', default=os.path.join(ROOT, 'test_reports'))
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with app.app_context():
+        owned = generate(users=args.users, deals=args.deals, max_files=args.max_files, seed=args.seed)
+        data = {
+            'users': args.users,
+            'deals': db.session.query(Deal).count(),
+            'status_histories': db.session.query(DealStatusHistory).count(),
+            'files': db.session.query(File).count(),
+        }
+    print(f"seeded {data['deals']} deals, {data['status_histories']} status changes and {data['files']} files "
+          f"for {data['users']} users in {time.perf_counter() - started:.1f}s")
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('compare', 'output')},
+        'data': data,
+        **serve_and_load(args, owned),
+    }
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"load_report_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json")
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    print(f'report written to {os.path.relpath(path)}')
+    os.remove(DB_PATH)
+
+if __name__ == '__main__':
+    main()
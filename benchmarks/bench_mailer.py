@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark notification delivery throughput against a local SMTP sink:
+a new connection per message (the old notify_status_change) vs. the pooled
+SMTPMailer vs. draining the outbox in digest mode.
+
+Usage: python benchmarks/bench_mailer.py [--messages 500] [--recipients 10]
+"""
+import os
+import sys
+import time
+import socket
+import smtplib
+import argparse
+import tempfile
+from datetime import datetime
+from email.mime.text import MIMEText
+from aiosmtpd.controller import Controller
+
+# Use a throwaway database so the real instance/deals.db is never touched
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench_mailer.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mailer import SMTPMailer
+from main import app, db, NotificationOutbox, drain_notification_outbox
+
+class CountingHandler:
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return '250 Message accepted for delivery'
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def message(n, recipient):
+    msg = MIMEText(f"Status change for deal 'Deal {n}' (ID: {n}): Closed by bench at {datetime.utcnow()}")
+    msg['Subject'] = f'Deal Status Update: Deal {n}'
+    msg['From'] = app.config['MAIL_DEFAULT_SENDER']
+    msg['To'] = recipient
+    return msg
+
+def per_message_connection(count, recipients):
+    for n in range(count):
+        with smtplib.SMTP(app.config['MAIL_SERVER'], app.config['MAIL_PORT']) as server:
+            server.send_message(message(n, recipients[n % len(recipients)]))
+
+def pooled(count, recipients):
+    mailer = SMTPMailer.from_config(app.config)
+    for n in range(count):
+        mailer.send(message(n, recipients[n % len(recipients)]))
+    mailer.close()
+
+def outbox_digest(count, recipients):
+    with app.app_context():
+        now = datetime.utcnow()
+        db.session.execute(db.insert(NotificationOutbox), [{
+            'recipient': recipients[n % len(recipients)],
+            'subject': f'Deal Status Update: Deal {n}',
+            'body': f"Status change for deal 'Deal {n}' (ID: {n}): Closed",
+            'status': 'pending',
+            'attempts': 0,
+            'next_attempt_at': now
+        } for n in range(count)])
+        db.session.commit()
+        while drain_notification_outbox(limit=count):
+            pass
+        app.extensions.pop('mailer').close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SMTP notification delivery')
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--recipients', type=int, default=10)
+    args = parser.parse_args()
+
+    handler = CountingHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=free_port())
+    controller.start()
+    app.config.update(MAIL_SERVER='127.0.0.1', MAIL_PORT=controller.port, MAIL_USE_TLS=False,
+                      MAIL_USERNAME=None, MAIL_MAX_MESSAGES_PER_CONNECTION=args.messages)
+    recipients = [f'user{i}@example.com' for i in range(args.recipients)]
+    with app.app_context():
+        db.create_all()
+
+    print(f"{'mode':<24} {'changes':>8} {'emails':>7} {'seconds':>8} {'changes/s':>10}")
+    modes = [
+        ('connection per message', per_message_connection, {}),
+        ('pooled session', pooled, {}),
+        ('outbox digest', outbox_digest, {'NOTIFY_DIGEST_SECONDS': 60})
+    ]
+    for name, run, config in modes:
+        app.config.update({'NOTIFY_DIGEST_SECONDS': 0, **config})
+        before = handler.received
+        started = time.perf_counter()
+        run(args.messages, recipients)
+        elapsed = time.perf_counter() - started
+        emails = handler.received - before
+        print(f"{name:<24} {args.messages:>8} {emails:>7} {elapsed:>8.2f} {args.messages / elapsed:>10.0f}")
+
+    controller.stop()
+    os.remove(DB_PATH)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Measure what request metrics cost: the same logged-in requests with the
+instrumentation on (request hooks plus per-statement SQL timers) and off, in
+one app. Rounds alternate between the two so drift in machine load hits both
+equally, and the overhead is the median of each pair's ratio.
+
+Usage: python benchmarks/bench_metrics.py [--deals 2000] [--requests 200] [--rounds 21]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from statistics import median
+
+# Use a throwaway database so the real instance/deals.db is never touched
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench_metrics.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import event
+from main import create_app, db, User, Role, Deal, init_database, rebuild_deal_rollups, \
+    start_statement_timer, record_statement_time
+
+PATHS = ['/api/deals', '/api/analytics', '/api/deals?status=Pending', '/api/deals/search?q=deal', '/api/files/1']
+
+def seed(app, deals):
+    with app.app_context():
+        init_database()
+        user = User(username='bench', role_id=Role.query.filter_by(name='User').one().id)
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+        db.session.execute(db.insert(Deal), [{
+            'deal_name': f'Deal {n}', 'state': 'Texas', 'city': 'Austin',
+            'status': ['Lead', 'Pending', 'Closed'][n % 3], 'user_id': user.id
+        } for n in range(deals)])
+        db.session.commit()
+        rebuild_deal_rollups()
+
+def logged_in_client(app):
+    client = app.test_client()
+    client.post('/login', data={'username': 'bench', 'password': 'bench'})
+    return client
+
+def timed_round(client, count):
+    start = time.perf_counter()
+    for n in range(count):
+        response = client.get(PATHS[n % len(PATHS)])
+        assert response.status_code == 200, (PATHS[n % len(PATHS)], response.status_code)
+    return (time.perf_counter() - start) / count
+
+def set_metrics(app, engine, enabled):
+    """Switch the request hooks and SQL timers the way METRICS_ENABLED does at app creation."""
+    app.config['METRICS_ENABLED'] = enabled
+    for name, listener in (('before_cursor_execute', start_statement_timer),
+                           ('after_cursor_execute', record_statement_time)):
+        if enabled and not event.contains(engine, name, listener):
+            event.listen(engine, name, listener)
+        elif not enabled and event.contains(engine, name, listener):
+            event.remove(engine, name, listener)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--deals', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=21)
+    args = parser.parse_args()
+
+    app = create_app({'WTF_CSRF_ENABLED': False, 'LOG_LEVEL': 'WARNING', 'METRICS_ENABLED': True})
+    seed(app, args.deals)
+    with app.app_context():
+        engine = db.engine
+    client = logged_in_client(app)
+    timed_round(client, len(PATHS) * 10)
+
+    results = {'metrics off': [], 'metrics on': []}
+    for _ in range(args.rounds):
+        for name in results:
+            set_metrics(app, engine, name == 'metrics on')
+            results[name].append(timed_round(client, args.requests))
+
+    print(f'{args.deals} deals, {args.requests} requests x {args.rounds} rounds over {len(PATHS)} endpoints')
+    for name, times in results.items():
+        print(f'  {name:12s} median {median(times) * 1000:.3f} ms/request')
+    overhead = median(on / off for on, off in zip(results['metrics on'], results['metrics off'])) - 1
+    print(f'  overhead     {overhead * 100:+.1f}%')
+    os.remove(DB_PATH)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+What the read paths save by loading column rows instead of mapped instances:
+time and memory allocated per call for the queries behind GET /api/deals (a
+page and ?all=1), GET /api/files/<id> and /deal/<id>, the way they ran before
+(Deal.query...all(), mapped instances loaded into the identity map) against the
+row projections they use now, each serialized with deal_to_dict/file_to_dict.
+
+Usage: python benchmarks/bench_projections.py [--deals 10000] [--repeat 20]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+from statistics import median
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Use a throwaway database so the real instance/deals.db is never touched
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench_projections.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+sys.path.append(ROOT)
+from sqlalchemy.orm import joinedload
+from main import app, db, Deal, File, DealStatusHistory, User, DEAL_COLUMNS, FILE_COLUMNS, deal_to_dict, file_to_dict
+from datagen import generate
+
+app.config['SQL_PROFILE'] = False
+
+def page_orm(limit):
+    return [deal_to_dict(d) for d in Deal.query.order_by(Deal.updated_at.desc(), Deal.id.desc()).limit(limit).all()]
+
+def page_rows(limit):
+    return [deal_to_dict(d) for d in db.session.query(*DEAL_COLUMNS)
+            .order_by(Deal.updated_at.desc(), Deal.id.desc()).limit(limit).all()]
+
+def files_orm(deal_id):
+    return [file_to_dict(f) for f in File.query.filter_by(deal_id=deal_id).all()]
+
+def files_rows(deal_id):
+    return [file_to_dict(f) for f in db.session.query(*FILE_COLUMNS).filter(File.deal_id == deal_id).all()]
+
+def detail_orm(deal_id):
+    deal = Deal.query.filter_by(id=deal_id).first()
+    files = File.query.filter_by(deal_id=deal_id).order_by(File.id).all()
+    history = DealStatusHistory.query.options(joinedload(DealStatusHistory.user)).filter_by(deal_id=deal_id) \
+        .order_by(DealStatusHistory.changed_at.desc()).all()
+    return deal, [f.file_name for f in files], [(h.status, h.user.username) for h in history]
+
+def detail_rows(deal_id):
+    deal = db.session.query(*DEAL_COLUMNS, Deal.user_id).filter(Deal.id == deal_id).first()
+    files = db.session.query(*FILE_COLUMNS).filter(File.deal_id == deal_id).order_by(File.id).all()
+    history = db.session.query(DealStatusHistory.status, DealStatusHistory.changed_at, User.username) \
+        .outerjoin(User, User.id == DealStatusHistory.changed_by_user_id) \
+        .filter(DealStatusHistory.deal_id == deal_id).order_by(DealStatusHistory.changed_at.desc()).all()
+    return deal, [f.file_name for f in files], [(h.status, h.username) for h in history]
+
+def measure(fn, repeat):
+    """(median ms, peak KB of Python memory allocated) for one call, each in a fresh session."""
+    times = []
+    for _ in range(repeat):
+        db.session.remove()
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    db.session.remove()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    db.session.remove()
+    return median(times) * 1000, peak / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description='Row projections vs mapped instances on the read paths')
+    parser.add_argument('--deals', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with app.app_context():
+        generate(users=20, deals=args.deals, max_files=8)
+        busiest = db.session.query(DealStatusHistory.deal_id).group_by(DealStatusHistory.deal_id) \
+            .order_by(db.func.count().desc()).first()[0]
+        cases = {
+            'GET /api/deals (page of 50)': (lambda: page_orm(50), lambda: page_rows(50)),
+            'GET /api/deals (page of 200)': (lambda: page_orm(200), lambda: page_rows(200)),
+            f'GET /api/deals?all=1 ({args.deals})': (lambda: page_orm(args.deals), lambda: page_rows(args.deals)),
+            'GET /api/files/<id>': (lambda: files_orm(busiest), lambda: files_rows(busiest)),
+            '/deal/<id>': (lambda: detail_orm(busiest), lambda: detail_rows(busiest)),
+        }
+        print(f"{'read path':<32} {'orm ms':>8} {'rows ms':>8} {'orm KB':>9} {'rows KB':>9}")
+        for name, (orm, rows) in cases.items():
+            orm_ms, orm_kb = measure(orm, args.repeat)
+            rows_ms, rows_kb = measure(rows, args.repeat)
+            print(f'{name:<32} {orm_ms:>8.2f} {rows_ms:>8.2f} {orm_kb:>9.0f} {rows_kb:>9.0f}'
+                  f'   {orm_ms / rows_ms:.1f}x faster, {orm_kb / max(rows_kb, 1):.1f}x less memory')
+    os.remove(DB_PATH)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark deal search: the FTS5 index behind /api/deals/search vs. a naive
+LIKE '%term%' scan over the same columns and file names.
+
+Usage: python benchmarks/bench_search.py [--deals 1000000] [--repeat 5]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from statistics import median
+from sqlalchemy import or_, text
+
+# Use a throwaway database so the real instance/deals.db is never touched
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench_search.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import app, db, User, Role, Deal, File, deal_search, deal_search_expression
+from sqlalchemy import literal_column
+
+# About 1600 distinct name words, so a single word matches well under 1% of deals
+WORD_STARTS = ['Oak', 'Cedar', 'Harbor', 'Maple', 'Pine', 'Summit', 'Lake', 'Stone', 'River', 'Willow',
+               'Eagle', 'Fox', 'Iron', 'Silver', 'Golden', 'Red', 'Green', 'North', 'South', 'West',
+               'East', 'High', 'Elm', 'Birch', 'Ash', 'Bay', 'Sun', 'Moon', 'Star', 'Clear',
+               'Spring', 'Deer', 'Hawk', 'Bear', 'Wolf', 'Rock', 'Sand', 'Mill', 'Bridge', 'Church']
+WORD_ENDS = ['ridge', 'view', 'point', 'field', 'wood', 'brook', 'haven', 'crest', 'gate', 'side',
+             'dale', 'ford', 'port', 'land', 'wick', 'ton', 'ville', 'mont', 'stead', 'moor',
+             'hurst', 'more', 'worth', 'shire', 'bury', 'ley', 'holm', 'fall', 'well', 'bank',
+             'cliff', 'hill', 'vale', 'shore', 'grove', 'park', 'place', 'court', 'square', 'commons']
+WORDS = [start + end for start in WORD_STARTS for end in WORD_ENDS]
+CITIES = ['Austin', 'Dallas', 'Houston', 'Phoenix', 'Tampa', 'Atlanta', 'Columbus', 'Denver']
+STATES = ['Texas', 'Arizona', 'Florida', 'Georgia', 'Ohio', 'Colorado']
+STATUSES = ['Lead', 'Pending', 'Under Contract', 'Closed', 'Dead']
+# A rare word, two words together, a prefix, a deal number, a common city and a common file name
+QUERIES = ['Harborview', 'Oakridge Cedarpark', 'Silverw', '424242', 'Denver', 'appraisal']
+CHUNK = 50000
+
+def seed(count):
+    rng = random.Random(11)
+    with app.app_context():
+        db.create_all()
+        role = Role.query.filter_by(name='User').first() or Role(name='User')
+        user = User(username='bench', role=role)
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+        for start in range(0, count, CHUNK):
+            db.session.execute(db.insert(Deal), [{
+                'deal_name': f'{rng.choice(WORDS)} {rng.choice(WORDS)} {n}',
+                'city': rng.choice(CITIES),
+                'state': rng.choice(STATES),
+                'status': rng.choice(STATUSES),
+                'user_id': user.id
+            } for n in range(start, min(start + CHUNK, count))])
+            # One deal in twenty has an appraisal on file
+            db.session.execute(db.insert(File), [{
+                'deal_id': deal_id, 'file_name': f'appraisal-{deal_id}.pdf', 'dropbox_link': 'https://example.com'
+            } for deal_id in range(start + 1, min(start + CHUNK, count) + 1, 20)])
+            db.session.commit()
+        db.session.execute(text('ANALYZE'))
+        db.session.execute(text("INSERT INTO deal_search (deal_search) VALUES ('optimize')"))
+        db.session.commit()
+        return user.id
+
+def like_search(user_id, q, limit=50):
+    query = Deal.query.filter(Deal.user_id == user_id)
+    for term in q.split():
+        pattern = f'%{term}%'
+        query = query.filter(or_(
+            Deal.deal_name.like(pattern), Deal.city.like(pattern), Deal.state.like(pattern), Deal.status.like(pattern),
+            Deal.id.in_(db.session.query(File.deal_id).filter(File.file_name.like(pattern)))
+        ))
+    return query.order_by(Deal.id).limit(limit).all()
+
+def fts_search(user_id, q, limit=50):
+    return Deal.query.filter(Deal.user_id == user_id) \
+        .join(deal_search, deal_search.c.rowid == Deal.id) \
+        .filter(literal_column('deal_search').op('MATCH')(deal_search_expression(q))) \
+        .order_by(deal_search.c.rank, Deal.id).limit(limit).all()
+
+def timed(run, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark FTS5 deal search against LIKE')
+    parser.add_argument('--deals', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    user_id = seed(args.deals)
+    print(f"Seeded and indexed {args.deals} deals in {time.perf_counter() - started:.1f}s")
+
+    print(f"{'query':<20} {'matches':>8} {'like ms':>9} {'fts ms':>9} {'speedup':>8}")
+    with app.app_context():
+        for q in QUERIES:
+            matches = db.session.execute(text('SELECT count(*) FROM deal_search WHERE deal_search MATCH :q'),
+                                         {'q': deal_search_expression(q)}).scalar()
+            like_ms = timed(lambda: like_search(user_id, q), args.repeat) * 1000
+            fts_ms = timed(lambda: fts_search(user_id, q), args.repeat) * 1000
+            print(f"{q:<20} {matches:>8} {like_ms:>9.1f} {fts_ms:>9.1f} {like_ms / fts_ms:>7.1f}x")
+
+    os.remove(DB_PATH)
+
+if __name__ == '__main__':
+    main()
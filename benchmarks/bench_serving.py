@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Load test the two ways of serving the app: the Werkzeug dev server with debug on
+(what `python3 main.py` runs) vs. gunicorn pre-fork workers via wsgi:app.
+Logged-in clients hit the deal list, analytics and search, with a share of deal
+creates so writers from several processes contend for the SQLite database.
+
+Usage: python benchmarks/bench_serving.py [--clients 16] [--seconds 10] [--workers 4] [--threads 4]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+from statistics import median
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Use a throwaway database so the real instance/deals.db is never touched
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench_serving.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+
+sys.path.append(ROOT)
+from main import app, db, User, Role, Deal, init_database, rebuild_deal_rollups
+from loadclient import Client, free_port, wait_until_serving
+
+READS = ['/api/deals', '/api/analytics', '/api/deals/search?q=deal', '/api/deals?status=Pending']
+
+def seed(deals):
+    with app.app_context():
+        init_database()
+        role = Role.query.filter_by(name='User').first() or Role(name='User')
+        user = User(username='bench', role=role)
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+        db.session.execute(db.insert(Deal), [{
+            'deal_name': f'Deal {n}', 'state': 'Texas', 'city': 'Austin',
+            'status': random.choice(['Lead', 'Pending', 'Closed']), 'user_id': user.id
+        } for n in range(deals)])
+        db.session.commit()
+        rebuild_deal_rollups()
+
+def run_load(port, clients, seconds, write_ratio):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(n):
+        client = Client(port)
+        rng = random.Random(n)
+        local = []
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            if rng.random() < write_ratio:
+                body = json.dumps({'deal_name': f'Load {n}', 'state': 'Texas', 'city': 'Austin', 'status': 'Lead'})
+                status, _ = client.request('POST', '/api/deals', body,
+                                           {'Content-Type': 'application/json', 'X-CSRFToken': client.csrf_token})
+            else:
+                status, _ = client.request('GET', rng.choice(READS))
+            local.append(time.perf_counter() - started)
+            if status >= 400:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': median(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000,
+        'errors': errors[0]
+    }
+
+def serve(command, port, args):
+    process = subprocess.Popen(command, cwd=ROOT, env=dict(os.environ, PORT=str(port)),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_serving(port, process)
+        return run_load(port, args.clients, args.seconds, args.write_ratio)
+    finally:
+        process.terminate()
+        process.wait(10)
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare dev server and gunicorn throughput')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--deals', type=int, default=2000)
+    parser.add_argument('--write-ratio', type=float, default=0.1)
+    args = parser.parse_args()
+    seed(args.deals)
+
+    modes = [
+        ('dev server (debug)', [sys.executable, '-c',
+            "import os; from main import app; "
+            "app.run(host='127.0.0.1', port=int(os.environ['PORT']), debug=True, use_reloader=False)"]),
+        (f'gunicorn {args.workers}x{args.threads}', [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+            '--workers', str(args.workers), '--threads', str(args.threads), 'wsgi:app'])
+    ]
+    print(f"{'mode':<20} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    for name, command in modes:
+        port = free_port()
+        # gunicorn.conf.py binds from PORT; the dev server command reads it directly
+        result = serve(command, port, args)
+        print(f"{name:<20} {result['requests']:>9} {result['rps']:>8.0f} {result['p50_ms']:>8.1f} "
+              f"{result['p95_ms']:>8.1f} {result['errors']:>7}")
+
+    os.remove(DB_PATH)
+
+if __name__ == '__main__':
+    main()
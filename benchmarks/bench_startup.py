@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Measure cold start: how long `import main` takes in a fresh interpreter, how long
+until that process has answered its first request, and how long a gunicorn server
+takes from launch until it serves GET /login. Every run gets an empty database,
+like a new container.
+
+Usage: python benchmarks/bench_startup.py [--repeat 5] [--app-dir PATH]
+Point --app-dir at another checkout (e.g. a git worktree) to compare revisions.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+import http.client
+from statistics import median
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IN_PROCESS = """
+import json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+response = main.app.test_client().get('/login')
+assert response.status_code == 200, response.status_code
+answered = time.perf_counter()
+print(json.dumps({'import': imported - started, 'first_response': answered - started}))
+"""
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def fresh_env(workdir):
+    return dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+                SECRET_KEY='bench-startup')
+
+def in_process(app_dir):
+    with tempfile.TemporaryDirectory() as workdir:
+        output = subprocess.run([sys.executable, '-c', IN_PROCESS], cwd=app_dir, env=fresh_env(workdir),
+                                capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def server_first_response(app_dir, timeout=60):
+    with tempfile.TemporaryDirectory() as workdir:
+        port = free_port()
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--workers', '1', 'wsgi:app'],
+            cwd=app_dir, env=fresh_env(workdir), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while time.perf_counter() - started < timeout:
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+                try:
+                    conn.request('GET', '/login')
+                    if conn.getresponse().status == 200:
+                        return time.perf_counter() - started
+                except OSError:
+                    time.sleep(0.01)
+                finally:
+                    conn.close()
+            raise RuntimeError('server never answered')
+        finally:
+            process.terminate()
+            try:
+                process.wait(5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure import time and time to first response')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--app-dir', default=ROOT)
+    args = parser.parse_args()
+
+    runs = [in_process(args.app_dir) for _ in range(args.repeat)]
+    serving = [server_first_response(args.app_dir) for _ in range(args.repeat)]
+    print(f"{'measure':<36} {'median ms':>10} {'min ms':>8}")
+    for name, values in (('import main', [r['import'] for r in runs]),
+                         ('first response (in process)', [r['first_response'] for r in runs]),
+                         ('gunicorn launch to first response', serving)):
+        print(f"{name:<36} {median(values) * 1000:>10.0f} {min(values) * 1000:>8.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Hold hundreds of idle /api/deals/stream connections open against one gunicorn
+worker, then time how long a deal change takes to reach every one of them.
+Reports the fan-out latency and the worker's thread count and memory with the
+streams open, which is what decides how many dashboards a worker can carry.
+
+Usage: python benchmarks/bench_stream.py [--streams 500] [--changes 20] [--worker-class gevent]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import selectors
+import subprocess
+from statistics import median
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Use a throwaway database so the real instance/deals.db is never touched
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench_stream.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+
+sys.path.append(ROOT)
+from main import app, db, User, Role, init_database
+from loadclient import Client, free_port, wait_until_serving
+
+def seed():
+    with app.app_context():
+        init_database()
+        user = User(username='bench', role=Role.query.filter_by(name='User').one())
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+
+def open_stream(port, cookie):
+    sock = socket.create_connection(('127.0.0.1', port))
+    sock.sendall(f'GET /api/deals/stream HTTP/1.1\r\nHost: localhost\r\nCookie: {cookie}\r\n'
+                 'Accept: text/event-stream\r\n\r\n'.encode())
+    return sock
+
+def read_until(sock, marker, buffers, timeout=30):
+    """Read from sock until marker has arrived since the last call; True if it did."""
+    deadline = time.monotonic() + timeout
+    while marker not in buffers[sock]:
+        sock.settimeout(max(deadline - time.monotonic(), 0.001))
+        try:
+            chunk = sock.recv(65536)
+        except socket.timeout:
+            return False
+        if not chunk:
+            return False
+        buffers[sock] += chunk
+    buffers[sock] = buffers[sock].split(marker, 1)[1]
+    return True
+
+def fan_out(streams, buffers, marker, timeout=30):
+    """Seconds until every stream has received marker, or None if some never did."""
+    started = time.perf_counter()
+    selector = selectors.DefaultSelector()
+    waiting = set()
+    for sock in streams:
+        if marker in buffers[sock]:
+            buffers[sock] = buffers[sock].split(marker, 1)[1]
+        else:
+            sock.setblocking(False)
+            selector.register(sock, selectors.EVENT_READ)
+            waiting.add(sock)
+    deadline = time.monotonic() + timeout
+    while waiting and time.monotonic() < deadline:
+        for key, _ in selector.select(timeout=1):
+            sock = key.fileobj
+            chunk = sock.recv(65536)
+            buffers[sock] += chunk
+            if marker in buffers[sock] or not chunk:
+                buffers[sock] = buffers[sock].split(marker, 1)[-1]
+                selector.unregister(sock)
+                waiting.discard(sock)
+                sock.setblocking(True)
+    selector.close()
+    return None if waiting else time.perf_counter() - started
+
+def process_stats(pid):
+    stats = {}
+    for line in open(f'/proc/{pid}/status'):
+        key, _, value = line.partition(':')
+        if key in ('Threads', 'VmRSS'):
+            stats[key] = int(value.split()[0])
+    return {'threads': stats['Threads'], 'rss_mb': round(stats['VmRSS'] / 1024, 1),
+            'open_fds': len(os.listdir(f'/proc/{pid}/fd'))}
+
+def main():
+    parser = argparse.ArgumentParser(description='Fan-out latency and cost of idle deal change streams')
+    parser.add_argument('--streams', type=int, default=500)
+    parser.add_argument('--changes', type=int, default=20)
+    parser.add_argument('--worker-class', default='gevent')
+    parser.add_argument('--threads', type=int, default=4, help='threads per worker for --worker-class gthread')
+    args = parser.parse_args()
+
+    seed()
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), LOG_LEVEL='WARNING', WEB_CONCURRENCY='1',
+               GUNICORN_WORKER_CLASS=args.worker_class, GUNICORN_THREADS=str(args.threads))
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                               cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    streams = []
+    try:
+        wait_until_serving(port, process)
+        writer = Client(port)
+        worker_pid = int(open(f'/proc/{process.pid}/task/{process.pid}/children').read().split()[0])
+        idle = process_stats(worker_pid)
+        # Every stream shares the writer's session: one logged-in user with many open dashboards
+        cookie = '; '.join(f'{k}={v}' for k, v in writer.cookies.items())
+        buffers = {}
+        started = time.perf_counter()
+        for _ in range(args.streams):
+            sock = open_stream(port, cookie)
+            buffers[sock] = b''
+            if not read_until(sock, b'retry: ', buffers, timeout=5):
+                sock.close()
+                print(f'stream {len(streams) + 1} was not served; the worker is out of capacity')
+                break
+            streams.append(sock)
+        print(f'opened {len(streams)} streams in {time.perf_counter() - started:.1f}s')
+
+        latencies = []
+        headers = {'Content-Type': 'application/json', 'X-CSRFToken': writer.csrf_token}
+        for n in range(args.changes):
+            body = json.dumps({'deal_name': f'Stream {n}', 'state': 'Texas', 'city': 'Austin', 'status': 'Lead'})
+            try:
+                status = writer.request('POST', '/api/deals', body, headers)[0]
+            except TimeoutError:
+                print('the write was never served: every worker thread is held by a stream')
+                break
+            if status != 201:
+                raise RuntimeError(f'creating a deal failed with HTTP {status}')
+            seconds = fan_out(streams, buffers, f'"deal_name":"Stream {n}"'.encode())
+            if seconds is None:
+                raise RuntimeError(f'change {n} did not reach every stream')
+            latencies.append(seconds)
+        loaded = process_stats(worker_pid)
+        writer.close()
+    finally:
+        for sock in streams:
+            sock.close()
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        os.remove(DB_PATH)
+
+    latencies.sort()
+    print(f'{args.worker_class} worker, {len(streams)} open streams, {len(latencies)} changes')
+    if latencies:
+        print(f'fan-out to every stream after the write returns: median {median(latencies) * 1000:.1f} ms, '
+              f'max {latencies[-1] * 1000:.1f} ms')
+    print(f"worker threads {idle['threads']} idle -> {loaded['threads']} with streams open")
+    print(f"worker RSS {idle['rss_mb']:.0f} MB idle -> {loaded['rss_mb']:.0f} MB "
+          f"({(loaded['rss_mb'] - idle['rss_mb']) * 1024 / max(len(streams), 1):.0f} KB per stream)")
+    print(f"worker open files {idle['open_fds']} -> {loaded['open_fds']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Synthetic data for the benchmarks: users, deals spread over a realistic pipeline,
+the status history that got each deal there, and files.
+
+Call generate() inside an app context whose DATABASE_URL points at a throwaway
+database. The same seed always produces the same data.
+"""
+import random
+from datetime import datetime, timedelta
+from werkzeug.security import generate_password_hash
+from main import db, User, Role, Deal, DealStatusHistory, File, init_database, rebuild_deal_rollups, \
+    rebuild_deal_search
+
+PASSWORD = 'bench'
+# Deals move along this pipeline; Dead can happen after any step
+PIPELINE = ['Lead', 'Pending', 'Under Contract', 'Closed']
+# Share of deals currently at each status
+STATUS_WEIGHTS = {'Lead': 30, 'Pending': 25, 'Under Contract': 15, 'Closed': 20, 'Dead': 10}
+# Markets, roughly weighted by how much business each one sees
+MARKETS = {
+    'Texas': (30, ['Austin', 'Dallas', 'Houston', 'San Antonio', 'Fort Worth']),
+    'Florida': (20, ['Tampa', 'Orlando', 'Miami', 'Jacksonville']),
+    'Arizona': (12, ['Phoenix', 'Tucson', 'Mesa']),
+    'Georgia': (10, ['Atlanta', 'Savannah']),
+    'North Carolina': (10, ['Charlotte', 'Raleigh', 'Durham']),
+    'Ohio': (8, ['Columbus', 'Cleveland', 'Cincinnati']),
+    'Colorado': (6, ['Denver', 'Colorado Springs']),
+    'Tennessee': (4, ['Nashville', 'Memphis']),
+}
+NAME_WORDS = ['Oak', 'Cedar', 'Harbor', 'Maple', 'Summit', 'Willow', 'Stone', 'River', 'Pine', 'Eagle',
+              'Ridge', 'Park', 'Commons', 'Plaza', 'Crossing', 'Point', 'Village', 'Landing', 'Heights', 'Court']
+FILE_KINDS = ['appraisal', 'survey', 'title', 'inspection', 'rent-roll', 'loi', 'psa', 'photos']
+CHUNK = 5000
+
+def weighted(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+def pipeline_to(status, rng):
+    """The statuses a deal passed through to reach status, in order."""
+    if status == 'Dead':
+        return PIPELINE[:rng.randint(1, 3)] + ['Dead']
+    return PIPELINE[:PIPELINE.index(status) + 1]
+
+def generate(users=20, deals=10000, max_files=4, seed=7, now=None):
+    """Fill an empty database and return {username: [deal ids]} for every generated user.
+
+    A few users own most deals, the way a handful of active acquisitions leads do. Every
+    user, plus the Admin 'bench-admin', has the password PASSWORD.
+    """
+    rng = random.Random(seed)
+    now = now or datetime.utcnow()
+    init_database()
+    user_role = Role.query.filter_by(name='User').one()
+    admin_role = Role.query.filter_by(name='Admin').one()
+    # Hashing is deliberately slow; every generated account shares one hash
+    password = generate_password_hash(PASSWORD)
+    db.session.execute(db.insert(User), [{'username': 'bench-admin', 'password': password, 'role_id': admin_role.id}] + [
+        {'username': f'bench{n}', 'password': password, 'role_id': user_role.id} for n in range(users)])
+    db.session.commit()
+    user_ids = dict(db.session.query(User.id, User.username).filter(User.username.like('bench%')).all())
+    owners = [user_id for user_id, name in user_ids.items() if name != 'bench-admin']
+    # Zipf-like: the k-th user is 1/k as busy as the first
+    owner_weights = [1 / (rank + 1) for rank in range(len(owners))]
+    states = {state: weight for state, (weight, _) in MARKETS.items()}
+
+    owned = {name: [] for name in user_ids.values()}
+    for start in range(0, deals, CHUNK):
+        rows, plans = [], []
+        for n in range(start, min(start + CHUNK, deals)):
+            owner = rng.choices(owners, weights=owner_weights)[0]
+            state = weighted(rng, states)
+            status = weighted(rng, STATUS_WEIGHTS)
+            created = now - timedelta(days=rng.uniform(0, 730))
+            steps = pipeline_to(status, rng)
+            changed = [created]
+            for _ in steps[1:]:
+                changed.append(min(changed[-1] + timedelta(days=rng.uniform(1, 30)), now))
+            rows.append({
+                'deal_name': f'{rng.choice(NAME_WORDS)} {rng.choice(NAME_WORDS)} {n}',
+                'state': state, 'city': rng.choice(MARKETS[state][1]), 'status': status, 'user_id': owner,
+                'created_at': created, 'updated_at': changed[-1],
+            })
+            plans.append((owner, list(zip(steps, changed)), rng.randint(0, max_files)))
+        ids = db.session.scalars(db.insert(Deal).returning(Deal.id, sort_by_parameter_order=True), rows).all()
+        db.session.execute(db.insert(DealStatusHistory), [
+            {'deal_id': deal_id, 'status': step, 'changed_by_user_id': owner, 'changed_at': at}
+            for deal_id, (owner, history, _) in zip(ids, plans) for step, at in history])
+        files = [
+            {'deal_id': deal_id, 'file_name': f'{rng.choice(FILE_KINDS)}-{deal_id}-{k}.pdf',
+             'dropbox_link': f'https://www.dropbox.com/s/{deal_id}-{k}'}
+            for deal_id, (_, _, file_count) in zip(ids, plans) for k in range(file_count)]
+        if files:
+            db.session.execute(db.insert(File), files)
+        db.session.commit()
+        for deal_id, (owner, _, _) in zip(ids, plans):
+            owned[user_ids[owner]].append(deal_id)
+    rebuild_deal_rollups()
+    rebuild_deal_search()
+    return owned
@@ -0,0 +1,54 @@
+"""
+HTTP helpers shared by the benchmarks that drive a real server: a logged-in
+keep-alive client and the plumbing to start a server on a free port.
+"""
+import re
+import time
+import socket
+import http.client
+from urllib.parse import urlencode
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_until_serving(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('server exited during startup')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('server did not start')
+
+class Client:
+    """One keep-alive connection with its own logged-in session."""
+
+    def __init__(self, port, username='bench', password='bench'):
+        self.conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        self.cookies = {}
+        page = self.request('GET', '/login')[1]
+        self.csrf_token = re.search(rb'name="csrf_token" value="([^"]+)"', page).group(1).decode()
+        form = urlencode({'username': username, 'password': password, 'csrf_token': self.csrf_token})
+        status = self.request('POST', '/login', form, {'Content-Type': 'application/x-www-form-urlencoded'})[0]
+        if status != 302:
+            raise RuntimeError(f'login as {username} failed with HTTP {status}')
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+        self.conn.request(method, path, body, headers)
+        response = self.conn.getresponse()
+        data = response.read()
+        for header in response.headers.get_all('Set-Cookie') or []:
+            name, _, rest = header.partition('=')
+            self.cookies[name] = rest.split(';', 1)[0]
+        return response.status, data
+
+    def close(self):
+        self.conn.close()
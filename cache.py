@@ -0,0 +1,70 @@
+"""
+In-process caching helpers for WildOakDealsApp.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUTTLCache:
+    """Thread-safe mapping that forgets entries after ttl seconds and evicts the least recently used beyond maxsize."""
+
+    def __init__(self, maxsize=1024, ttl=30, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, maxsize, ttl):
+        """Resize the cache and change the ttl of future entries, dropping any overflow."""
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, key):
+        """Return the cached value, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, self.clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl
+            }
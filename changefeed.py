@@ -0,0 +1,94 @@
+"""
+Fan-out of the deal change log to Server-Sent Events streams in one process.
+"""
+import json
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger('wildoak.changefeed')
+
+
+class ChangeFeed:
+    """Polls the change log on one background thread and hands new entries to every waiting stream.
+
+    fetch(after_id, limit) returns log entries (dicts with an increasing 'id') newer than after_id;
+    head() returns the newest id. Streams share one buffer of recent entries and one condition
+    variable, so an idle stream costs a wait on that condition rather than a query or a thread of
+    its own (under a gevent worker the waits are greenlets).
+    """
+
+    def __init__(self, fetch, head, poll_seconds=1.0, buffer_size=1000, batch_size=500):
+        self.fetch = fetch
+        self.head = head
+        self.poll_seconds = poll_seconds
+        self.batch_size = batch_size
+        self.subscribers = 0
+        self._buffer = deque(maxlen=buffer_size)
+        # The buffer holds every entry after _buffer_start, up to and including _last_id
+        self._buffer_start = None
+        self._last_id = None
+        self._condition = threading.Condition()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def wake(self):
+        """Poll now rather than at the next interval, e.g. after this process committed a change."""
+        self._wakeup.set()
+
+    def subscribe(self):
+        """Register a stream and return the id it should send changes after."""
+        with self._condition:
+            self.subscribers += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._last_id = self._buffer_start = self.head()
+                self._buffer.clear()
+                self._thread = threading.Thread(target=self._run, name='change-feed', daemon=True)
+                self._thread.start()
+            return self._last_id
+
+    def unsubscribe(self):
+        with self._condition:
+            self.subscribers -= 1
+
+    def wait(self, after_id, timeout):
+        """Entries newer than after_id, waiting up to timeout for one to arrive.
+
+        Returns [] on timeout, or None when after_id is older than the buffer and the caller
+        must catch up with fetch() itself.
+        """
+        with self._condition:
+            if self._last_id is None or after_id >= self._last_id:
+                self._condition.wait(timeout)
+            if after_id < self._buffer_start:
+                return None
+            return [entry for entry in self._buffer if entry['id'] > after_id]
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.poll_seconds)
+            self._wakeup.clear()
+            if not self.subscribers:
+                continue
+            try:
+                entries = self.fetch(self._last_id, self.batch_size)
+            except Exception:
+                # A locked or briefly unavailable database: streams keep waiting, the next poll retries
+                logger.exception('Polling the change log failed')
+                continue
+            if not entries:
+                continue
+            with self._condition:
+                for entry in entries:
+                    if len(self._buffer) == self._buffer.maxlen:
+                        self._buffer_start = self._buffer.popleft()['id']
+                    self._buffer.append(entry)
+                self._last_id = entries[-1]['id']
+                self._condition.notify_all()
+            if len(entries) == self.batch_size:
+                self._wakeup.set()
+
+
+def format_event(entry):
+    """One change log entry as a Server-Sent Events message."""
+    return f"id: {entry['id']}\nevent: {entry['kind']}\ndata: {json.dumps(entry['data'], separators=(',', ':'))}\n\n"
@@ -0,0 +1,47 @@
+"""
+Response compression for WildOakDealsApp: gzip, or brotli when it is installed, chosen from
+the client's Accept-Encoding.
+"""
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def available_encodings():
+    """Encodings this process can produce, best first."""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def compress(data, encoding, gzip_level=6, brotli_quality=4):
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    # mtime=0 keeps the output, and so any ETag, the same for the same body
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def compress_response(response, accept_encodings, mimetypes, min_bytes, gzip_level=6, brotli_quality=4):
+    """Compress a buffered response body in place when the client accepts it and it is worth it.
+
+    Streamed responses (exports, change streams) are left alone. A strong ETag becomes weak,
+    since the encoded bytes differ from the identity body it was computed for; weak
+    If-None-Match comparison still matches it.
+    """
+    if response.direct_passthrough or response.is_streamed or response.status_code != 200 \
+            or 'Content-Encoding' in response.headers or response.mimetype not in mimetypes:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = accept_encodings.best_match(available_encodings())
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < min_bytes:
+        return response
+    response.set_data(compress(data, encoding, gzip_level, brotli_quality))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
@@ -0,0 +1,50 @@
+"""
+JSON encoding for WildOakDealsApp: orjson when it is installed, the standard library otherwise.
+"""
+import datetime
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(o):
+    # Flask's own default writes dates as HTTP dates; ISO 8601 is what orjson does natively
+    if isinstance(o, (datetime.date, datetime.time)):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that serializes datetimes itself, so routes can hand it model values.
+
+    With orjson installed (and use_orjson not False) responses are encoded by orjson straight
+    to bytes; otherwise, and for pretty-printed debug output, by the standard library. Both
+    write naive datetimes as datetime.isoformat() does.
+    """
+
+    sort_keys = False
+    default = staticmethod(_default)
+
+    def __init__(self, app, use_orjson=True):
+        super().__init__(app)
+        self.use_orjson = use_orjson and orjson is not None
+
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS).decode()
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if not self.use_orjson or self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        body = orjson.dumps(self._prepare_response_obj(args, kwargs), default=_default,
+                            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
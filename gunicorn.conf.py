@@ -0,0 +1,41 @@
+"""
+Gunicorn settings for serving WildOakDealsApp: gunicorn -c gunicorn.conf.py wsgi:app
+Worker processes come from WEB_CONCURRENCY. Workers are gevent by default, so open deal
+change streams are greenlets rather than threads; GUNICORN_WORKER_CLASS=gthread switches
+back to GUNICORN_THREADS threads per worker.
+"""
+import os
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+if worker_class == 'gevent':
+    # Patch before the app is preloaded, so the locks, queues and threads it creates cooperate with greenlets
+    from gevent import monkey
+    monkey.patch_all()
+
+import multiprocessing
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 3000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+# Concurrent connections per gevent worker, most of them idle /api/deals/stream clients
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+timeout = 60
+keepalive = 5
+
+# Build the app once in the master: the database is initialised before any worker serves,
+# and every worker shares the same SECRET_KEY so sessions are valid on all of them
+preload_app = True
+
+def when_ready(server):
+    # Set up the schema once in the master; forked workers inherit the ready flag
+    from main import app, ensure_database
+    with app.app_context():
+        ensure_database()
+
+def post_fork(server, worker):
+    from main import app, db, start_notification_worker
+    with app.app_context():
+        # SQLite connections opened in the master must not be used from another process
+        db.engine.dispose(close=False)
+    # Threads do not survive fork; outbox leases keep the per-worker notification threads from double-sending
+    start_notification_worker(app)
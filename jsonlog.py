@@ -0,0 +1,131 @@
+"""
+Structured, non-blocking logging for WildOakDealsApp.
+Records are written as JSON lines by a background thread, so the thread that
+logs only pays for putting the record on a queue.
+"""
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+
+# Values of these fields never reach the log, at any nesting depth
+REDACTED_FIELDS = frozenset({
+    'password', 'new_password', 'csrf_token', 'secret_key', 'token', 'api_key', 'authorization', 'cookie'
+})
+REDACTED = '[REDACTED]'
+
+# Attributes every LogRecord has; anything else came in through extra= and becomes a JSON field
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+
+def redact(value):
+    """Return value with credential fields in any nested dict replaced by REDACTED."""
+    if isinstance(value, dict):
+        return {key: REDACTED if str(key).lower() in REDACTED_FIELDS else redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and every extra= field."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(redact(entry), default=str)
+
+
+class StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is when a record is emitted (test runners swap it)."""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """Adds the caller's context to each record and queues it without ever blocking."""
+
+    def __init__(self, log_queue, context=None):
+        super().__init__(log_queue)
+        self.context = context
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Anything that depends on the calling thread is resolved here, before the record changes threads
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        for key, value in (self.context() if self.context else {}).items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class QueueLogging:
+    """Sends a logger's records through a bounded queue to handler, which runs on a listener thread.
+
+    A full queue drops records (counted in dropped) rather than making the caller wait.
+    """
+
+    def __init__(self, logger, handler, context=None, maxsize=10000):
+        self.handler = handler
+        self.maxsize = maxsize
+        self.queue_handler = ContextQueueHandler(queue.Queue(maxsize), context)
+        self.listener = None
+        logger.addHandler(self.queue_handler)
+        # Threads do not survive fork, so a pre-fork worker gets a fresh queue and listener
+        os.register_at_fork(after_in_child=self._restart_after_fork)
+
+    @property
+    def dropped(self):
+        return self.queue_handler.dropped
+
+    def start(self):
+        self.listener = logging.handlers.QueueListener(self.queue_handler.queue, self.handler,
+                                                       respect_handler_level=True)
+        self.listener.start()
+
+    def stop(self):
+        """Write out everything queued so far and stop the listener thread."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def flush(self):
+        self.stop()
+        self.start()
+
+    def _restart_after_fork(self):
+        if self.listener is not None:
+            self.queue_handler.queue = queue.Queue(self.maxsize)
+            self.start()
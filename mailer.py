@@ -0,0 +1,95 @@
+"""
+Persistent SMTP delivery for WildOakDealsApp notifications.
+One authenticated session is reused for many messages and reopened when the
+server drops it, instead of connecting and logging in for every email.
+"""
+import smtplib
+import threading
+import time
+
+
+class SMTPMailer:
+    """Sends messages over a single reusable SMTP session."""
+
+    def __init__(self, host, port, use_tls=False, username=None, password=None, timeout=30,
+                 max_messages_per_connection=100, keepalive_seconds=60):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.max_messages_per_connection = max_messages_per_connection
+        self.keepalive_seconds = keepalive_seconds
+        self.connections_opened = 0
+        self.messages_sent = 0
+        self._server = None
+        self._sent_on_connection = 0
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config['MAIL_SERVER'],
+            config['MAIL_PORT'],
+            use_tls=config['MAIL_USE_TLS'],
+            username=config['MAIL_USERNAME'],
+            password=config['MAIL_PASSWORD'],
+            timeout=config['MAIL_TIMEOUT'],
+            max_messages_per_connection=config['MAIL_MAX_MESSAGES_PER_CONNECTION'],
+            keepalive_seconds=config['MAIL_KEEPALIVE_SECONDS']
+        )
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        self._server = server
+        self._sent_on_connection = 0
+        self.connections_opened += 1
+
+    def _disconnect(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                self._server.close()
+            self._server = None
+
+    def _session_is_stale(self):
+        # Servers drop idle sessions and cap messages per session, so start a fresh one first
+        idle = time.monotonic() - self._last_used > self.keepalive_seconds
+        return idle or self._sent_on_connection >= self.max_messages_per_connection
+
+    def send(self, msg):
+        """Send one email.Message, reconnecting once if the session was lost."""
+        with self._lock:
+            if self._server is not None and self._session_is_stale():
+                self._disconnect()
+            for attempt in range(2):
+                if self._server is None:
+                    self._connect()
+                try:
+                    self._server.send_message(msg)
+                    break
+                except Exception as e:
+                    # Only a dropped connection is worth retrying; SMTP refusals go back to the caller
+                    dropped = isinstance(e, smtplib.SMTPServerDisconnected) or not isinstance(e, smtplib.SMTPException)
+                    self._server.close()
+                    self._server = None
+                    if not dropped or attempt:
+                        raise
+            self._sent_on_connection += 1
+            self.messages_sent += 1
+            self._last_used = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
@@ -1,41 +1,311 @@
-from flask import Flask, request, jsonify, render_template, redirect, url_for, session
+from flask import Flask, Blueprint, abort, current_app, g, has_request_context, request, jsonify, render_template, redirect, url_for, session, make_response, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 import os
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 from flask_wtf.csrf import CSRFProtect, CSRFError
-import smtplib
-from email.mime.text import MIMEText
-from flask_sslify import SSLify
-from functools import wraps
-from flask_migrate import Migrate
-from collections import defaultdict
-
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.urandom(24)
-# Ensure instance directory exists for SQLite database
-instance_path = Path(app.instance_path)
-instance_path.mkdir(exist_ok=True)
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{instance_path / "deals.db"}'
-app.config['WTF_CSRF_ENABLED'] = True  # Enable CSRF protection
-db = SQLAlchemy(app)
-login_manager = LoginManager(app)
-login_manager.login_view = 'login'
-csrf = CSRFProtect(app)
-migrate = Migrate(app, db)
-
-# Email configuration using Replit Secrets
-app.config['MAIL_SERVER'] = 'smtp.gmail.com'
-app.config['MAIL_PORT'] = 587
-app.config['MAIL_USE_TLS'] = True
-app.config['MAIL_USERNAME'] = os.environ.get('GMAIL_USERNAME')
-app.config['MAIL_PASSWORD'] = os.environ.get('GMAIL_PASSWORD')
-
-# Enable HTTPS redirection in production (optional, comment out for local testing)
-if 'REPLIT_DEPLOYMENT' in os.environ:
-    sslify = SSLify(app)
+from functools import wraps, partial
+from sqlalchemy import func, or_, and_, table, column, literal_column, text
+from sqlalchemy.orm import joinedload
+import base64
+import json
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+import click
+import threading
+from sqlalchemy import event
+import uuid
+import hashlib
+import hmac
+import re
+import csv
+import io
+from collections import Counter
+import atexit
+import logging
+import random
+import time
+from werkzeug.http import is_resource_modified
+from cache import LRUTTLCache
+from jsonlog import JSONFormatter, QueueLogging, StdoutHandler
+from metrics import RequestMetrics
+from sqlprofile import ProfileLog, RequestProfile, call_site
+from changefeed import ChangeFeed, format_event
+from compression import compress_response
+from fastjson import FastJSONProvider
+
+db = SQLAlchemy()
+login_manager = LoginManager()
+login_manager.login_view = 'main.login'
+csrf = CSRFProtect()
+# Every route and CLI command lives on this blueprint; create_app registers it
+bp = Blueprint('main', __name__, cli_group=None)
+log = logging.getLogger('wildoak')
+
+def create_app(config=None):
+    """Build and initialise the app; config overrides the defaults below."""
+    app = Flask(__name__)
+    # Ensure instance directory exists for SQLite database
+    instance_path = Path(app.instance_path)
+    instance_path.mkdir(exist_ok=True)
+    app.config['SECRET_KEY'] = load_secret_key(instance_path)
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', f'sqlite:///{instance_path / "deals.db"}')
+    app.config['WTF_CSRF_ENABLED'] = True  # Enable CSRF protection
+
+    # Applied to every new SQLite connection. WAL lets readers in other worker processes run
+    # alongside a writer, and the busy timeout makes writers queue for the lock instead of failing.
+    app.config['SQLITE_JOURNAL_MODE'] = 'WAL'
+    app.config['SQLITE_SYNCHRONOUS'] = 'NORMAL'
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = 5000
+    # Create tables and seed roles on the first request each process serves; turn off once
+    # deployments run `flask init-db` themselves
+    app.config['AUTO_INIT_DATABASE'] = True
+
+    # Structured JSON logs. GETs to the busy endpoints below are logged at the given sample
+    # rate; errors and requests slower than LOG_SLOW_REQUEST_MS are always logged.
+    app.config['LOG_LEVEL'] = os.environ.get('LOG_LEVEL', 'INFO')
+    app.config['LOG_QUEUE_SIZE'] = 10000
+    app.config['LOG_SLOW_REQUEST_MS'] = 500
+    app.config['LOG_SAMPLE_RATES'] = {
+        'main.deals': 0.1,
+        'main.files': 0.1,
+        'main.get_analytics': 0.1,
+        'main.search_deals': 0.1,
+    }
+
+    # Per-endpoint request metrics at /metrics, readable by Admins and by scrapers sending
+    # "Authorization: Bearer <METRICS_TOKEN>". METRICS_ALLOW_LOCAL also trusts loopback; leave it
+    # off behind a reverse proxy on the same host, where every request arrives from loopback.
+    # Read when the app is created: turning it off also removes the per-statement SQL timers
+    app.config['METRICS_ENABLED'] = True
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+    app.config['METRICS_ALLOW_LOCAL'] = False
+
+    # SQL profiling for development and tests: records every statement a request runs with its
+    # call site, and warns about requests over their SQL_QUERY_BUDGETS entry (keyed by endpoint)
+    # or running one statement SQL_REPEAT_THRESHOLD times with different parameters (N+1)
+    app.config['SQL_PROFILE'] = os.environ.get('SQL_PROFILE') == '1'
+    app.config['SQL_QUERY_BUDGETS'] = {}
+    app.config['SQL_REPEAT_THRESHOLD'] = 5
+
+    # Deal change streams (/api/deals/stream): how often each process checks the change log for
+    # other processes' writes, and how often an idle stream sends a keepalive
+    app.config['CHANGE_STREAM_POLL_SECONDS'] = 1.0
+    app.config['CHANGE_STREAM_HEARTBEAT_SECONDS'] = 20
+    # The change log behind the streams and /api/deals/sync keeps this many days of changes; a
+    # client whose cursor is older must resync in full. Pruned every CHANGE_LOG_PRUNE_SECONDS
+    app.config['CHANGE_LOG_RETENTION_DAYS'] = 30
+    app.config['CHANGE_LOG_PRUNE_SECONDS'] = 3600
+    # Most change log entries one /api/deals/sync response covers
+    app.config['SYNC_MAX_CHANGES'] = 1000
+
+    # JSON responses are encoded with orjson when it is installed (turn off to compare)
+    app.config['JSON_USE_ORJSON'] = True
+    # Buffered responses of these types, at least COMPRESS_MIN_BYTES long, are sent gzip- or
+    # brotli-compressed to clients that accept it
+    app.config['COMPRESS_MIMETYPES'] = {'application/json', 'text/html', 'text/csv', 'application/x-ndjson'}
+    app.config['COMPRESS_MIN_BYTES'] = 1024
+    app.config['COMPRESS_GZIP_LEVEL'] = 6
+    app.config['COMPRESS_BROTLI_QUALITY'] = 4
+
+    # Email configuration using Replit Secrets
+    app.config['MAIL_SERVER'] = 'smtp.gmail.com'
+    app.config['MAIL_PORT'] = 587
+    app.config['MAIL_USE_TLS'] = True
+    app.config['MAIL_USERNAME'] = os.environ.get('GMAIL_USERNAME')
+    app.config['MAIL_PASSWORD'] = os.environ.get('GMAIL_PASSWORD')
+    app.config['MAIL_DEFAULT_SENDER'] = app.config['MAIL_USERNAME'] or 'notifications@localhost'
+    app.config['MAIL_TIMEOUT'] = 30
+    app.config['MAIL_MAX_MESSAGES_PER_CONNECTION'] = 100
+    app.config['MAIL_KEEPALIVE_SECONDS'] = 60
+
+    # Bulk import inserts deals in chunks of this many rows
+    app.config['IMPORT_CHUNK_SIZE'] = 1000
+    app.config['IMPORT_MAX_ROWS'] = 100000
+    # Largest id list a single bulk status change accepts, and the most deals a filter may move
+    # without "confirm": true
+    app.config['BULK_STATUS_MAX_IDS'] = 10000
+    app.config['BULK_STATUS_MAX_FILTER_MATCHES'] = 1000
+    # Exports fetch and emit deals this many rows at a time
+    app.config['EXPORT_BATCH_SIZE'] = 500
+
+    # Logged-in users are cached briefly so most requests authenticate without a query
+    app.config['USER_CACHE_TTL_SECONDS'] = 30
+    app.config['USER_CACHE_SIZE'] = 1024
+
+    # Outbox delivery: retries back off exponentially from NOTIFY_RETRY_BASE_SECONDS
+    app.config['NOTIFY_MAX_ATTEMPTS'] = 5
+    app.config['NOTIFY_RETRY_BASE_SECONDS'] = 30
+    app.config['NOTIFY_LEASE_SECONDS'] = 120
+    app.config['NOTIFY_POLL_SECONDS'] = 5
+    app.config['NOTIFY_BATCH_SIZE'] = 50
+    # When non-zero, changes for the same recipient within this many seconds go out as one digest email
+    app.config['NOTIFY_DIGEST_SECONDS'] = int(os.environ.get('NOTIFY_DIGEST_SECONDS', 0))
+    app.config.update(config or {})
+
+    app.json = FastJSONProvider(app, use_orjson=app.config['JSON_USE_ORJSON'])
+    configure_logging(app)
+    db.init_app(app)
+    login_manager.init_app(app)
+    csrf.init_app(app)
+    # Alembic, behind Flask-Migrate, is only needed for `flask db ...`; only the flask CLI
+    # loads the app inside a click context, so serving processes never import it
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    app.register_blueprint(bp)
+    user_cache.configure(maxsize=app.config['USER_CACHE_SIZE'], ttl=app.config['USER_CACHE_TTL_SECONDS'])
+
+    # Enable HTTPS redirection in production (optional, comment out for local testing)
+    if 'REPLIT_DEPLOYMENT' in os.environ:
+        from flask_sslify import SSLify
+        SSLify(app)
+
+    # No queries here: creating the app stays cheap, and the schema is set up by
+    # `flask init-db` or the first request
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, 'connect', partial(set_sqlite_pragmas, app.config))
+        if app.config['METRICS_ENABLED'] or app.config['SQL_PROFILE']:
+            event.listen(db.engine, 'before_cursor_execute', start_statement_timer)
+            event.listen(db.engine, 'after_cursor_execute', record_statement_time)
+    return app
+
+def load_secret_key(instance_path):
+    """Use SECRET_KEY from the environment, else a key generated once and kept in the instance folder.
+
+    A stable key keeps users logged in across restarts and on every worker process.
+    """
+    if os.environ.get('SECRET_KEY'):
+        return os.environ['SECRET_KEY']
+    key_file = instance_path / 'secret_key'
+    if not key_file.exists():
+        pending = instance_path / f'secret_key.{os.getpid()}'
+        pending.write_bytes(os.urandom(32))
+        pending.chmod(0o600)
+        try:
+            # Linking is atomic, so processes starting together all end up with the first key written
+            os.link(pending, key_file)
+        except FileExistsError:
+            pass
+        finally:
+            pending.unlink()
+    return key_file.read_bytes()
+
+queue_logging = None
+
+def configure_logging(app):
+    """Send the 'wildoak' logger through one background JSON writer per process."""
+    global queue_logging
+    log.setLevel(app.config['LOG_LEVEL'])
+    if queue_logging is None:
+        handler = StdoutHandler()
+        handler.setFormatter(JSONFormatter())
+        queue_logging = QueueLogging(log, handler, context=request_log_context, maxsize=app.config['LOG_QUEUE_SIZE'])
+        queue_logging.start()
+        atexit.register(queue_logging.stop)
+        log.propagate = False
+
+def request_log_context():
+    """Request id, route and user for records logged while handling a request."""
+    if not has_request_context():
+        return {}
+    context = {'request_id': g.get('request_id'), 'route': request.endpoint, 'method': request.method}
+    # Only report a user Flask-Login has already loaded; logging must never trigger a query
+    user = g.get('_login_user')
+    if user is not None and user.is_authenticated:
+        context['user_id'] = user.id
+    return context
+
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+@bp.before_app_request
+def start_request_log():
+    incoming = request.headers.get('X-Request-ID', '')
+    g.request_id = incoming if REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex
+    g.request_started = time.perf_counter()
+
+def request_log_sampled(status, latency_ms):
+    if status >= 400 or (latency_ms is not None and latency_ms >= current_app.config['LOG_SLOW_REQUEST_MS']):
+        return True
+    if request.method not in ('GET', 'HEAD'):
+        return True
+    rate = current_app.config['LOG_SAMPLE_RATES'].get(request.endpoint, 1.0)
+    return rate >= 1 or random.random() < rate
+
+# Counters for this process; each gunicorn worker keeps and serves its own, labelled with its pid
+request_metrics = RequestMetrics()
+
+def start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the statement's execution context, which is discarded even when the statement
+    # raises and after_cursor_execute never fires
+    context.statement_started = time.perf_counter()
+
+def record_statement_time(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context.statement_started
+    # Background threads (notifications, CLI commands) have no request to charge the statement to
+    if has_request_context():
+        g.sql_statements = g.get('sql_statements', 0) + 1
+        g.sql_seconds = g.get('sql_seconds', 0.0) + elapsed
+        profile = g.get('sql_profile')
+        if profile is not None:
+            profile.record(statement, parameters, elapsed, call_site(depth=1))
+
+# Profiles of recent requests while SQL_PROFILE is on
+sql_profiles = ProfileLog()
+
+@bp.before_app_request
+def start_sql_profile():
+    if current_app.config['SQL_PROFILE']:
+        g.sql_profile = RequestProfile(request.endpoint, request.method, request.path)
+
+@bp.after_app_request
+def finish_sql_profile(response):
+    profile = g.pop('sql_profile', None)
+    if profile is not None:
+        problems = profile.problems(current_app.config['SQL_QUERY_BUDGETS'].get(request.endpoint),
+                                    current_app.config['SQL_REPEAT_THRESHOLD'])
+        sql_profiles.add(profile, problems)
+        for problem in problems:
+            log.warning(problem)
+        log.debug('sql profile', extra=profile.as_dict())
+    return response
+
+@bp.after_app_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if current_app.config['METRICS_ENABLED'] and started is not None:
+        request_metrics.observe(request.endpoint, request.method, response.status_code,
+                                time.perf_counter() - started, g.get('sql_statements', 0), g.get('sql_seconds', 0.0))
+    return response
+
+@bp.after_app_request
+def finish_request_log(response):
+    # A request rejected before start_request_log ran (e.g. by CSRF) still gets an id and a log line
+    if 'request_id' not in g:
+        g.request_id = uuid.uuid4().hex
+    started = g.get('request_started')
+    latency_ms = round((time.perf_counter() - started) * 1000, 1) if started is not None else None
+    response.headers['X-Request-ID'] = g.request_id
+    if request_log_sampled(response.status_code, latency_ms):
+        log.info('request', extra={'path': request.path, 'status': response.status_code, 'latency_ms': latency_ms})
+    return response
+
+# Registered after the hooks above so it runs before them, and its time counts in the request's latency
+@bp.after_app_request
+def compress(response):
+    config = current_app.config
+    return compress_response(response, request.accept_encodings, config['COMPRESS_MIMETYPES'],
+                             config['COMPRESS_MIN_BYTES'], config['COMPRESS_GZIP_LEVEL'],
+                             config['COMPRESS_BROTLI_QUALITY'])
+
+def set_sqlite_pragmas(config, dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}")
+    cursor.execute(f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}")
+    cursor.execute(f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}")
+    cursor.close()
 
 class Role(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -54,19 +324,28 @@ class User(UserMixin, db.Model):
     def check_password(self, password):
         return check_password_hash(self.password, password)
 
+    # Loaded together with the user in load_user, so route checks never query for it
+    role = db.relationship('Role')
+
     @property
-    def role(self):
-        return db.session.get(Role, self.role_id)  # Updated for SQLAlchemy 2.0 compatibility
+    def is_admin(self):
+        return role_name(self.role_id) == 'Admin'
 
 class Deal(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     deal_name = db.Column(db.String(100), nullable=False)
     state = db.Column(db.String(50), nullable=False)
     city = db.Column(db.String(100), nullable=False)
-    status = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(50), nullable=False, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    # Users list and page their own deals by creation or update time
+    __table_args__ = (
+        db.Index('ix_deal_user_id_created_at', 'user_id', 'created_at'),
+        db.Index('ix_deal_user_id_updated_at', 'user_id', 'updated_at'),
+    )
 
     # Simplified relationship - just one clean relationship with cascade delete
     status_histories = db.relationship('DealStatusHistory', backref='deal', cascade='all, delete-orphan')
@@ -78,29 +357,190 @@ class DealStatusHistory(db.Model):
     changed_by_user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     changed_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # History is always read per deal, newest first
+    __table_args__ = (
+        db.Index('ix_deal_status_history_deal_id_changed_at', 'deal_id', 'changed_at'),
+    )
+
     # The backref='deal' is now defined in the Deal class
     user = db.relationship('User', backref='status_changes')
 
 class File(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    deal_id = db.Column(db.Integer, db.ForeignKey('deal.id'), nullable=False)
+    deal_id = db.Column(db.Integer, db.ForeignKey('deal.id'), nullable=False, index=True)
     file_name = db.Column(db.String(100), nullable=False)
     dropbox_link = db.Column(db.String(500), nullable=False)
     upload_date = db.Column(db.DateTime, default=datetime.utcnow)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+class DealRollup(db.Model):
+    # Running deal counts per user; dimension is 'status', 'state' or 'month'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    dimension = db.Column(db.String(10), primary_key=True)
+    bucket = db.Column(db.String(100), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    # Admin analytics sum one dimension across all users
+    __table_args__ = (
+        db.Index('ix_deal_rollup_dimension_bucket', 'dimension', 'bucket'),
+    )
+
+class NotificationOutbox(db.Model):
+    # Emails waiting to be sent by the background notification worker
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='pending')  # pending, sent or failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    claim_token = db.Column(db.String(32), nullable=True)  # Set while a worker holds the lease
+
+    # The worker polls for pending rows that are due, claims them by token and digests by recipient
+    __table_args__ = (
+        db.Index('ix_notification_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+        db.Index('ix_notification_outbox_claim_token', 'claim_token'),
+        db.Index('ix_notification_outbox_recipient_status', 'recipient', 'status'),
+    )
+
+class DealChange(db.Model):
+    # Append-only log of deal and file changes, written in the same transaction as the change.
+    # The id orders changes across processes and is the cursor change streams resume from.
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # deal.created, deal.updated, deal.status, deal.deleted, file.added, file.removed
+    deal_id = db.Column(db.Integer, nullable=False)  # No foreign key: the entry outlives a deleted deal
+    user_id = db.Column(db.Integer, nullable=False)  # The deal's owner; only they and Admins see the change
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_deal_change_user_id_id', 'user_id', 'id'),
+    )
+
+# Full-text index over deals and their file names; rowid is the deal id.
+# SQLite triggers keep it in sync with every write path, including bulk and raw SQL ones.
+deal_search = table('deal_search', column('rowid'), column('rank'))
+
+DEAL_SEARCH_FILE_NAMES = "coalesce((SELECT group_concat(file_name, ' ') FROM file WHERE deal_id = {}), '')"
+
+DEAL_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS deal_search USING fts5("
+    "deal_name, city, state, status, file_names, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    # Rank name matches above location, status and file name matches. Written only once: rewriting
+    # it makes other connections' next ranked join fail with "SQL logic error"
+    "INSERT INTO deal_search (deal_search, rank) SELECT 'rank', 'bm25(10.0, 3.0, 3.0, 1.0, 2.0)' "
+    "WHERE NOT EXISTS (SELECT 1 FROM deal_search_config WHERE k = 'rank')",
+    "CREATE TRIGGER IF NOT EXISTS deal_search_insert AFTER INSERT ON deal BEGIN "
+    "INSERT INTO deal_search (rowid, deal_name, city, state, status, file_names) "
+    f"VALUES (new.id, new.deal_name, new.city, new.state, new.status, {DEAL_SEARCH_FILE_NAMES.format('new.id')}); END",
+    "CREATE TRIGGER IF NOT EXISTS deal_search_update AFTER UPDATE OF deal_name, city, state, status ON deal "
+    "WHEN old.deal_name IS NOT new.deal_name OR old.city IS NOT new.city "
+    "OR old.state IS NOT new.state OR old.status IS NOT new.status BEGIN "
+    "UPDATE deal_search SET deal_name = new.deal_name, city = new.city, state = new.state, status = new.status "
+    "WHERE rowid = new.id; END",
+    "CREATE TRIGGER IF NOT EXISTS deal_search_delete AFTER DELETE ON deal BEGIN "
+    "DELETE FROM deal_search WHERE rowid = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS deal_search_file_insert AFTER INSERT ON file BEGIN "
+    f"UPDATE deal_search SET file_names = {DEAL_SEARCH_FILE_NAMES.format('new.deal_id')} WHERE rowid = new.deal_id; END",
+    "CREATE TRIGGER IF NOT EXISTS deal_search_file_update AFTER UPDATE OF file_name, deal_id ON file BEGIN "
+    f"UPDATE deal_search SET file_names = {DEAL_SEARCH_FILE_NAMES.format('old.deal_id')} WHERE rowid = old.deal_id; "
+    f"UPDATE deal_search SET file_names = {DEAL_SEARCH_FILE_NAMES.format('new.deal_id')} WHERE rowid = new.deal_id; END",
+    "CREATE TRIGGER IF NOT EXISTS deal_search_file_delete AFTER DELETE ON file BEGIN "
+    f"UPDATE deal_search SET file_names = {DEAL_SEARCH_FILE_NAMES.format('old.deal_id')} WHERE rowid = old.deal_id; END",
+]
+
+@event.listens_for(db.metadata, 'after_create')
+def create_deal_search(target, connection, **kw):
+    for statement in DEAL_SEARCH_DDL:
+        connection.exec_driver_sql(statement)
+
+@event.listens_for(db.metadata, 'before_drop')
+def drop_deal_search(target, connection, **kw):
+    connection.exec_driver_sql('DROP TABLE IF EXISTS deal_search')
+
+def rebuild_deal_search():
+    """Repopulate the full-text index from the deal and file tables and return the number of deals indexed."""
+    db.session.execute(text('DELETE FROM deal_search'))
+    db.session.execute(text(
+        "INSERT INTO deal_search (rowid, deal_name, city, state, status, file_names) "
+        "SELECT deal.id, deal.deal_name, deal.city, deal.state, deal.status, coalesce(files.names, '') FROM deal "
+        "LEFT JOIN (SELECT deal_id, group_concat(file_name, ' ') AS names FROM file GROUP BY deal_id) AS files "
+        "ON files.deal_id = deal.id"
+    ))
+    # Merge the freshly written index segments so queries touch as few b-trees as possible
+    db.session.execute(text("INSERT INTO deal_search (deal_search) VALUES ('optimize')"))
+    db.session.commit()
+    return db.session.execute(text('SELECT count(*) FROM deal_search')).scalar()
+
+def deal_search_expression(q):
+    """Turn free text into an FTS5 query: every word must match, each as a prefix."""
+    terms = re.findall(r'\w+', q)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+# Process-wide role id -> name map; roles change almost never
+_role_names = None
+
+def role_names(refresh=False):
+    global _role_names
+    if _role_names is None or refresh:
+        _role_names = {role.id: role.name for role in Role.query.all()}
+    return _role_names
+
+def role_name(role_id):
+    names = role_names()
+    if role_id not in names:
+        # Another process may have added the role since we cached
+        names = role_names(refresh=True)
+    return names.get(role_id)
+
+def role_id_for(name):
+    for refresh in (False, True):
+        for role_id, cached_name in role_names(refresh).items():
+            if cached_name == name:
+                return role_id
+    return None
+
+def invalidate_role_cache():
+    global _role_names
+    _role_names = None
+
+class SessionUser(UserMixin):
+    """Read-only snapshot of a User kept in the login cache and used as current_user."""
+
+    def __init__(self, user):
+        self.id = user.id
+        self.username = user.username
+        self.role_id = user.role_id
+        self.role_name = user.role.name
+        self.email = user.email
+        self.is_admin = self.role_name == 'Admin'
+
+# Sized from the app config by create_app
+user_cache = LRUTTLCache()
+
 @login_manager.user_loader
 def load_user(user_id):
-    return db.session.get(User, int(user_id))
+    user_id = int(user_id)
+    cached = user_cache.get(user_id)
+    if cached is None:
+        user = db.session.get(User, user_id, options=[joinedload(User.role)])
+        if user is None:
+            return None
+        cached = SessionUser(user)
+        user_cache.set(user_id, cached)
+    return cached
 
 def check_permission(permission):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            if current_user.role.name == 'Admin' or (permission == 'view_own' and 'own' in permission):
+            if current_user.is_admin or (permission == 'view_own' and 'own' in permission):
                 return f(*args, **kwargs)
-            if permission == 'admin_only' and current_user.role.name != 'Admin':
+            if permission == 'admin_only' and not current_user.is_admin:
                 return jsonify({'error': 'Permission denied'}), 403
             return jsonify({'error': 'Permission denied'}), 403
         return decorated_function
@@ -113,70 +553,159 @@ def csrf_exempt(f):
         return f(*args, **kwargs)
     return decorated_function
 
-def get_deal_analytics():
-    if current_user.role.name == 'Admin':
-        deals = Deal.query.all()
-    else:
-        deals = Deal.query.filter_by(user_id=current_user.id).all()
+def compute_deal_analytics(user_id=None):
+    """Count deals by status, state, user and creation month with GROUP BY queries.
 
-    # Analytics data
-    status_counts = defaultdict(int)
-    state_counts = defaultdict(int)
-    user_counts = defaultdict(int)
-    deals_by_month = defaultdict(int)
+    Pass a user_id to scope the counts to that user's deals; None counts every deal.
+    """
+    def grouped(key, *joins):
+        query = db.session.query(key, func.count(Deal.id))
+        for target in joins:
+            query = query.join(target)
+        if user_id is not None:
+            query = query.filter(Deal.user_id == user_id)
+        return dict(query.group_by(key).all())
 
-    for deal in deals:
-        status_counts[deal.status] += 1
-        state_counts[deal.state] += 1
-        user_counts[deal.user_id] += 1
-        deals_by_month[deal.created_at.strftime('%Y-%m')] += 1
+    return {
+        'status_counts': grouped(Deal.status),
+        'state_counts': grouped(Deal.state),
+        'user_counts': grouped(User.username, User),
+        'deals_by_month': grouped(func.strftime('%Y-%m', Deal.created_at))
+    }
 
-    # Get user names for user_counts
-    user_names = {user.id: user.username for user in User.query.all()}
-    user_counts_formatted = {user_names[user_id]: count for user_id, count in user_counts.items()}
+def deal_month(created_at):
+    return created_at.strftime('%Y-%m')
+
+def deal_rollup_buckets(deal):
+    """Return the rollup bucket a deal falls into for each dimension."""
+    return {'status': deal.status, 'state': deal.state, 'month': deal_month(deal.created_at)}
+
+def adjust_deal_rollups(user_id, buckets, delta):
+    """Add delta to the user's counter for each (dimension, bucket) pair."""
+    apply_rollup_deltas(user_id, [(dimension, bucket, delta) for dimension, bucket in buckets.items()])
+
+def apply_rollup_deltas(user_id, deltas):
+    """Apply (dimension, bucket, delta) changes to the user's counters with a single upsert.
+
+    Runs on the current session so the counters commit or roll back with the deal write.
+    """
+    if not deltas:
+        return
+    stmt = sqlite_insert(DealRollup).values([
+        {'user_id': user_id, 'dimension': dimension, 'bucket': bucket, 'count': delta}
+        for dimension, bucket, delta in deltas
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'dimension', 'bucket'],
+        set_={'count': DealRollup.count + stmt.excluded['count']}
+    )
+    db.session.execute(stmt)
+
+def expected_deal_rollups():
+    """Recompute every rollup counter from the deal table."""
+    expected = {}
+    keys = {
+        'status': Deal.status,
+        'state': Deal.state,
+        'month': func.strftime('%Y-%m', Deal.created_at)
+    }
+    for dimension, key in keys.items():
+        rows = db.session.query(Deal.user_id, key, func.count(Deal.id)).group_by(Deal.user_id, key)
+        for user_id, bucket, count in rows:
+            expected[(user_id, dimension, bucket)] = count
+    return expected
+
+def verify_deal_rollups():
+    """Compare stored counters with the deal table.
+
+    Returns {(user_id, dimension, bucket): (stored, expected)} for every counter that drifted.
+    """
+    expected = expected_deal_rollups()
+    stored = {(r.user_id, r.dimension, r.bucket): r.count for r in DealRollup.query.all()}
+    return {
+        key: (stored.get(key, 0), expected.get(key, 0))
+        for key in stored.keys() | expected.keys()
+        if stored.get(key, 0) != expected.get(key, 0)
+    }
+
+def rebuild_deal_rollups():
+    """Replace every rollup counter with values recomputed from the deal table and return the drift found."""
+    drift = verify_deal_rollups()
+    DealRollup.query.delete()
+    db.session.add_all(
+        DealRollup(user_id=user_id, dimension=dimension, bucket=bucket, count=count)
+        for (user_id, dimension, bucket), count in expected_deal_rollups().items()
+    )
+    db.session.commit()
+    return drift
+
+def read_deal_rollups(user_id=None):
+    """Build the analytics payload from the rollup counters instead of scanning deals."""
+    def summed(key, dimension, *joins):
+        query = db.session.query(key, func.sum(DealRollup.count))
+        for target, condition in joins:
+            query = query.join(target, condition)
+        query = query.filter(DealRollup.dimension == dimension, DealRollup.count > 0)
+        if user_id is not None:
+            query = query.filter(DealRollup.user_id == user_id)
+        return dict(query.group_by(key).all())
 
     return {
-        'status_counts': dict(status_counts),
-        'state_counts': dict(state_counts),
-        'user_counts': user_counts_formatted,
-        'deals_by_month': dict(deals_by_month)
+        'status_counts': summed(DealRollup.bucket, 'status'),
+        'state_counts': summed(DealRollup.bucket, 'state'),
+        'user_counts': summed(User.username, 'status', (User, User.id == DealRollup.user_id)),
+        'deals_by_month': summed(DealRollup.bucket, 'month')
     }
 
-@app.route('/')
+def get_deal_analytics():
+    # Admins see analytics for every deal, Users only for their own
+    if current_user.is_admin:
+        return read_deal_rollups()
+    return read_deal_rollups(current_user.id)
+
+def dashboard_data():
+    """Everything the dashboard shows on load: the first page of deals, analytics, and the change
+    cursor to stream from so nothing committed after this snapshot is missed."""
+    # Read the cursor first: a change that lands while the rest is read is then replayed, not lost
+    cursor = latest_change_id()
+    return {
+        'cursor': cursor,
+        'deals': paginate_deals(filtered_deals_query({}), {}),
+        'analytics': get_deal_analytics()
+    }
+
+@bp.route('/')
 @login_required
 def home():
-    analytics = get_deal_analytics()
-    return render_template('home.html', analytics=analytics)
+    # Rendered with its data, so the first paint needs no further requests
+    return render_template('home.html', dashboard=dashboard_data())
 
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         try:
-            # Clear debug logging
-            print("Login attempt - Form data:", request.form)
-            
             username = request.form.get('username')
             password = request.form.get('password')
             
             if not username or not password:
-                print("Login failed: Missing username or password")
+                log.warning('Login failed: missing username or password')
                 return render_template('login.html', error='Username and password are required')
                 
             user = User.query.filter_by(username=username).first()
             if user and user.check_password(password):
                 login_user(user, remember=True)
-                print(f"User {user.username} logged in as {user.role.name}")
+                log.info('User logged in', extra={'username': user.username, 'role': role_name(user.role_id)})
                 next_page = request.args.get('next')
-                return redirect(next_page or url_for('home'))
+                return redirect(next_page or url_for('main.home'))
             
-            print("Login failed: Invalid username or password")
+            log.warning('Login failed: invalid username or password', extra={'username': username})
             return render_template('login.html', error='Invalid username or password')
         except Exception as e:
-            print(f"Login error: {str(e)}")
+            log.exception('Login error')
             return render_template('login.html', error='An error occurred during login')
     return render_template('login.html')
 
-@app.route('/register', methods=['GET', 'POST'])
+@bp.route('/register', methods=['GET', 'POST'])
 def register():
     if request.method == 'POST':
         username = request.form.get('username')
@@ -186,25 +715,43 @@ def register():
             return render_template('register.html', error='Username and password are required')
         if User.query.filter_by(username=username).first():
             return render_template('register.html', error='Username already exists')
-        user_role = Role.query.filter_by(name='User').first()
-        if not user_role:
+        user_role_id = role_id_for('User')
+        if not user_role_id:
             return render_template('register.html', error='Default User role not found')
-        new_user = User(username=username, role_id=user_role.id, email=email)
+        new_user = User(username=username, role_id=user_role_id, email=email)
         new_user.set_password(password)
         db.session.add(new_user)
         db.session.commit()
-        print(f"New user registered: {username} as User")
-        return redirect(url_for('login'))
+        log.info('User registered', extra={'username': username, 'role': 'User'})
+        return redirect(url_for('main.login'))
     return render_template('register.html')
 
-@app.route('/logout')
+@bp.route('/metrics')
+def metrics():
+    token = current_app.config['METRICS_TOKEN']
+    scheme, _, presented = request.headers.get('Authorization', '').partition(' ')
+    scraper = bool(token) and scheme.lower() == 'bearer' and hmac.compare_digest(presented.encode(), token.encode())
+    local = current_app.config['METRICS_ALLOW_LOCAL'] and request.remote_addr in ('127.0.0.1', '::1')
+    if not (scraper or local or (current_user.is_authenticated and current_user.is_admin)):
+        return jsonify({'error': 'Permission denied'}), 403
+    cache = user_cache.stats()
+    body = request_metrics.render({
+        'user_cache_hits_total': ('counter', 'User cache lookups answered from the cache.', cache['hits']),
+        'user_cache_misses_total': ('counter', 'User cache lookups that went to the database.', cache['misses']),
+        'user_cache_size': ('gauge', 'Users currently cached.', cache['size']),
+        'log_records_dropped_total': ('counter', 'Log records dropped because the log queue was full.',
+                                      queue_logging.dropped if queue_logging else 0),
+    })
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+@bp.route('/logout')
 @login_required
 def logout():
+    log.info('User logged out')
     logout_user()
-    print("User logged out")
-    return redirect(url_for('login'))
+    return redirect(url_for('main.login'))
 
-@app.route('/api/users', methods=['POST', 'PUT'])
+@bp.route('/api/users', methods=['POST', 'PUT'])
 @login_required
 @check_permission('admin_only')
 @csrf_exempt  # Exempt CSRF for API endpoints (handled via header)
@@ -222,21 +769,21 @@ def manage_users():
             required_fields = ['username', 'password', 'role']
             missing = [field for field in required_fields if not data.get(field)]
             if missing:
-                print(f"Missing fields for user creation: {missing}")
+                log.warning('Missing fields for user creation', extra={'missing': missing})
                 return jsonify({'error': f'Missing required field: {missing[0]}'}), 400
             if User.query.filter_by(username=data.get('username')).first():
                 return jsonify({'error': 'Username already exists'}), 400
-            role = Role.query.filter_by(name=data.get('role')).first()
-            if not role:
+            role_id = role_id_for(data.get('role'))
+            if not role_id:
                 return jsonify({'error': 'Invalid role'}), 400
-            new_user = User(username=data.get('username'), role_id=role.id, email=data.get('email', None))
+            new_user = User(username=data.get('username'), role_id=role_id, email=data.get('email', None))
             new_user.set_password(data.get('password'))
             db.session.add(new_user)
             db.session.commit()
-            print(f"New user created by Admin: {data.get('username')} as {role.name}")
+            log.info('User created by Admin', extra={'username': data.get('username'), 'role': data.get('role')})
             return jsonify({'message': 'User created successfully', 'username': new_user.username}), 201
         except Exception as e:
-            print(f"Error creating user: {str(e)}")
+            log.exception('Error creating user')
             return jsonify({'error': str(e)}), 400
 
     if request.method == 'PUT':
@@ -248,27 +795,200 @@ def manage_users():
             required_fields = ['username', 'role']
             missing = [field for field in required_fields if not data.get(field)]
             if missing:
-                print(f"Missing fields for user update: {missing}")
+                log.warning('Missing fields for user update', extra={'missing': missing})
                 return jsonify({'error': f'Missing required field: {missing[0]}'}), 400
             user = User.query.filter_by(username=data.get('username')).first()
             if not user:
                 return jsonify({'error': 'User not found'}), 404
-            role = Role.query.filter_by(name=data.get('role')).first()
-            if not role:
+            role_id = role_id_for(data.get('role'))
+            if not role_id:
                 return jsonify({'error': 'Invalid role'}), 400
-            user.role_id = role.id
+            user.role_id = role_id
             if 'password' in data:
                 user.set_password(data.get('password'))
             if 'email' in data:
                 user.email = data.get('email')
             db.session.commit()
-            print(f"User updated by Admin: {data.get('username')} to role {role.name}")
+            # Role names are unchanged; only this user's cached snapshot is out of date
+            user_cache.invalidate(user.id)
+            log.info('User updated by Admin', extra={'username': data.get('username'), 'role': data.get('role')})
             return jsonify({'message': 'User updated successfully', 'username': user.username}), 200
         except Exception as e:
-            print(f"Error updating user: {str(e)}")
+            log.exception('Error updating user')
             return jsonify({'error': str(e)}), 400
 
-@app.route('/api/deals', methods=['GET', 'POST'])
+def deal_scope_validators():
+    """Return (latest updated_at, row count) for the deals the current user can see.
+
+    Any create or update moves the timestamp and any delete changes the count, so the pair
+    changes whenever a response built from these deals could.
+    """
+    query = db.session.query(func.max(Deal.updated_at), func.count(Deal.id))
+    if not current_user.is_admin:
+        query = query.filter(Deal.user_id == current_user.id)
+    return query.one()
+
+def conditional_json(validators, build_body):
+    """Answer with 304 Not Modified when the client already holds this version, else send build_body() as JSON.
+
+    The ETag hashes the validators together with the route and query string, so different pages
+    and filters of the same data get different tags. The body is only built on a miss. There is
+    no Last-Modified: a timestamp to the second misses deletes and same-second writes that the
+    ETag's count and max catch.
+    """
+    parts = (request.path, sorted(request.args.items(multi=True)), current_user.is_admin, validators)
+    etag = hashlib.sha1(repr(parts).encode()).hexdigest()
+    if not is_resource_modified(request.environ, etag=etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(jsonify(build_body()))
+    response.set_etag(etag)
+    # Let browsers cache the body but always revalidate before reusing it
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+DEAL_PAGE_SIZE = 50
+MAX_DEAL_PAGE_SIZE = 200
+DEAL_SORT_COLUMNS = {'updated_at': Deal.updated_at, 'created_at': Deal.created_at}
+
+# Read paths load just these columns as plain rows rather than mapped instances: rows skip the
+# identity map and change tracking, and read like the model (row.deal_name), so deal_to_dict
+# and file_to_dict take either
+DEAL_COLUMNS = (Deal.id, Deal.deal_name, Deal.state, Deal.city, Deal.status, Deal.created_at, Deal.updated_at)
+FILE_COLUMNS = (File.id, File.deal_id, File.file_name, File.dropbox_link, File.upload_date, File.created_at,
+                File.updated_at)
+
+def deal_owner_or_404(deal_id):
+    """The (id, user_id) row of a deal, for permission checks, or a 404."""
+    deal = db.session.query(Deal.id, Deal.user_id).filter(Deal.id == deal_id).first()
+    if deal is None:
+        abort(404)
+    return deal
+
+def deal_to_dict(d):
+    # Datetimes stay datetimes: the app's JSON provider encodes them, far faster than isoformat() per row
+    return {
+        'id': d.id,
+        'deal_name': d.deal_name,
+        'state': d.state,
+        'city': d.city,
+        'status': d.status,
+        'created_at': d.created_at,
+        'updated_at': d.updated_at
+    }
+
+def file_to_dict(f):
+    return {
+        'id': f.id,
+        'deal_id': f.deal_id,
+        'file_name': f.file_name,
+        'dropbox_link': f.dropbox_link,
+        'upload_date': f.upload_date,
+        'created_at': f.created_at,
+        'updated_at': f.updated_at
+    }
+
+def change_row(kind, deal_id, user_id, data):
+    return {'kind': kind, 'deal_id': deal_id, 'user_id': user_id,
+            'payload': current_app.json.dumps(data), 'created_at': datetime.utcnow()}
+
+def record_changes(rows):
+    """Append change_row() dicts to the change log in the current transaction."""
+    if rows:
+        db.session.execute(db.insert(DealChange), rows)
+        db.session.info['changes_recorded'] = True
+
+def record_deal_change(kind, deal, **data):
+    """Log a change to deal, carrying its current fields plus any extra data."""
+    record_changes([change_row(kind, deal.id, deal.user_id, dict(data, deal=dict(deal_to_dict(deal), user_id=deal.user_id)))])
+
+def record_file_change(kind, file, deal):
+    record_changes([change_row(kind, deal.id, deal.user_id, {'file': file_to_dict(file)})])
+
+def parse_datetime_arg(args, name):
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'Invalid {name}: expected an ISO 8601 date or datetime')
+
+def filtered_deals_query(args):
+    """Build a deal query scoped to the current user and narrowed by request filters.
+
+    Supports status, state, city and user_id equality filters plus created_after/created_before
+    and updated_after/updated_before ranges (after is inclusive, before is exclusive).
+    Raises ValueError for malformed filter values.
+    """
+    query = Deal.query
+    # Admins see every deal, Users only their own
+    if not current_user.is_admin:
+        query = query.filter(Deal.user_id == current_user.id)
+    for field in ('status', 'state', 'city'):
+        if args.get(field):
+            query = query.filter(getattr(Deal, field) == args.get(field))
+    if args.get('user_id'):
+        try:
+            query = query.filter(Deal.user_id == int(args.get('user_id')))
+        except ValueError:
+            raise ValueError('Invalid user_id: expected an integer')
+    for column, prefix in ((Deal.created_at, 'created'), (Deal.updated_at, 'updated')):
+        after = parse_datetime_arg(args, f'{prefix}_after')
+        before = parse_datetime_arg(args, f'{prefix}_before')
+        if after:
+            query = query.filter(column >= after)
+        if before:
+            query = query.filter(column < before)
+    return query
+
+def parse_limit_arg(args):
+    """?limit as a page size clamped to 1..MAX_DEAL_PAGE_SIZE; raises ValueError if it is not an integer."""
+    try:
+        limit = int(args.get('limit', DEAL_PAGE_SIZE))
+    except ValueError:
+        raise ValueError('Invalid limit: expected an integer')
+    return max(1, min(limit, MAX_DEAL_PAGE_SIZE))
+
+def encode_deal_cursor(sort_value, deal_id):
+    raw = json.dumps([sort_value.isoformat(), deal_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_deal_cursor(cursor):
+    try:
+        sort_value, deal_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(sort_value), int(deal_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+def paginate_deals(query, args, check_only=False):
+    """Return one page of deals, newest first, using keyset pagination on (sort column, id).
+
+    The cursor encodes the last row of the previous page, so each page is an index range
+    scan rather than an OFFSET that rereads every earlier row. With check_only, only
+    validate the arguments.
+    """
+    sort = args.get('sort', 'updated_at')
+    if sort not in DEAL_SORT_COLUMNS:
+        raise ValueError(f"Invalid sort: expected one of {', '.join(DEAL_SORT_COLUMNS)}")
+    column = DEAL_SORT_COLUMNS[sort]
+    limit = parse_limit_arg(args)
+    if args.get('cursor'):
+        sort_value, deal_id = decode_deal_cursor(args.get('cursor'))
+        query = query.filter(or_(column < sort_value, and_(column == sort_value, Deal.id < deal_id)))
+    if check_only:
+        return None
+    # Fetch one extra row to learn whether another page follows
+    deals = query.with_entities(*DEAL_COLUMNS).order_by(column.desc(), Deal.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(deals) > limit:
+        deals = deals[:limit]
+        last = deals[-1]
+        next_cursor = encode_deal_cursor(getattr(last, sort), last.id)
+    return {'deals': [deal_to_dict(d) for d in deals], 'next_cursor': next_cursor}
+
+@bp.route('/api/deals', methods=['GET', 'POST'])
 @login_required
 @check_permission('view_own')
 def deals():
@@ -281,7 +1001,7 @@ def deals():
             required_fields = ['deal_name', 'state', 'city', 'status']
             missing = [field for field in required_fields if not data.get(field)]
             if missing:
-                print(f"Missing fields: {missing}")
+                log.warning('Missing fields for deal', extra={'missing': missing})
                 return jsonify({'error': f'Missing required field: {missing[0]}'}), 400
             # Allow Users to create deals even if they have no existing deals
             new_deal = Deal(
@@ -292,13 +1012,15 @@ def deals():
                 user_id=current_user.id
             )
             db.session.add(new_deal)
-            db.session.commit()
-            print(f"Deal added: ID={new_deal.id}, Name={new_deal.deal_name}, User={current_user.username}")
-            # Record initial status in history
+            db.session.flush()
+            # Record initial status in history and count the deal in the rollups in the same transaction
             status_history = DealStatusHistory(deal_id=new_deal.id, status=new_deal.status, changed_by_user_id=current_user.id)
             db.session.add(status_history)
-            db.session.commit()
+            adjust_deal_rollups(new_deal.user_id, deal_rollup_buckets(new_deal), 1)
             notify_status_change(new_deal, current_user)
+            record_deal_change('deal.created', new_deal)
+            db.session.commit()
+            log.info('Deal added', extra={'deal_id': new_deal.id, 'deal_name': new_deal.deal_name})
             response = {
                 'id': new_deal.id,
                 'message': 'Deal added successfully',
@@ -307,31 +1029,535 @@ def deals():
             }
             return jsonify(response), 201
         except Exception as e:
-            print(f"Error adding deal: {str(e)}")
+            log.exception('Error adding deal')
             return jsonify({'error': str(e)}), 400
-    # Fetch all deals for Admin, only user's deals for User
-    if current_user.role.name == 'Admin':
-        deals = Deal.query.all()
-        print(f"Fetched all {len(deals)} deals for Admin {current_user.id}")
+    try:
+        query = filtered_deals_query(request.args)
+        # Legacy behaviour: the whole visible list as one array
+        if request.args.get('all', '').lower() in ('1', 'true', 'yes'):
+            build_body = lambda: [deal_to_dict(d) for d in query.with_entities(*DEAL_COLUMNS).order_by(Deal.id).all()]
+        else:
+            # Validate paging arguments up front so errors are not cached as 304s
+            paginate_deals(query, request.args, check_only=True)
+            build_body = lambda: paginate_deals(query, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    latest, count = deal_scope_validators()
+    return conditional_json((latest, count), build_body)
+
+@bp.route('/api/deals/search')
+@login_required
+@check_permission('view_own')
+def search_deals():
+    """Full-text search over deal names, locations, statuses and file names (?q=...), best matches first.
+
+    Each word matches as a prefix. Takes the same filters and scoping as GET /api/deals, and ?limit.
+    """
+    expression = deal_search_expression(request.args.get('q', ''))
+    if not expression:
+        return jsonify({'error': 'Missing required parameter: q'}), 400
+    try:
+        limit = parse_limit_arg(request.args)
+        query = filtered_deals_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    deals = query.with_entities(*DEAL_COLUMNS).join(deal_search, deal_search.c.rowid == Deal.id) \
+        .filter(literal_column('deal_search').op('MATCH')(expression)) \
+        .order_by(deal_search.c.rank, Deal.id).limit(limit).all()
+    return jsonify({'deals': [deal_to_dict(d) for d in deals]})
+
+def read_changes(after_id, limit):
+    """Change log entries newer than after_id, oldest first, as dicts for the change feed."""
+    rows = DealChange.query.filter(DealChange.id > after_id).order_by(DealChange.id).limit(limit).all()
+    return [{'id': row.id, 'kind': row.kind, 'user_id': row.user_id, 'data': json.loads(row.payload)} for row in rows]
+
+def latest_change_id():
+    return db.session.query(func.coalesce(func.max(DealChange.id), 0)).scalar()
+
+change_feed_lock = threading.Lock()
+
+def get_change_feed():
+    """This process's ChangeFeed, created on first use so its poll thread starts after the worker forks."""
+    app = current_app._get_current_object()
+    with change_feed_lock:
+        if 'change_feed' not in app.extensions:
+            def in_app(read):
+                def call(*args):
+                    with app.app_context():
+                        return read(*args)
+                return call
+            app.extensions['change_feed'] = ChangeFeed(in_app(read_changes), in_app(latest_change_id),
+                                                       poll_seconds=app.config['CHANGE_STREAM_POLL_SECONDS'])
+        return app.extensions['change_feed']
+
+@event.listens_for(db.session, 'after_commit')
+def wake_change_feed(session):
+    # Streams in this process see the change now; other processes pick it up on their next poll
+    if session.info.pop('changes_recorded', False) and 'change_feed' in current_app.extensions:
+        current_app.extensions['change_feed'].wake()
+
+@bp.route('/api/deals/stream')
+@login_required
+@check_permission('view_own')
+def stream_deal_changes():
+    """Server-Sent Events stream of changes to the deals (and their files) the user may see.
+
+    Each event's id is a change log cursor: reconnecting with Last-Event-ID (or ?after) replays
+    what was missed. Idle streams get a comment every CHANGE_STREAM_HEARTBEAT_SECONDS.
+    """
+    try:
+        after_id = request.headers.get('Last-Event-ID') or request.args.get('after')
+        after_id = int(after_id) if after_id else None
+    except ValueError:
+        return jsonify({'error': 'Invalid event id'}), 400
+    feed = get_change_feed()
+    # The generator outlives the request context, so take what it needs now
+    user_id, is_admin = current_user.id, current_user.is_admin
+    heartbeat = current_app.config['CHANGE_STREAM_HEARTBEAT_SECONDS']
+
+    def events(after_id):
+        head = feed.subscribe()
+        try:
+            after_id = head if after_id is None else after_id
+            yield f'retry: {int(feed.poll_seconds * 1000) + 1000}\n\n'
+            while True:
+                entries = feed.wait(after_id, heartbeat)
+                if entries is None:
+                    # Further behind than the shared buffer reaches: read the log directly
+                    entries = feed.fetch(after_id, feed.batch_size)
+                if not entries:
+                    yield ': keepalive\n\n'
+                    continue
+                for entry in entries:
+                    after_id = entry['id']
+                    if is_admin or entry['user_id'] == user_id:
+                        yield format_event(entry)
+        finally:
+            feed.unsubscribe()
+
+    # Not wrapped in stream_with_context: an open stream holds no request context or database session
+    return Response(events(after_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@bp.route('/api/deals/sync')
+@login_required
+@check_permission('view_own')
+def sync_deals():
+    """Deals and files created, updated or deleted after ?since=<cursor>, for incremental sync.
+
+    Returns each changed deal or file once, in its current state, plus the ids of those deleted
+    since, and the cursor to pass next time. The cursor moves past changes the user cannot see
+    too, so a quiet account's cursor never falls behind pruning. has_more means the next call
+    will return more straight away. Without since, only the current cursor is
+    returned: take it before a full pull of /api/deals, then sync from it.
+    """
+    since = request.args.get('since')
+    if since is None:
+        return jsonify({'cursor': latest_change_id()})
+    try:
+        since = int(since)
+        if since < 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    # Read up to the head as it stands now, so a change committed meanwhile is not skipped over
+    oldest, head = db.session.query(func.min(DealChange.id), func.coalesce(func.max(DealChange.id), 0)).one()
+    # Pruning always keeps the newest entry, so the oldest one left shows what was pruned
+    if oldest is not None and since < oldest - 1:
+        return jsonify({'error': 'Cursor is older than the change log; resync from /api/deals'}), 410
+    # Cursors only ever come from this endpoint, so one past the head was never handed out
+    if since > head:
+        return jsonify({'error': 'Invalid cursor: ahead of the change log'}), 400
+    limit = current_app.config['SYNC_MAX_CHANGES']
+    query = db.session.query(DealChange.id, DealChange.kind, DealChange.deal_id, DealChange.payload) \
+        .filter(DealChange.id > since, DealChange.id <= head)
+    if not current_user.is_admin:
+        query = query.filter(DealChange.user_id == current_user.id)
+    changes = query.order_by(DealChange.id).limit(limit + 1).all()
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    deal_ids = {change.deal_id for change in changes if change.kind.startswith('deal.')}
+    file_ids = {json.loads(change.payload)['file']['id'] for change in changes if change.kind.startswith('file.')}
+    deals = db.session.query(*DEAL_COLUMNS, Deal.user_id).filter(Deal.id.in_(deal_ids)).all() if deal_ids else []
+    files = db.session.query(*FILE_COLUMNS).filter(File.id.in_(file_ids)).all() if file_ids else []
+    return jsonify({
+        'deals': [dict(deal_to_dict(d), user_id=d.user_id) for d in deals],
+        'deleted_deals': sorted(deal_ids - {d.id for d in deals}),
+        'files': [file_to_dict(f) for f in files],
+        'deleted_files': sorted(file_ids - {f.id for f in files}),
+        'cursor': changes[-1].id if has_more else head,
+        'has_more': has_more
+    })
+
+def prune_deal_changes(now=None):
+    """Delete change log entries older than CHANGE_LOG_RETENTION_DAYS and return how many went."""
+    cutoff = (now or datetime.utcnow()) - timedelta(days=current_app.config['CHANGE_LOG_RETENTION_DAYS'])
+    # The newest entry always stays: SQLite would hand its id out again once it was gone
+    newest = db.session.query(func.max(DealChange.id)).scalar_subquery()
+    pruned = DealChange.query.filter(DealChange.created_at < cutoff, DealChange.id < newest) \
+        .delete(synchronize_session=False)
+    db.session.commit()
+    return pruned
+
+EXPORT_DEAL_FIELDS = ['id', 'user_id', 'deal_name', 'state', 'city', 'status', 'created_at', 'updated_at']
+EXPORT_INCLUDES = {'files', 'history'}
+
+def export_related(deal_ids, include):
+    """Load files and/or history for one batch of deal ids, keyed by deal id."""
+    related = {name: {deal_id: [] for deal_id in deal_ids} for name in include}
+    if 'files' in include:
+        rows = db.session.query(File.deal_id, File.id, File.file_name, File.dropbox_link, File.upload_date) \
+            .filter(File.deal_id.in_(deal_ids)).order_by(File.deal_id, File.id)
+        for row in rows:
+            related['files'][row.deal_id].append({
+                'id': row.id,
+                'file_name': row.file_name,
+                'dropbox_link': row.dropbox_link,
+                'upload_date': row.upload_date.isoformat() if row.upload_date else None
+            })
+    if 'history' in include:
+        rows = db.session.query(DealStatusHistory.deal_id, DealStatusHistory.status,
+                                DealStatusHistory.changed_by_user_id, DealStatusHistory.changed_at) \
+            .filter(DealStatusHistory.deal_id.in_(deal_ids)).order_by(DealStatusHistory.deal_id, DealStatusHistory.changed_at)
+        for row in rows:
+            related['history'][row.deal_id].append({
+                'status': row.status,
+                'changed_by_user_id': row.changed_by_user_id,
+                'changed_at': row.changed_at.isoformat() if row.changed_at else None
+            })
+    return related
+
+def export_deal_batches(query, include):
+    """Yield lists of export records, reading the deals with a server-side cursor one batch at a time."""
+    columns = [getattr(Deal, field) for field in EXPORT_DEAL_FIELDS]
+    stmt = query.with_entities(*columns).order_by(Deal.id).statement
+    result = db.session.execute(stmt, execution_options={'yield_per': current_app.config['EXPORT_BATCH_SIZE']})
+    for rows in result.partitions():
+        records = [dict(deal_to_dict(row), user_id=row.user_id) for row in rows]
+        if include:
+            related = export_related([record['id'] for record in records], include)
+            for record in records:
+                for name in include:
+                    record[name] = related[name][record['id']]
+        yield records
+
+def export_csv(batches, include):
+    fields = EXPORT_DEAL_FIELDS + sorted(include)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields)
+    writer.writeheader()
+    for records in batches:
+        for record in records:
+            # Nested files and history go in a single JSON cell each
+            for name in include:
+                record[name] = json.dumps(record[name])
+            record['created_at'] = record['created_at'].isoformat()
+            record['updated_at'] = record['updated_at'].isoformat()
+            writer.writerow(record)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def export_ndjson(batches):
+    dumps = current_app.json.dumps
+    for records in batches:
+        yield ''.join(dumps(record) + '\n' for record in records)
+
+@bp.route('/api/deals/export')
+@login_required
+@check_permission('view_own')
+def export_deals():
+    """Stream deals as CSV or NDJSON (?format=csv|ndjson) in constant memory.
+
+    Takes the same filters and scoping as GET /api/deals. ?include=files,history adds each
+    deal's files and status history, nested in NDJSON and as JSON cells in CSV.
+    """
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'error': 'Invalid format: expected csv or ndjson'}), 400
+    include = {name for name in request.args.get('include', '').split(',') if name}
+    if include - EXPORT_INCLUDES:
+        return jsonify({'error': f'Invalid include: {sorted(include - EXPORT_INCLUDES)[0]}'}), 400
+    try:
+        query = filtered_deals_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    batches = export_deal_batches(query, include)
+    if export_format == 'csv':
+        body, mimetype = export_csv(batches, include), 'text/csv'
     else:
-        deals = Deal.query.filter_by(user_id=current_user.id).all()
-        print(f"Fetched {len(deals)} deals for user {current_user.id}")
-    return jsonify([{
-        'id': d.id,
-        'deal_name': d.deal_name,
-        'state': d.state,
-        'city': d.city,
-        'status': d.status,
-        'created_at': d.created_at.isoformat(),
-        'updated_at': d.updated_at.isoformat()
-    } for d in deals])
+        body, mimetype = export_ndjson(batches), 'application/x-ndjson'
+    log.info('Exporting deals', extra={'format': export_format, 'include': sorted(include)})
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=deals.{export_format}'
+    return response
+
+DEAL_REQUIRED_FIELDS = ['deal_name', 'state', 'city', 'status']
+
+def iter_ndjson(lines):
+    for row_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield row_number, json.loads(line), None
+        except ValueError:
+            yield row_number, None, 'Invalid JSON'
+
+def iter_csv(lines):
+    # Row numbers count the header as row 1, matching what a spreadsheet shows
+    for row_number, record in enumerate(csv.DictReader(lines), 2):
+        yield row_number, record, None
+
+def iter_import_records():
+    """Yield (row_number, record, error) from a JSON array, NDJSON body or CSV/NDJSON/JSON file upload.
+
+    Raises ValueError when the request body is not in a supported format.
+    """
+    upload = request.files.get('file')
+    if upload is not None:
+        name = (upload.filename or '').lower()
+        stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+        if name.endswith(('.ndjson', '.jsonl')):
+            return iter_ndjson(stream)
+        if name.endswith('.json'):
+            try:
+                records = json.load(stream)
+            except ValueError as e:
+                raise ValueError(f'Invalid JSON file: {e}')
+        else:
+            return iter_csv(stream)
+    elif request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        return iter_ndjson(io.TextIOWrapper(request.stream, encoding='utf-8', newline=''))
+    elif request.mimetype == 'text/csv':
+        return iter_csv(io.TextIOWrapper(request.stream, encoding='utf-8-sig', newline=''))
+    elif request.is_json:
+        records = request.get_json(silent=True)
+        if records is None:
+            raise ValueError('Invalid JSON body: could not parse it')
+    else:
+        raise ValueError('Unsupported import format: send a JSON array, NDJSON, CSV or a file upload')
+    if not isinstance(records, list):
+        raise ValueError('Expected a JSON array of deals')
+    return ((row_number, record, None) for row_number, record in enumerate(records, 1))
+
+def validate_import_record(record):
+    """Return an error message for an unusable record, or None."""
+    if not isinstance(record, dict):
+        return 'Expected an object'
+    missing = [field for field in DEAL_REQUIRED_FIELDS if not str(record.get(field) or '').strip()]
+    if missing:
+        return f'Missing required field: {missing[0]}'
+    return None
+
+def import_deals(records, user):
+    """Insert valid records as deals owned by user, with their initial history rows, in chunked batches.
+
+    Rows that fail validation are reported and skipped. Everything, including the rollup counters and a
+    single summary notification, is written in the caller's transaction.
+    Returns (created_count, errors).
+    """
+    now = datetime.utcnow()
+    chunk_size = current_app.config['IMPORT_CHUNK_SIZE']
+    created = 0
+    errors = []
+    rollup_deltas = Counter()
+    status_counts = Counter()
+    chunk = []
+
+    def insert_chunk(rows):
+        deal_ids = db.session.execute(
+            db.insert(Deal).returning(Deal.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+        db.session.execute(db.insert(DealStatusHistory), [
+            {'deal_id': deal_id, 'status': row['status'], 'changed_by_user_id': user.id, 'changed_at': now}
+            for deal_id, row in zip(deal_ids, rows)
+        ])
+        record_changes([change_row('deal.created', deal_id, user.id, {'deal': {
+            'id': deal_id, 'deal_name': row['deal_name'], 'state': row['state'], 'city': row['city'],
+            'status': row['status'], 'created_at': now.isoformat(), 'updated_at': now.isoformat(), 'user_id': user.id
+        }}) for deal_id, row in zip(deal_ids, rows)])
 
-@app.route('/api/deals/<int:deal_id>', methods=['PUT', 'DELETE'])
+    # Counts records, not row numbers: a CSV header or blank NDJSON line is not a deal
+    for count, (row_number, record, error) in enumerate(records, 1):
+        if count > current_app.config['IMPORT_MAX_ROWS']:
+            raise ValueError(f"Imports are limited to {current_app.config['IMPORT_MAX_ROWS']} rows")
+        error = error or validate_import_record(record)
+        if error:
+            errors.append({'row': row_number, 'error': error})
+            continue
+        row = {field: str(record[field]).strip() for field in DEAL_REQUIRED_FIELDS}
+        row.update(user_id=user.id, created_at=now, updated_at=now)
+        chunk.append(row)
+        for dimension, bucket in (('status', row['status']), ('state', row['state']), ('month', deal_month(now))):
+            rollup_deltas[(dimension, bucket)] += 1
+        status_counts[row['status']] += 1
+        if len(chunk) >= chunk_size:
+            insert_chunk(chunk)
+            created += len(chunk)
+            chunk = []
+    if chunk:
+        insert_chunk(chunk)
+        created += len(chunk)
+
+    apply_rollup_deltas(user.id, [(dimension, bucket, count) for (dimension, bucket), count in rollup_deltas.items()])
+    if created:
+        notify_deals_imported(user, created, status_counts)
+    return created, errors
+
+@bp.route('/api/deals/import', methods=['POST'])
+@login_required
+@check_permission('view_own')
+def import_deals_route():
+    try:
+        created, errors = import_deals(iter_import_records(), current_user)
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        log.exception('Error importing deals')
+        return jsonify({'error': 'Failed to import deals'}), 500
+    log.info('Deals imported', extra={'imported': created, 'rejected': len(errors)})
+    response = {
+        'message': f'Imported {created} deals',
+        'created': created,
+        'failed': len(errors),
+        'errors': errors
+    }
+    return jsonify(response), 201 if created else 400
+
+# Keeps IN (...) lists well under SQLite's bound parameter limit
+SQL_IN_CHUNK_SIZE = 500
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def bulk_change_status(queries, status, user):
+    """Move every deal matched by the given queries to status in the current transaction.
+
+    Deals already in status are left alone. Updates deal rows, rollup counters and history
+    with set-based statements and queues one summary notification.
+    Returns (changed_ids, unchanged_ids).
+    """
+    now = datetime.utcnow()
+    matched = []
+    for query in queries:
+        matched += query.with_entities(Deal.id, Deal.user_id, Deal.status).order_by(Deal.id).all()
+    changed = [row for row in matched if row.status != status]
+    unchanged_ids = [row.id for row in matched if row.status == status]
+    changed_ids = [row.id for row in changed]
+
+    for ids in chunked(changed_ids, SQL_IN_CHUNK_SIZE):
+        db.session.execute(
+            db.update(Deal).where(Deal.id.in_(ids)).values(status=status, updated_at=now),
+            execution_options={'synchronize_session': False}
+        )
+    if changed:
+        db.session.execute(db.insert(DealStatusHistory), [
+            {'deal_id': row.id, 'status': status, 'changed_by_user_id': user.id, 'changed_at': now}
+            for row in changed
+        ])
+    # Only the fields that changed: status events from PUT carry the whole deal
+    record_changes([change_row('deal.status', row.id, row.user_id, {
+        'deal': {'id': row.id, 'status': status, 'updated_at': now.isoformat(), 'user_id': row.user_id},
+        'previous_status': row.status
+    }) for row in changed])
+
+    # Admins can move deals owned by several users, whose counters are kept separately
+    deltas_by_user = {}
+    for row in changed:
+        deltas = deltas_by_user.setdefault(row.user_id, Counter())
+        deltas[row.status] -= 1
+        deltas[status] += 1
+    for owner_id, deltas in deltas_by_user.items():
+        apply_rollup_deltas(owner_id, [('status', bucket, delta) for bucket, delta in deltas.items() if delta])
+
+    if changed_ids:
+        notify_bulk_status_change(user, changed_ids, status)
+    return changed_ids, unchanged_ids
+
+# The filters filtered_deals_query() understands
+BULK_STATUS_FILTER_KEYS = ('status', 'state', 'city', 'user_id', 'created_after', 'created_before',
+                           'updated_after', 'updated_before')
+
+@bp.route('/api/deals/status', methods=['POST'])
+@login_required
+@check_permission('view_own')
+def bulk_status():
+    """Move many deals to one status: {"status": ..., "ids": [...]} or {"status": ..., "filter": {...}}.
+
+    The filter takes the GET /api/deals filter keys as strings. An empty filter, or one matching
+    more than BULK_STATUS_MAX_FILTER_MATCHES deals, also needs "confirm": true. Users can only
+    change their own deals; ids that do not exist or belong to someone else are reported as skipped.
+    """
+    data = request.get_json(silent=True) or {}
+    status = data.get('status')
+    if not isinstance(status, str) or not status.strip():
+        return jsonify({'error': 'Missing required field: status'}), 400
+    status = status.strip()
+    ids = data.get('ids')
+    filters = data.get('filter')
+    if (ids is None) == (filters is None):
+        return jsonify({'error': 'Provide either ids or filter'}), 400
+
+    try:
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+                raise ValueError('ids must be a list of integers')
+            if len(ids) > current_app.config['BULK_STATUS_MAX_IDS']:
+                raise ValueError(f"At most {current_app.config['BULK_STATUS_MAX_IDS']} ids per request")
+            ids = sorted(set(ids))
+            queries = [filtered_deals_query({}).filter(Deal.id.in_(chunk)) for chunk in chunked(ids, SQL_IN_CHUNK_SIZE)]
+            changed_ids, unchanged_ids = bulk_change_status(queries, status, current_user)
+            found = set(changed_ids) | set(unchanged_ids)
+            skipped_ids = [i for i in ids if i not in found]
+        else:
+            if not isinstance(filters, dict):
+                raise ValueError('filter must be an object')
+            # A misspelt key would otherwise be ignored and the filter match far more than meant
+            unknown = sorted(set(filters) - set(BULK_STATUS_FILTER_KEYS))
+            if unknown:
+                raise ValueError(f'Unknown filter key: {unknown[0]}')
+            if not all(isinstance(value, str) for value in filters.values()):
+                raise ValueError('filter values must be strings')
+            query = filtered_deals_query(filters)
+            if data.get('confirm') is not True:
+                # An empty filter matches every visible deal
+                if not filters:
+                    raise ValueError('An empty filter changes every deal; pass "confirm": true to proceed')
+                limit = current_app.config['BULK_STATUS_MAX_FILTER_MATCHES']
+                matches = query.order_by(None).count()
+                if matches > limit:
+                    raise ValueError(f'filter matches {matches} deals, more than {limit}; pass "confirm": true to proceed')
+            changed_ids, unchanged_ids = bulk_change_status([query], status, current_user)
+            skipped_ids = []
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        log.exception('Error changing deal statuses')
+        return jsonify({'error': 'Failed to change deal statuses'}), 500
+    log.info('Bulk status change', extra={'status': status, 'changed': len(changed_ids)})
+    return jsonify({
+        'status': status,
+        'changed': changed_ids,
+        'unchanged': unchanged_ids,
+        'skipped': skipped_ids
+    }), 200
+
+@bp.route('/api/deals/<int:deal_id>', methods=['PUT', 'DELETE'])
 @login_required
 @check_permission('view_own')
 def deal_modify(deal_id):
     deal = Deal.query.get_or_404(deal_id)
-    if deal.user_id != current_user.id and current_user.role.name != 'Admin':
+    if deal.user_id != current_user.id and not current_user.is_admin:
         return jsonify({'error': 'Permission denied'}), 403
 
     if request.method == 'PUT':
@@ -343,48 +1569,59 @@ def deal_modify(deal_id):
             required_fields = ['deal_name', 'state', 'city', 'status']
             missing = [field for field in required_fields if not data.get(field)]
             if missing:
-                print(f"Missing fields for update: {missing}")
+                log.warning('Missing fields for deal update', extra={'missing': missing})
                 return jsonify({'error': f'Missing required field: {missing[0]}'}), 400
             old_status = deal.status
+            old_buckets = deal_rollup_buckets(deal)
             deal.deal_name = data.get('deal_name', deal.deal_name)
             deal.state = data.get('state', deal.state)
             deal.city = data.get('city', deal.city)
             deal.status = data.get('status', deal.status)
             deal.updated_at = datetime.utcnow()
-            db.session.commit()
+            new_buckets = deal_rollup_buckets(deal)
+            changed = [dimension for dimension in new_buckets if new_buckets[dimension] != old_buckets[dimension]]
+            apply_rollup_deltas(deal.user_id, [(d, old_buckets[d], -1) for d in changed] + [(d, new_buckets[d], 1) for d in changed])
             if old_status != deal.status:
                 status_history = DealStatusHistory(deal_id=deal_id, status=deal.status, changed_by_user_id=current_user.id)
                 db.session.add(status_history)
-                db.session.commit()
                 notify_status_change(deal, current_user)
-            print(f"Deal updated: ID={deal_id}, Name={deal.deal_name}, User={current_user.username}")
+                record_deal_change('deal.status', deal, previous_status=old_status)
+            else:
+                record_deal_change('deal.updated', deal)
+            db.session.commit()
+            log.info('Deal updated', extra={'deal_id': deal_id, 'deal_name': deal.deal_name})
             return jsonify({
                 'id': deal.id,
                 'message': 'Deal updated successfully',
                 'updated_at': deal.updated_at.isoformat()
             }), 200
         except Exception as e:
-            print(f"Error updating deal: {str(e)}")
+            log.exception('Error updating deal')
             return jsonify({'error': str(e)}), 400
 
     if request.method == 'DELETE':
         try:
             # Delete associated DealStatusHistory records first
             DealStatusHistory.query.filter_by(deal_id=deal_id).delete()
+            # Its files go too, each logged as removed so sync clients drop them
+            files = db.session.execute(db.delete(File).where(File.deal_id == deal_id).returning(*FILE_COLUMNS)).all()
+            record_changes([change_row('file.removed', deal.id, deal.user_id, {'file': file_to_dict(f)}) for f in files])
+            adjust_deal_rollups(deal.user_id, deal_rollup_buckets(deal), -1)
+            record_deal_change('deal.deleted', deal)
             db.session.delete(deal)
             db.session.commit()
-            print(f"Deal deleted: ID={deal_id}, User={current_user.username}")
+            log.info('Deal deleted', extra={'deal_id': deal_id})
             return jsonify({'message': 'Deal deleted successfully'}), 200
         except Exception as e:
-            print(f"Error deleting deal: {str(e)}")
+            log.exception('Error deleting deal')
             return jsonify({'error': str(e)}), 500
 
-@app.route('/api/files/<int:deal_id>', methods=['GET', 'POST'])
+@bp.route('/api/files/<int:deal_id>', methods=['GET', 'POST'])
 @login_required
 @check_permission('view_own')
 def files(deal_id):
-    deal = Deal.query.get_or_404(deal_id)
-    if deal.user_id != current_user.id and current_user.role.name != 'Admin':
+    deal = deal_owner_or_404(deal_id)
+    if deal.user_id != current_user.id and not current_user.is_admin:
         return jsonify({'error': 'Permission denied'}), 403
     if request.method == 'POST':
         try:
@@ -395,7 +1632,7 @@ def files(deal_id):
             required_fields = ['file_name', 'dropbox_link']
             missing = [field for field in required_fields if not data.get(field)]
             if missing:
-                print(f"Missing fields: {missing}")
+                log.warning('Missing fields for file', extra={'missing': missing})
                 return jsonify({'error': f'Missing required field: {missing[0]}'}), 400
             new_file = File(
                 deal_id=deal_id,
@@ -403,127 +1640,404 @@ def files(deal_id):
                 dropbox_link=data.get('dropbox_link')
             )
             db.session.add(new_file)
+            db.session.flush()
+            record_file_change('file.added', new_file, deal)
             db.session.commit()
-            print(f"File uploaded: ID={new_file.id}, Deal ID={deal_id}, User={current_user.username}")
+            log.info('File uploaded', extra={'file_id': new_file.id, 'deal_id': deal_id})
             response = {
                 'id': new_file.id,
                 'message': 'File uploaded successfully'
             }
             return jsonify(response), 201
         except Exception as e:
-            print(f"Error uploading file: {str(e)}")
+            log.exception('Error uploading file')
             return jsonify({'error': str(e)}), 400
-    files = File.query.filter_by(deal_id=deal_id).all()
-    print(f"Fetched {len(files)} files for deal {deal_id}")
-    return jsonify([{
-        'id': f.id,
-        'deal_id': f.deal_id,
-        'file_name': f.file_name,
-        'dropbox_link': f.dropbox_link,
-        'upload_date': f.upload_date.isoformat(),
-        'created_at': f.created_at.isoformat(),
-        'updated_at': f.updated_at.isoformat()
-    } for f in files])
+    latest, count = db.session.query(func.max(File.updated_at), func.count(File.id)).filter(File.deal_id == deal_id).one()
+    return conditional_json((latest, count),
+                            lambda: [file_to_dict(f) for f in db.session.query(*FILE_COLUMNS).filter(File.deal_id == deal_id).all()])
 
-@app.route('/api/files/<int:file_id>', methods=['DELETE'])
+@bp.route('/api/files/<int:file_id>', methods=['DELETE'])
 @login_required
 @check_permission('view_own')
 def delete_file(file_id):
     file = File.query.get_or_404(file_id)
-    deal = Deal.query.get_or_404(file.deal_id)
-    if deal.user_id != current_user.id and current_user.role.name != 'Admin':
+    deal = deal_owner_or_404(file.deal_id)
+    if deal.user_id != current_user.id and not current_user.is_admin:
         return jsonify({'error': 'Permission denied'}), 403
     try:
+        record_file_change('file.removed', file, deal)
         db.session.delete(file)
         db.session.commit()
-        print(f"File deleted: ID={file_id}, Deal ID={file.deal_id}, User={current_user.username}")
+        log.info('File deleted', extra={'file_id': file_id, 'deal_id': file.deal_id})
         return jsonify({'message': 'File deleted successfully'}), 200
     except Exception as e:
-        print(f"Error deleting file: {str(e)}")
+        log.exception('Error deleting file')
         return jsonify({'error': 'Failed to delete file'}), 500
 
-@app.route('/deal/<int:deal_id>')
+@bp.route('/deal/<int:deal_id>')
 @login_required
 @check_permission('view_own')
 def deal_detail(deal_id):
-    deal = Deal.query.get_or_404(deal_id)
-    if deal.user_id != current_user.id and current_user.role.name != 'Admin':
+    # One query each for the deal, its files and its history with the users who made each change
+    deal = db.session.query(*DEAL_COLUMNS, Deal.user_id).filter(Deal.id == deal_id).first()
+    if deal is None:
+        abort(404)
+    if deal.user_id != current_user.id and not current_user.is_admin:
         return jsonify({'error': 'Permission denied'}), 403
-    files = File.query.filter_by(deal_id=deal_id).all()
-    status_history = DealStatusHistory.query.filter_by(deal_id=deal_id).order_by(DealStatusHistory.changed_at.desc()).all()
+    files = db.session.query(*FILE_COLUMNS).filter(File.deal_id == deal_id).order_by(File.id).all()
+    status_history = db.session.query(DealStatusHistory.status, DealStatusHistory.changed_at, User.username) \
+        .outerjoin(User, User.id == DealStatusHistory.changed_by_user_id) \
+        .filter(DealStatusHistory.deal_id == deal_id).order_by(DealStatusHistory.changed_at.desc()).all()
     return render_template('deal_detail.html', deal=deal, files=files, status_history=status_history)
 
-@app.route('/api/analytics', methods=['GET'])
+@bp.route('/api/dashboard')
+@login_required
+@check_permission('view_own')
+def dashboard():
+    """The home page's data in one response: {'cursor', 'deals': first page, 'analytics'}."""
+    latest, count = deal_scope_validators()
+    return conditional_json((latest, count), dashboard_data)
+
+@bp.route('/api/analytics', methods=['GET'])
 @login_required
 @check_permission('view_own')  # Allow Admins to see all, Users to see their own
 def get_analytics():
-    if current_user.role.name == 'Admin':
-        deals = Deal.query.all()
+    latest, count = deal_scope_validators()
+    return conditional_json((latest, count), get_deal_analytics)
+
+# Handle CSRF errors globally for API endpoints
+@bp.app_errorhandler(CSRFError)
+def handle_csrf_error(e):
+    return jsonify({'error': 'CSRF token is missing or invalid'}), 400
+
+def queue_notification(user, subject, message):
+    """Queue an email to user in the current transaction; the notification worker sends it."""
+    if user.email:
+        db.session.add(NotificationOutbox(
+            recipient=user.email,
+            subject=subject,
+            body=message,
+            next_attempt_at=notification_send_time(user.email)
+        ))
+        db.session.info['notifications_queued'] = True
     else:
-        deals = Deal.query.filter_by(user_id=current_user.id).all()
+        # Fallback to the log if no email
+        log.info('Notification not emailed: user has no address', extra={'notified_user_id': user.id, 'notification': message})
 
-    # Analytics data
-    status_counts = defaultdict(int)
-    state_counts = defaultdict(int)
-    user_counts = defaultdict(int)
-    deals_by_month = defaultdict(int)
+def notify_status_change(deal, user):
+    message = f"Status change for deal '{deal.deal_name}' (ID: {deal.id}): {deal.status} by {user.username} at {datetime.utcnow()}"
+    queue_notification(user, f"Deal Status Update: {deal.deal_name}", message)
 
-    for deal in deals:
-        status_counts[deal.status] += 1
-        state_counts[deal.state] += 1
-        user_counts[deal.user_id] += 1
-        deals_by_month[deal.created_at.strftime('%Y-%m')] += 1
+def notify_deals_imported(user, count, status_counts):
+    """Queue one summary email for a whole bulk import instead of one per deal."""
+    breakdown = ', '.join(f'{status}: {n}' for status, n in sorted(status_counts.items()))
+    message = f"{count} deals imported by {user.username} at {datetime.utcnow()} ({breakdown})"
+    queue_notification(user, f"Deals Imported: {count}", message)
 
-    # Get user names for user_counts
-    user_names = {user.id: user.username for user in User.query.all()}
-    user_counts_formatted = {user_names[user_id]: count for user_id, count in user_counts.items()}
+def notify_bulk_status_change(user, deal_ids, status):
+    """Queue one summary email for a bulk status transition instead of one per deal."""
+    listed = ', '.join(str(deal_id) for deal_id in deal_ids[:50])
+    if len(deal_ids) > 50:
+        listed += f' and {len(deal_ids) - 50} more'
+    message = f"{len(deal_ids)} deals moved to {status} by {user.username} at {datetime.utcnow()} (IDs: {listed})"
+    queue_notification(user, f"Deal Status Update: {len(deal_ids)} deals moved to {status}", message)
 
-    return jsonify({
-        'status_counts': dict(status_counts),
-        'state_counts': dict(state_counts),
-        'user_counts': user_counts_formatted,
-        'deals_by_month': dict(deals_by_month)
-    })
+def notification_send_time(recipient):
+    """Pick when a new notification is due.
 
-# Handle CSRF errors globally for API endpoints
-@app.errorhandler(CSRFError)
-def handle_csrf_error(e):
-    return jsonify({'error': 'CSRF token is missing or invalid'}), 400
+    In digest mode the first change for a recipient opens a window and later changes join it,
+    so they all come due together and are sent as one email.
+    """
+    now = datetime.utcnow()
+    window = current_app.config['NOTIFY_DIGEST_SECONDS']
+    if not window:
+        return now
+    open_window = db.session.query(func.min(NotificationOutbox.next_attempt_at)).filter(
+        NotificationOutbox.recipient == recipient,
+        NotificationOutbox.status == 'pending',
+        NotificationOutbox.claim_token.is_(None),
+        # Rows waiting out a retry backoff are not a digest window
+        NotificationOutbox.attempts == 0,
+        NotificationOutbox.next_attempt_at > now
+    ).scalar()
+    return open_window or now + timedelta(seconds=window)
 
-def notify_status_change(deal, user):
-    # Send email notification if user has an email
-    if user.email:
+def get_mailer():
+    """Return the app's shared SMTP session, creating it from the mail settings on first use."""
+    if 'mailer' not in current_app.extensions:
+        from mailer import SMTPMailer
+        current_app.extensions['mailer'] = SMTPMailer.from_config(current_app.config)
+    return current_app.extensions['mailer']
+
+def send_email(recipient, subject, body):
+    from email.mime.text import MIMEText
+    msg = MIMEText(body)
+    msg['Subject'] = subject
+    msg['From'] = current_app.config['MAIL_DEFAULT_SENDER']
+    msg['To'] = recipient
+    get_mailer().send(msg)
+
+def claim_due_notifications(now, limit):
+    """Lease a batch of due notifications to this worker and return (claim token, notifications).
+
+    The single UPDATE moves next_attempt_at past the lease, so a concurrent worker's claim no
+    longer matches those rows. A crashed worker's rows come due again when the lease expires.
+    """
+    token = uuid.uuid4().hex
+    due_ids = db.session.query(NotificationOutbox.id).filter(
+        NotificationOutbox.status == 'pending', NotificationOutbox.next_attempt_at <= now
+    ).order_by(NotificationOutbox.next_attempt_at).limit(limit)
+    NotificationOutbox.query.filter(
+        NotificationOutbox.id.in_(due_ids.scalar_subquery()),
+        NotificationOutbox.status == 'pending',
+        NotificationOutbox.next_attempt_at <= now
+    ).update({
+        'claim_token': token,
+        'next_attempt_at': now + timedelta(seconds=current_app.config['NOTIFY_LEASE_SECONDS'])
+    }, synchronize_session=False)
+    db.session.commit()
+    return token, NotificationOutbox.query.filter_by(claim_token=token).order_by(NotificationOutbox.id).all()
+
+def renew_notification_lease(token, notifications):
+    """Extend the lease on a recipient's notifications just before sending them.
+
+    The lease covers every send in the group timing out, so a slow SMTP server cannot let another
+    worker claim rows mid-send. Returns the notifications still held under token; rows whose lease
+    already ran out may have been claimed elsewhere and are left alone.
+    """
+    config = current_app.config
+    lease = max(config['NOTIFY_LEASE_SECONDS'], len(notifications) * config['MAIL_TIMEOUT'] * 2)
+    ids = [n.id for n in notifications]
+    NotificationOutbox.query.filter(
+        NotificationOutbox.id.in_(ids), NotificationOutbox.claim_token == token
+    ).update({'next_attempt_at': datetime.utcnow() + timedelta(seconds=lease)}, synchronize_session=False)
+    db.session.commit()
+    return NotificationOutbox.query.filter(
+        NotificationOutbox.id.in_(ids), NotificationOutbox.claim_token == token
+    ).order_by(NotificationOutbox.id).all()
+
+def deliver_notifications(recipient, notifications):
+    """Send one recipient's notifications, as a single digest email when digest mode is on.
+
+    Yields (notifications covered, error or None) as each email is sent, so every outcome can be
+    recorded before the next send.
+    """
+    if current_app.config['NOTIFY_DIGEST_SECONDS'] and len(notifications) > 1:
+        emails = [(notifications, f"Deal Status Updates: {len(notifications)} changes",
+                   '\n'.join(n.body for n in notifications))]
+    else:
+        emails = [([n], n.subject, n.body) for n in notifications]
+    for covered, subject, body in emails:
         try:
-            msg = MIMEText(f"Status change for deal '{deal.deal_name}' (ID: {deal.id}): {deal.status} by {user.username} at {datetime.utcnow()}")
-            msg['Subject'] = f"Deal Status Update: {deal.deal_name}"
-            msg['From'] = app.config['MAIL_USERNAME']
-            msg['To'] = user.email
-
-            with smtplib.SMTP(app.config['MAIL_SERVER'], app.config['MAIL_PORT']) as server:
-                server.starttls()
-                server.login(app.config['MAIL_USERNAME'], app.config['MAIL_PASSWORD'])
-                server.send_message(msg)
-            print(f"Email notification sent to {user.email} for deal {deal.deal_name}")
+            send_email(recipient, subject, body)
         except Exception as e:
-            print(f"Failed to send email notification: {str(e)}")
+            yield covered, str(e)
+        else:
+            yield covered, None
+
+def record_delivery(token, notification, error):
+    """Mark one notification sent, or schedule its retry, and return whether it was sent.
+
+    The update only applies while this worker still holds the claim.
+    """
+    values = {'attempts': notification.attempts + 1, 'claim_token': None}
+    if error is None:
+        values.update(status='sent', sent_at=datetime.utcnow())
+    elif values['attempts'] >= current_app.config['NOTIFY_MAX_ATTEMPTS']:
+        values.update(status='failed', last_error=error)
+        log.error('Giving up on notification', extra={'notification_id': notification.id, 'recipient': notification.recipient, 'error': error})
     else:
-        # Fallback to console log if no email
-        message = f"Status change for deal '{deal.deal_name}' (ID: {deal.id}): {deal.status} by {user.username} at {datetime.utcnow()}"
-        print(message)
+        delay = current_app.config['NOTIFY_RETRY_BASE_SECONDS'] * 2 ** (values['attempts'] - 1)
+        values.update(last_error=error, next_attempt_at=datetime.utcnow() + timedelta(seconds=delay))
+        log.warning('Failed to send notification, will retry', extra={'notification_id': notification.id, 'retry_in_seconds': delay, 'error': error})
+    updated = NotificationOutbox.query.filter(
+        NotificationOutbox.id == notification.id, NotificationOutbox.claim_token == token
+    ).update(values, synchronize_session=False)
+    return error is None and updated == 1
 
-with app.app_context():
-    try:
-        db.create_all()
-        # Initialize default roles if they don't exist
-        if not Role.query.filter_by(name='Admin').first():
-            admin_role = Role(name='Admin')
-            db.session.add(admin_role)
-        if not Role.query.filter_by(name='User').first():
-            user_role = Role(name='User')
+def drain_notification_outbox(limit=None):
+    """Send every due notification over the shared SMTP session, rescheduling failures with exponential backoff.
+
+    Each email's outcome is committed as soon as it is known, so a failure partway through a
+    recipient's batch neither resends the emails before it nor holds back the ones after it.
+    Returns the number of notifications sent.
+    """
+    now = datetime.utcnow()
+    token, claimed = claim_due_notifications(now, limit or current_app.config['NOTIFY_BATCH_SIZE'])
+    by_recipient = {}
+    for notification in claimed:
+        by_recipient.setdefault(notification.recipient, []).append(notification)
+    sent = 0
+    for recipient, notifications in by_recipient.items():
+        notifications = renew_notification_lease(token, notifications)
+        for covered, error in deliver_notifications(recipient, notifications):
+            for notification in covered:
+                sent += record_delivery(token, notification, error)
             db.session.commit()
-        print("Database tables and roles created successfully")
-    except Exception as e:
-        print(f"Error creating database tables or roles: {str(e)}")
+    if sent:
+        log.info('Sent email notifications', extra={'sent': sent, 'recipients': len(by_recipient)})
+    return sent
+
+class NotificationWorker(threading.Thread):
+    """Daemon thread that drains the notification outbox whenever it is woken or the poll interval passes."""
+
+    def __init__(self, app):
+        super().__init__(name='notification-worker', daemon=True)
+        self.app = app
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        # First prune one interval after start, not while the process is still warming up
+        self.pruned_at = time.monotonic()
+
+    def wake(self):
+        self.wakeup.set()
+
+    def stop(self, timeout=None):
+        self.stopping.set()
+        self.wakeup.set()
+        self.join(timeout)
+        if 'mailer' in self.app.extensions:
+            self.app.extensions['mailer'].close()
+
+    def run(self):
+        while not self.stopping.is_set():
+            self.wakeup.clear()
+            with self.app.app_context():
+                try:
+                    drain_notification_outbox()
+                except Exception as e:
+                    log.exception('Notification worker error')
+                finally:
+                    db.session.remove()
+                # The same thread keeps the change log trimmed
+                if time.monotonic() - self.pruned_at >= self.app.config['CHANGE_LOG_PRUNE_SECONDS']:
+                    self.pruned_at = time.monotonic()
+                    try:
+                        pruned = prune_deal_changes()
+                        if pruned:
+                            log.info('Pruned change log', extra={'pruned': pruned})
+                    except Exception:
+                        log.exception('Change log pruning error')
+                    finally:
+                        db.session.remove()
+            self.wakeup.wait(self.app.config['NOTIFY_POLL_SECONDS'])
+
+notification_worker = None
+
+def start_notification_worker(app):
+    global notification_worker
+    if notification_worker is None or not notification_worker.is_alive():
+        notification_worker = NotificationWorker(app)
+        notification_worker.start()
+    return notification_worker
+
+@event.listens_for(db.session, 'after_commit')
+def wake_notification_worker(session):
+    # Deliver newly queued notifications right away instead of waiting for the next poll
+    if session.info.pop('notifications_queued', False) and notification_worker is not None:
+        notification_worker.wake()
+
+@bp.cli.group()
+def notifications():
+    """Inspect and deliver queued notification emails."""
+
+@notifications.command('drain')
+def notifications_drain():
+    """Send every notification that is currently due."""
+    click.echo(f"Sent {drain_notification_outbox()} notification(s)")
+
+@bp.cli.group()
+def rollups():
+    """Maintain the analytics rollup counters."""
+
+@rollups.command('verify')
+def rollups_verify():
+    """Report counters that drifted from the deal table."""
+    drift = verify_deal_rollups()
+    for (user_id, dimension, bucket), (stored, expected) in sorted(drift.items(), key=str):
+        click.echo(f"user {user_id} {dimension}={bucket!r}: stored {stored}, expected {expected}")
+    click.echo(f"{len(drift)} drifted counter(s)")
+    if drift:
+        raise SystemExit(1)
+
+@rollups.command('rebuild')
+def rollups_rebuild():
+    """Recompute every counter from the deal table."""
+    drift = rebuild_deal_rollups()
+    click.echo(f"Rollups rebuilt, {len(drift)} counter(s) corrected")
+
+@bp.cli.group()
+def changes():
+    """Maintain the deal change log behind change streams and sync."""
+
+@changes.command('prune')
+def changes_prune():
+    """Delete changes older than the retention period."""
+    click.echo(f"Pruned {prune_deal_changes()} change(s)")
+
+@bp.cli.group()
+def search():
+    """Maintain the deal full-text search index."""
+
+@search.command('rebuild')
+def search_rebuild():
+    """Reindex every deal and its file names."""
+    click.echo(f"Search index rebuilt, {rebuild_deal_search()} deal(s) indexed")
+
+def init_database():
+    """Create missing tables, seed the default roles and backfill derived tables. Safe to run repeatedly."""
+    db.create_all()
+    # Initialize default roles if they don't exist
+    if not Role.query.filter_by(name='Admin').first():
+        admin_role = Role(name='Admin')
+        db.session.add(admin_role)
+    if not Role.query.filter_by(name='User').first():
+        user_role = Role(name='User')
+        db.session.add(user_role)
+    db.session.commit()
+    invalidate_role_cache()
+    # Backfill the analytics rollups for databases created before they existed
+    if not DealRollup.query.first() and Deal.query.first():
+        rebuild_deal_rollups()
+    # Index deals that existed before the search table did
+    if Deal.query.first() and not db.session.execute(text('SELECT 1 FROM deal_search LIMIT 1')).first():
+        rebuild_deal_search()
+    log.info('Database tables and roles created')
+
+_database_lock = threading.Lock()
+
+def ensure_database():
+    """Run init_database once per app and process; later calls return immediately."""
+    if current_app.extensions.get('database_ready'):
+        return
+    with _database_lock:
+        if current_app.extensions.get('database_ready'):
+            return
+        try:
+            init_database()
+            current_app.extensions['database_ready'] = True
+        except Exception as e:
+            db.session.rollback()
+            log.exception('Error creating database tables or roles')
+
+@bp.before_app_request
+def initialize_database():
+    if current_app.config['AUTO_INIT_DATABASE']:
+        ensure_database()
+
+@bp.cli.command('init-db')
+def init_db_command():
+    """Create the tables, seed the default roles and backfill rollups and the search index."""
+    init_database()
+    click.echo('Database tables and roles created')
+
+app = create_app()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 3000)), debug=True)
\ No newline at end of file
+    debug = True
+    # The debug reloader's watcher process never serves requests, so only the server process runs the worker
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        with app.app_context():
+            ensure_database()
+        start_notification_worker(app)
+    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 3000)), debug=debug)
\ No newline at end of file
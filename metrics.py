@@ -0,0 +1,138 @@
+"""
+In-process request metrics for WildOakDealsApp, rendered in the Prometheus text format.
+Each worker process counts only the requests it served, so every series carries a worker
+label (its pid): counters stay monotonic per series whichever worker answers a scrape.
+"""
+import bisect
+import os
+import threading
+from collections import defaultdict
+
+# Upper bounds, in seconds, of the latency and DB time histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds of the SQL statements-per-request histogram buckets
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Cumulative-bucket histogram; not thread-safe on its own, RequestMetrics holds the lock."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One slot per bucket plus the +Inf overflow
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+    def quantile(self, q):
+        """Estimate the q-quantile by linear interpolation inside its bucket, like histogram_quantile()."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        lower, below = 0.0, 0
+        for bound, total in self.cumulative():
+            if total >= rank:
+                if bound == float('inf'):
+                    return lower
+                inside = total - below
+                return lower + (bound - lower) * ((rank - below) / inside if inside else 0)
+            lower, below = bound, total
+        return lower
+
+
+class RequestMetrics:
+    """Per-endpoint request counts, status codes, latency, SQL statement count and DB time."""
+
+    def __init__(self, prefix='wildoak'):
+        self.prefix = prefix
+        self.requests = defaultdict(int)
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.db_time = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.statements = defaultdict(lambda: Histogram(STATEMENT_BUCKETS))
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint, method, status, seconds, statements, db_seconds):
+        endpoint = endpoint or 'unmatched'
+        with self._lock:
+            self.requests[(endpoint, method, status)] += 1
+            self.latency[endpoint].observe(seconds)
+            self.db_time[endpoint].observe(db_seconds)
+            self.statements[endpoint].observe(statements)
+
+    def clear(self):
+        with self._lock:
+            self.requests.clear()
+            self.latency.clear()
+            self.db_time.clear()
+            self.statements.clear()
+
+    def render(self, extra=None):
+        """Return every metric in the Prometheus text exposition format (version 0.0.4).
+
+        extra maps further metric names to (type, help, value), for values kept elsewhere.
+        """
+        # Read at render time: the app is created in the gunicorn master and forked into workers
+        worker = os.getpid()
+        with self._lock:
+            lines = []
+            name = f'{self.prefix}_http_requests_total'
+            lines += [f'# HELP {name} Requests handled, by endpoint, method and status code.',
+                      f'# TYPE {name} counter']
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(f'{name}{{{labels(worker=worker, endpoint=endpoint, method=method, status=status)}}} {count}')
+
+            lines += self._histograms('http_request_duration_seconds', 'Time to produce the response.',
+                                      self.latency, worker)
+            name = f'{self.prefix}_http_request_duration_quantile_seconds'
+            lines += [f'# HELP {name} p50/p95/p99 latency estimated from the duration histogram.',
+                      f'# TYPE {name} gauge']
+            for endpoint, histogram in sorted(self.latency.items()):
+                for q in QUANTILES:
+                    lines.append(f'{name}{{{labels(worker=worker, endpoint=endpoint, quantile=q)}}} {number(histogram.quantile(q))}')
+
+            lines += self._histograms('db_duration_seconds', 'Time spent executing SQL per request.', self.db_time, worker)
+            lines += self._histograms('db_statements', 'SQL statements executed per request.', self.statements, worker)
+
+        for metric, (kind, help_text, value) in sorted((extra or {}).items()):
+            name = f'{self.prefix}_{metric}'
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}', f'{name}{{{labels(worker=worker)}}} {number(value)}']
+        return '\n'.join(lines) + '\n'
+
+    def _histograms(self, metric, help_text, histograms, worker):
+        name = f'{self.prefix}_{metric}'
+        lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for endpoint, histogram in sorted(histograms.items()):
+            for bound, total in histogram.cumulative():
+                lines.append(f'{name}_bucket{{{labels(worker=worker, endpoint=endpoint, le=bound)}}} {total}')
+            lines.append(f'{name}_sum{{{labels(worker=worker, endpoint=endpoint)}}} {number(histogram.sum)}')
+            lines.append(f'{name}_count{{{labels(worker=worker, endpoint=endpoint)}}} {histogram.count}')
+        return lines
+
+
+def labels(**values):
+    return ','.join(f'{key}="{escape(number(value) if isinstance(value, float) else value)}"'
+                    for key, value in values.items())
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def number(value):
+    if value is None:
+        return 'NaN'
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
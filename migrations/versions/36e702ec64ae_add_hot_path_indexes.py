@@ -0,0 +1,52 @@
+"""Add indexes for the hot deal, history, file and rollup queries
+
+Revision ID: 36e702ec64ae
+Revises: b4327ce4ead6
+Create Date: 2026-10-17 10:03:51.472915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '36e702ec64ae'
+down_revision = 'b4327ce4ead6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('deal', schema=None) as batch_op:
+        batch_op.create_index('ix_deal_user_id_created_at', ['user_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_deal_user_id_updated_at', ['user_id', 'updated_at'], unique=False)
+        batch_op.create_index('ix_deal_created_at', ['created_at'], unique=False)
+        batch_op.create_index('ix_deal_updated_at', ['updated_at'], unique=False)
+        batch_op.create_index('ix_deal_status', ['status'], unique=False)
+
+    with op.batch_alter_table('deal_status_history', schema=None) as batch_op:
+        batch_op.create_index('ix_deal_status_history_deal_id_changed_at', ['deal_id', 'changed_at'], unique=False)
+
+    with op.batch_alter_table('file', schema=None) as batch_op:
+        batch_op.create_index('ix_file_deal_id', ['deal_id'], unique=False)
+
+    with op.batch_alter_table('deal_rollup', schema=None) as batch_op:
+        batch_op.create_index('ix_deal_rollup_dimension_bucket', ['dimension', 'bucket'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('deal_rollup', schema=None) as batch_op:
+        batch_op.drop_index('ix_deal_rollup_dimension_bucket')
+
+    with op.batch_alter_table('file', schema=None) as batch_op:
+        batch_op.drop_index('ix_file_deal_id')
+
+    with op.batch_alter_table('deal_status_history', schema=None) as batch_op:
+        batch_op.drop_index('ix_deal_status_history_deal_id_changed_at')
+
+    with op.batch_alter_table('deal', schema=None) as batch_op:
+        batch_op.drop_index('ix_deal_status')
+        batch_op.drop_index('ix_deal_updated_at')
+        batch_op.drop_index('ix_deal_created_at')
+        batch_op.drop_index('ix_deal_user_id_updated_at')
+        batch_op.drop_index('ix_deal_user_id_created_at')
@@ -0,0 +1,37 @@
+"""Add deal_change log for deal change streams
+
+Revision ID: 3f8b6d1e9a72
+Revises: 8a61d2c4f0b9
+Create Date: 2026-10-17 16:22:09.418305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f8b6d1e9a72'
+down_revision = '8a61d2c4f0b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('deal_change',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('deal_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('deal_change', schema=None) as batch_op:
+        batch_op.create_index('ix_deal_change_user_id_id', ['user_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('deal_change', schema=None) as batch_op:
+        batch_op.drop_index('ix_deal_change_user_id_id')
+
+    op.drop_table('deal_change')
@@ -0,0 +1,30 @@
+"""Add notification_outbox claim token and recipient index
+
+Revision ID: 5c0f9a7e21d3
+Revises: e7b343f4d1f7
+Create Date: 2026-10-17 12:40:17.552031
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c0f9a7e21d3'
+down_revision = 'e7b343f4d1f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notification_outbox', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('claim_token', sa.String(length=32), nullable=True))
+        batch_op.create_index('ix_notification_outbox_claim_token', ['claim_token'], unique=False)
+        batch_op.create_index('ix_notification_outbox_recipient_status', ['recipient', 'status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('notification_outbox', schema=None) as batch_op:
+        batch_op.drop_index('ix_notification_outbox_recipient_status')
+        batch_op.drop_index('ix_notification_outbox_claim_token')
+        batch_op.drop_column('claim_token')
@@ -0,0 +1,46 @@
+"""Add deal_search full-text index with sync triggers
+
+Revision ID: 8a61d2c4f0b9
+Revises: 5c0f9a7e21d3
+Create Date: 2026-10-17 14:05:51.274390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a61d2c4f0b9'
+down_revision = '5c0f9a7e21d3'
+branch_labels = None
+depends_on = None
+
+DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS deal_search USING fts5(deal_name, city, state, status, file_names, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "INSERT INTO deal_search (deal_search, rank) VALUES ('rank', 'bm25(10.0, 3.0, 3.0, 1.0, 2.0)')",
+    "CREATE TRIGGER IF NOT EXISTS deal_search_insert AFTER INSERT ON deal BEGIN INSERT INTO deal_search (rowid, deal_name, city, state, status, file_names) VALUES (new.id, new.deal_name, new.city, new.state, new.status, coalesce((SELECT group_concat(file_name, ' ') FROM file WHERE deal_id = new.id), '')); END",
+    'CREATE TRIGGER IF NOT EXISTS deal_search_update AFTER UPDATE OF deal_name, city, state, status ON deal WHEN old.deal_name IS NOT new.deal_name OR old.city IS NOT new.city OR old.state IS NOT new.state OR old.status IS NOT new.status BEGIN UPDATE deal_search SET deal_name = new.deal_name, city = new.city, state = new.state, status = new.status WHERE rowid = new.id; END',
+    'CREATE TRIGGER IF NOT EXISTS deal_search_delete AFTER DELETE ON deal BEGIN DELETE FROM deal_search WHERE rowid = old.id; END',
+    "CREATE TRIGGER IF NOT EXISTS deal_search_file_insert AFTER INSERT ON file BEGIN UPDATE deal_search SET file_names = coalesce((SELECT group_concat(file_name, ' ') FROM file WHERE deal_id = new.deal_id), '') WHERE rowid = new.deal_id; END",
+    "CREATE TRIGGER IF NOT EXISTS deal_search_file_update AFTER UPDATE OF file_name, deal_id ON file BEGIN UPDATE deal_search SET file_names = coalesce((SELECT group_concat(file_name, ' ') FROM file WHERE deal_id = old.deal_id), '') WHERE rowid = old.deal_id; UPDATE deal_search SET file_names = coalesce((SELECT group_concat(file_name, ' ') FROM file WHERE deal_id = new.deal_id), '') WHERE rowid = new.deal_id; END",
+    "CREATE TRIGGER IF NOT EXISTS deal_search_file_delete AFTER DELETE ON file BEGIN UPDATE deal_search SET file_names = coalesce((SELECT group_concat(file_name, ' ') FROM file WHERE deal_id = old.deal_id), '') WHERE rowid = old.deal_id; END",
+]
+
+
+def upgrade():
+    for statement in DDL:
+        op.execute(statement)
+    # Index existing deals and their file names
+    op.execute("""
+        INSERT INTO deal_search (rowid, deal_name, city, state, status, file_names)
+        SELECT deal.id, deal.deal_name, deal.city, deal.state, deal.status, coalesce(files.names, '') FROM deal
+        LEFT JOIN (SELECT deal_id, group_concat(file_name, ' ') AS names FROM file GROUP BY deal_id) AS files
+        ON files.deal_id = deal.id
+    """)
+
+
+def downgrade():
+    for trigger in ('deal_search_insert', 'deal_search_update', 'deal_search_delete',
+                    'deal_search_file_insert', 'deal_search_file_update', 'deal_search_file_delete'):
+        op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.execute('DROP TABLE IF EXISTS deal_search')
@@ -0,0 +1,40 @@
+"""Add deal_rollup analytics counters
+
+Revision ID: b4327ce4ead6
+Revises: d4e310cd5fac
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4327ce4ead6'
+down_revision = 'd4e310cd5fac'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('deal_rollup',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('dimension', sa.String(length=10), nullable=False),
+        sa.Column('bucket', sa.String(length=100), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'dimension', 'bucket')
+    )
+    # Backfill the counters from existing deals
+    op.execute("""
+        INSERT INTO deal_rollup (user_id, dimension, bucket, count)
+        SELECT user_id, 'status', status, COUNT(*) FROM deal GROUP BY user_id, status
+        UNION ALL
+        SELECT user_id, 'state', state, COUNT(*) FROM deal GROUP BY user_id, state
+        UNION ALL
+        SELECT user_id, 'month', strftime('%Y-%m', created_at), COUNT(*) FROM deal GROUP BY user_id, strftime('%Y-%m', created_at)
+    """)
+
+
+def downgrade():
+    op.drop_table('deal_rollup')
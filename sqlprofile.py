@@ -0,0 +1,103 @@
+"""
+SQL profiling for WildOakDealsApp: every statement a request runs, with its timing
+and the line of application code (or template) that caused it.
+"""
+import os
+import sys
+import sysconfig
+from collections import deque, namedtuple
+
+Statement = namedtuple('Statement', 'sql parameters seconds call_site')
+
+# Frames from these directories are library code; the call site is the first frame outside them
+_LIBRARY_PATHS = tuple({os.path.realpath(sysconfig.get_paths()[name]) for name in ('stdlib', 'purelib', 'platlib')})
+_THIS_FILE = os.path.realpath(__file__)
+
+
+def call_site(depth=1):
+    """Return 'file:line in function' for the innermost frame of application code, or None.
+
+    The search starts depth frames above the caller, so event listeners can skip themselves.
+    """
+    frame = sys._getframe(depth + 1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        path = os.path.realpath(filename)
+        if not (path == _THIS_FILE or path.startswith(_LIBRARY_PATHS) or filename.startswith('<')):
+            # Lazy loads from a template point at the template line, the way Jinja's tracebacks do
+            template = frame.f_globals.get('__jinja_template__')
+            if template is not None:
+                return f'{os.path.relpath(path)}:{template.get_corresponding_lineno(frame.f_lineno)} in template'
+            return f'{os.path.relpath(path)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+class RequestProfile:
+    """The statements one request ran, in order."""
+
+    def __init__(self, route, method, path):
+        self.route = route
+        self.method = method
+        self.path = path
+        self.statements = []
+
+    def record(self, sql, parameters, seconds, site):
+        self.statements.append(Statement(sql, parameters, seconds, site))
+
+    @property
+    def seconds(self):
+        return sum(statement.seconds for statement in self.statements)
+
+    def repeated(self, threshold):
+        """Statements run at least threshold times with different parameters: the signature of an N+1.
+
+        Returns (sql, times run, distinct call sites) for each, most repeated first.
+        """
+        runs = {}
+        for statement in self.statements:
+            run = runs.setdefault(statement.sql, {'count': 0, 'parameters': set(), 'sites': []})
+            run['count'] += 1
+            run['parameters'].add(repr(statement.parameters))
+            if statement.call_site not in run['sites']:
+                run['sites'].append(statement.call_site)
+        found = [(sql, run['count'], run['sites']) for sql, run in runs.items() if len(run['parameters']) >= threshold]
+        return sorted(found, key=lambda item: -item[1])
+
+    def problems(self, budget=None, repeat_threshold=None):
+        """Human-readable descriptions of a blown query budget and of likely N+1 queries."""
+        problems = []
+        if budget is not None and len(self.statements) > budget:
+            problems.append(f'{self.method} {self.route} ran {len(self.statements)} SQL statements, budget is {budget}')
+        if repeat_threshold:
+            for sql, count, sites in self.repeated(repeat_threshold):
+                problems.append(f'{self.method} {self.route} ran the same statement {count} times with different '
+                                f'parameters (possible N+1) from {", ".join(map(str, sites))}: {" ".join(sql.split())[:200]}')
+        return problems
+
+    def as_dict(self):
+        return {
+            'route': self.route,
+            'method': self.method,
+            'path': self.path,
+            'statement_count': len(self.statements),
+            'seconds': round(self.seconds, 6),
+            'statements': [{'sql': ' '.join(s.sql.split()), 'ms': round(s.seconds * 1000, 3), 'call_site': s.call_site}
+                           for s in self.statements],
+        }
+
+
+class ProfileLog:
+    """The most recent request profiles and the problems found in them, for tests and debugging."""
+
+    def __init__(self, maxlen=100):
+        self.profiles = deque(maxlen=maxlen)
+        self.problems = deque(maxlen=maxlen)
+
+    def add(self, profile, problems):
+        self.profiles.append(profile)
+        self.problems.extend(problems)
+
+    def clear(self):
+        self.profiles.clear()
+        self.problems.clear()
@@ -1,11 +1,65 @@
 
 import os
 import sys
+import socket
+from contextlib import contextmanager
 import pytest
+from sqlalchemy import event
+from aiosmtpd.controller import Controller
+
+# Point the app at an in-memory database before it is imported. Always: the fixtures drop every
+# table, so a DATABASE_URL inherited from a deployment shell must never reach them
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+# Profile every request's SQL so query budgets and N+1 patterns are checked in every test
+os.environ.setdefault('SQL_PROFILE', '1')
 
 # Add parent directory to path so we can import the app
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from main import app, db, User, Role, Deal
+from main import app, db, User, Role, Deal, invalidate_role_cache, user_cache, sql_profiles
+
+# The fixtures below build the schema themselves
+app.config['AUTO_INIT_DATABASE'] = False
+
+# Most statements a request to each endpoint may run, whatever the data; routes that work in
+# chunks (import, bulk status) are bounded by their own tests instead
+app.config['SQL_QUERY_BUDGETS'] = {
+    'main.home': 7,
+    'main.dashboard': 8,
+    'main.deals': 7,
+    'main.deal_modify': 8,
+    'main.deal_detail': 3,
+    'main.files': 4,
+    'main.delete_file': 4,
+    'main.get_analytics': 5,
+    'main.search_deals': 2,
+    'main.sync_deals': 5,
+}
+
+@pytest.fixture(autouse=True)
+def sql_query_budgets(request):
+    """Fail any test whose requests blow their endpoint's query budget or repeat a query N+1 style."""
+    sql_profiles.clear()
+    yield
+    problems = list(sql_profiles.problems)
+    if problems and not request.node.get_closest_marker('allow_sql_problems'):
+        pytest.fail('SQL profile problems:\n' + '\n'.join(problems), pytrace=False)
+
+@pytest.fixture
+def sql_statements():
+    """Context manager collecting the (statement, parameters) pairs sent to the database while it is open."""
+    @contextmanager
+    def capture():
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+    return capture
 
 @pytest.fixture
 def client():
@@ -16,6 +70,8 @@ def client():
 
     with app.test_client() as client:
         with app.app_context():
+            # Start from an empty schema; importing main seeds its own roles
+            db.drop_all()
             db.create_all()
             # Create roles
             admin_role = Role(name='Admin')
@@ -23,6 +79,8 @@ def client():
             db.session.add(admin_role)
             db.session.add(user_role)
             db.session.commit()
+            invalidate_role_cache()
+            user_cache.clear()
 
             # Create test user
             test_user = User(username='testuser', role_id=user_role.id)
@@ -32,6 +90,7 @@ def client():
 
         yield client
 
+        reset_mailer()
         with app.app_context():
             db.drop_all()
 
@@ -68,3 +127,41 @@ def login(client, username, password):
         'username': username,
         'password': password
     }, follow_redirects=True)
+
+class SinkHandler:
+    """aiosmtpd handler that keeps every message it receives."""
+
+    def __init__(self):
+        self.messages = []
+        self.connections = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        self.connections.add(session.peer)
+        return '250 Message accepted for delivery'
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+@pytest.fixture
+def smtp_sink(monkeypatch):
+    """Run a local SMTP server in a background thread and point the app's mail settings at it."""
+    handler = SinkHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=free_port())
+    controller.start()
+    monkeypatch.setitem(app.config, 'MAIL_SERVER', '127.0.0.1')
+    monkeypatch.setitem(app.config, 'MAIL_PORT', controller.port)
+    monkeypatch.setitem(app.config, 'MAIL_USE_TLS', False)
+    monkeypatch.setitem(app.config, 'MAIL_USERNAME', None)
+    # Drop any SMTP session opened against a previous server
+    reset_mailer()
+    yield handler
+    reset_mailer()
+    controller.stop()
+
+def reset_mailer():
+    mailer = app.extensions.pop('mailer', None)
+    if mailer is not None:
+        mailer.close()
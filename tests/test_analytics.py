@@ -0,0 +1,46 @@
+import json
+from datetime import datetime
+from main import app, db, User, Role, Deal, compute_deal_analytics, rebuild_deal_rollups
+
+# Import the login function from conftest
+from conftest import login
+
+def add_deal(user, status, state, created_at):
+    db.session.add(Deal(deal_name=f'{status} {state}', state=state, city='Austin',
+                        status=status, user_id=user.id, created_at=created_at))
+
+def seed_two_users():
+    """Give testuser two deals and a second user one deal."""
+    with app.app_context():
+        test_user = User.query.filter_by(username='testuser').first()
+        other = User(username='otheruser', role_id=test_user.role_id)
+        other.set_password('otherpassword')
+        db.session.add(other)
+        db.session.commit()
+        add_deal(test_user, 'Pending', 'Texas', datetime(2025, 1, 5))
+        add_deal(test_user, 'Closed', 'Texas', datetime(2025, 2, 7))
+        add_deal(other, 'Pending', 'Ohio', datetime(2025, 2, 9))
+        db.session.commit()
+        rebuild_deal_rollups()
+
+def test_analytics_scoped_to_user(client):
+    """Users only see counts for their own deals."""
+    seed_two_users()
+    login(client, 'testuser', 'testpassword')
+    data = json.loads(client.get('/api/analytics').data)
+    assert data == {
+        'status_counts': {'Pending': 1, 'Closed': 1},
+        'state_counts': {'Texas': 2},
+        'user_counts': {'testuser': 2},
+        'deals_by_month': {'2025-01': 1, '2025-02': 1}
+    }
+
+def test_analytics_all_deals(client):
+    """Without a user scope every deal is counted, keyed by username."""
+    seed_two_users()
+    with app.app_context():
+        data = compute_deal_analytics()
+    assert data['status_counts'] == {'Pending': 2, 'Closed': 1}
+    assert data['state_counts'] == {'Texas': 2, 'Ohio': 1}
+    assert data['user_counts'] == {'testuser': 2, 'otheruser': 1}
+    assert data['deals_by_month'] == {'2025-01': 1, '2025-02': 2}
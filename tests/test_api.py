@@ -14,6 +14,15 @@ def test_api_deals_get(client):
     response = client.get('/api/deals')
     assert response.status_code == 200
     data = json.loads(response.data)
+    assert isinstance(data['deals'], list)
+    assert data['next_cursor'] is None
+
+def test_api_deals_get_all(client):
+    """The unpaginated list is still available behind the all flag."""
+    login(client, 'testuser', 'testpassword')
+    response = client.get('/api/deals?all=true')
+    assert response.status_code == 200
+    data = json.loads(response.data)
     assert isinstance(data, list)
 
 def test_api_deals_post(client):
@@ -0,0 +1,49 @@
+from sqlalchemy import inspect, text
+from main import app, create_app, db, Role
+
+def test_create_app_applies_sqlite_pragmas(tmp_path):
+    """Every connection of a factory-built app runs in WAL mode with a busy timeout and synchronous=NORMAL."""
+    other = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "factory.db"}', 'SQLITE_BUSY_TIMEOUT_MS': 2500})
+    with other.app_context():
+        try:
+            assert db.session.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+            assert db.session.execute(text('PRAGMA busy_timeout')).scalar() == 2500
+            assert db.session.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+        finally:
+            db.session.remove()
+            db.engine.dispose()
+
+def test_factory_apps_are_independent(tmp_path):
+    """Each factory call builds its own app and config, leaving the module-level app untouched."""
+    other = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "factory.db"}', 'NOTIFY_BATCH_SIZE': 7})
+    try:
+        assert other is not app
+        assert other.config['NOTIFY_BATCH_SIZE'] == 7
+        assert app.config['NOTIFY_BATCH_SIZE'] == 50
+        assert other.test_client().get('/login').status_code == 200
+    finally:
+        with other.app_context():
+            db.engine.dispose()
+
+def test_schema_is_created_on_first_request_not_at_startup(tmp_path):
+    """Building the app touches no tables; the first request creates them and seeds both roles."""
+    other = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "lazy.db"}'})
+    try:
+        with other.app_context():
+            assert not inspect(db.engine).has_table('role')
+        assert other.test_client().get('/login').status_code == 200
+        with other.app_context():
+            assert sorted(role.name for role in Role.query.all()) == ['Admin', 'User']
+    finally:
+        with other.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+def test_secret_key_survives_restarts(tmp_path, monkeypatch):
+    """Without SECRET_KEY set, every app built from the same instance folder signs sessions with the same key."""
+    monkeypatch.delenv('SECRET_KEY', raising=False)
+    first = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "key.db"}'})
+    second = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "key.db"}'})
+    assert first.config['SECRET_KEY'] == second.config['SECRET_KEY'] == app.config['SECRET_KEY']
+    monkeypatch.setenv('SECRET_KEY', 'from-the-environment')
+    assert create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "key.db"}'}).config['SECRET_KEY'] == 'from-the-environment'
@@ -0,0 +1,94 @@
+from main import app, db, User, Role, Deal, DealStatusHistory, NotificationOutbox, verify_deal_rollups, rebuild_deal_rollups
+
+# Import the login function from conftest
+from conftest import login
+
+def seed_deals(username, count, status='Pending'):
+    with app.app_context():
+        user = User.query.filter_by(username=username).first()
+        db.session.add_all([
+            Deal(deal_name=f'{username} {i}', state='Texas', city='Austin', status=status, user_id=user.id)
+            for i in range(count)
+        ])
+        db.session.commit()
+        rebuild_deal_rollups()
+        return [d.id for d in Deal.query.filter_by(user_id=user.id).order_by(Deal.id)]
+
+def add_user(username, role_name):
+    with app.app_context():
+        user = User(username=username, role_id=Role.query.filter_by(name=role_name).first().id)
+        user.set_password('password')
+        db.session.add(user)
+        db.session.commit()
+
+def test_bulk_status_by_ids(client):
+    """Listed deals change in one call with a history row each; deals already there are left alone."""
+    with app.app_context():
+        User.query.filter_by(username='testuser').first().email = 'testuser@example.com'
+        db.session.commit()
+    ids = seed_deals('testuser', 5)
+    login(client, 'testuser', 'testpassword')
+    client.post('/api/deals/status', json={'ids': ids[:1], 'status': 'Closed'})
+    response = client.post('/api/deals/status', json={'ids': ids[:3] + [9999], 'status': 'Closed'})
+    assert response.status_code == 200
+    assert response.get_json() == {'status': 'Closed', 'changed': ids[1:3], 'unchanged': ids[:1], 'skipped': [9999]}
+    with app.app_context():
+        assert [d.status for d in Deal.query.order_by(Deal.id)] == ['Closed'] * 3 + ['Pending'] * 2
+        assert DealStatusHistory.query.filter_by(status='Closed').count() == 3
+        assert NotificationOutbox.query.count() == 2
+        assert verify_deal_rollups() == {}
+
+def test_bulk_status_respects_ownership(client):
+    """Users cannot move other users' deals; Admins can move anyone's with a filter."""
+    add_user('other', 'User')
+    add_user('boss', 'Admin')
+    other_ids = seed_deals('other', 3)
+    own_ids = seed_deals('testuser', 2)
+    login(client, 'testuser', 'testpassword')
+    data = client.post('/api/deals/status', json={'ids': other_ids + own_ids, 'status': 'Dead'}).get_json()
+    assert data['changed'] == own_ids
+    assert data['skipped'] == other_ids
+
+    client.get('/logout')
+    login(client, 'boss', 'password')
+    data = client.post('/api/deals/status', json={'filter': {'status': 'Pending'}, 'status': 'Lead'}).get_json()
+    assert data['changed'] == other_ids
+    with app.app_context():
+        assert verify_deal_rollups() == {}
+
+def test_bulk_status_uses_set_based_statements(client, sql_statements):
+    """Thousands of deals move with a handful of statements rather than a few per deal."""
+    ids = seed_deals('testuser', 2000)
+    login(client, 'testuser', 'testpassword')
+    with sql_statements() as statements:
+        response = client.post('/api/deals/status', json={'ids': ids, 'status': 'Closed'})
+    assert len(response.get_json()['changed']) == 2000
+    # 4 id chunks, each read and updated, plus the history insert, rollup upsert and outbox row
+    assert len(statements) <= 12
+
+def test_bulk_status_validation(client):
+    """Malformed bodies are refused before any deal changes."""
+    login(client, 'testuser', 'testpassword')
+    assert client.post('/api/deals/status', json={'ids': [1]}).status_code == 400
+    assert client.post('/api/deals/status', json={'status': 'Closed'}).status_code == 400
+    assert client.post('/api/deals/status', json={'status': 'Closed', 'ids': ['x']}).status_code == 400
+    assert client.post('/api/deals/status', json={'status': 'Closed', 'filter': {}}).status_code == 400
+
+def test_bulk_status_filter_is_checked(client, monkeypatch):
+    """Unknown keys and non-string values are refused, and broad filters need confirming."""
+    ids = seed_deals('testuser', 3)
+    login(client, 'testuser', 'testpassword')
+    typo = client.post('/api/deals/status', json={'status': 'Closed', 'filter': {'stauts': 'Open'}})
+    assert typo.status_code == 400
+    assert 'stauts' in typo.get_json()['error']
+    bad_value = client.post('/api/deals/status', json={'status': 'Closed', 'filter': {'status': ['x']}})
+    assert bad_value.status_code == 400
+    assert 'SELECT' not in bad_value.get_json()['error']
+
+    monkeypatch.setitem(app.config, 'BULK_STATUS_MAX_FILTER_MATCHES', 2)
+    broad = {'status': 'Closed', 'filter': {'status': 'Pending'}}
+    assert client.post('/api/deals/status', json=broad).status_code == 400
+    with app.app_context():
+        assert {d.status for d in Deal.query} == {'Pending'}
+    assert client.post('/api/deals/status', json=dict(broad, confirm=True)).get_json()['changed'] == ids
+    assert client.post('/api/deals/status', json={'status': 'Lead', 'filter': {}, 'confirm': True}).get_json()['changed'] == ids
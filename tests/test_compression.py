@@ -0,0 +1,49 @@
+import gzip
+import json
+from datetime import datetime
+import pytest
+from main import app, db, Deal
+from fastjson import FastJSONProvider
+
+def add_deals(user_id, count):
+    with app.app_context():
+        db.session.add_all(Deal(deal_name=f'Deal {n}', state='Texas', city='Austin', status='Lead', user_id=user_id)
+                           for n in range(count))
+        db.session.commit()
+
+def test_providers_agree_and_write_iso_datetimes():
+    """The orjson and stdlib providers produce the same JSON, with datetimes as ISO strings."""
+    value = {'at': datetime(2026, 10, 17, 9, 30, 5, 120000), 'on': datetime(2026, 1, 2), 'counts': {'Lead': 3}}
+    fast = FastJSONProvider(app)
+    stdlib = FastJSONProvider(app, use_orjson=False)
+    assert json.loads(fast.dumps(value)) == json.loads(stdlib.dumps(value)) == {
+        'at': '2026-10-17T09:30:05.120000', 'on': '2026-01-02T00:00:00', 'counts': {'Lead': 3}}
+    assert json.loads(fast.response(value).get_data()) == json.loads(stdlib.response(value).get_data())
+
+def test_large_json_is_gzipped_when_accepted(authenticated_client):
+    """Large JSON responses are gzipped for clients that accept it and still revalidate by ETag."""
+    client = authenticated_client
+    add_deals(user_id=1, count=60)
+    plain = client.get('/api/deals')
+    assert 'Content-Encoding' not in plain.headers
+    response = client.get('/api/deals', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(gzip.decompress(response.data)) == plain.json
+    assert len(response.data) < len(plain.data) / 4
+    # The ETag turns weak but still revalidates
+    assert response.headers['ETag'].startswith('W/')
+    assert client.get('/api/deals', headers={'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']}).status_code == 304
+    # Small bodies are not worth compressing
+    assert 'Content-Encoding' not in client.get('/api/analytics', headers={'Accept-Encoding': 'gzip'}).headers
+
+def test_brotli_preferred_when_installed(authenticated_client):
+    """Brotli is used when installed and accepted, unless the client ranks gzip higher."""
+    brotli = pytest.importorskip('brotli')
+    add_deals(user_id=1, count=60)
+    response = authenticated_client.get('/api/deals', headers={'Accept-Encoding': 'gzip, deflate, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert json.loads(brotli.decompress(response.data)) == authenticated_client.get('/api/deals').json
+    # The client's preference wins over ours
+    assert authenticated_client.get('/api/deals', headers={'Accept-Encoding': 'gzip, br;q=0.5'}) \
+        .headers['Content-Encoding'] == 'gzip'
@@ -0,0 +1,55 @@
+from main import app, db, File
+
+# Import the login function from conftest
+from conftest import login
+
+DEAL = {'deal_name': 'Cached Deal', 'state': 'Texas', 'city': 'Austin', 'status': 'Pending'}
+
+def test_unchanged_deals_return_304_without_loading_rows(client, test_deal, sql_statements):
+    """A repeat request with the ETag is answered from aggregates alone."""
+    login(client, 'testuser', 'testpassword')
+    first = client.get('/api/deals')
+    assert first.status_code == 200
+    assert first.headers['ETag']
+    # Validated by ETag alone; a per-second timestamp would miss deletes and same-second writes
+    assert 'Last-Modified' not in first.headers
+
+    with sql_statements() as statements:
+        second = client.get('/api/deals', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+    assert second.data == b''
+    # Only the max/count validator ran; no deal columns were selected
+    assert not any('deal.deal_name' in statement for statement, _ in statements)
+
+def test_writes_and_arguments_change_the_etag(client, test_deal):
+    """Creating or deleting a deal, or asking for a different page, yields a new ETag."""
+    login(client, 'testuser', 'testpassword')
+    etag = client.get('/api/deals').headers['ETag']
+    assert client.get('/api/deals?limit=1').headers['ETag'] != etag
+
+    new_id = client.post('/api/deals', data=DEAL).get_json()['id']
+    after_create = client.get('/api/deals', headers={'If-None-Match': etag})
+    assert after_create.status_code == 200
+    assert len(after_create.get_json()['deals']) == 2
+
+    client.delete(f'/api/deals/{new_id}')
+    after_delete = client.get('/api/deals', headers={'If-None-Match': after_create.headers['ETag']})
+    assert after_delete.status_code == 200
+    assert len(after_delete.get_json()['deals']) == 1
+
+def test_analytics_and_files_are_conditional(client, test_deal):
+    """Analytics and file lists honour If-None-Match, and ignore If-Modified-Since."""
+    login(client, 'testuser', 'testpassword')
+    analytics = client.get('/api/analytics')
+    assert client.get('/api/analytics', headers={'If-None-Match': analytics.headers['ETag']}).status_code == 304
+
+    with app.app_context():
+        db.session.add(File(deal_id=test_deal, file_name='plan.pdf', dropbox_link='https://example.com'))
+        db.session.commit()
+    files = client.get(f'/api/files/{test_deal}')
+    assert files.status_code == 200
+    assert client.get(f'/api/files/{test_deal}', headers={'If-None-Match': files.headers['ETag']}).status_code == 304
+    assert client.get(f'/api/files/{test_deal}', headers={'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'}).status_code == 200
+
+    client.post(f'/api/files/{test_deal}', data={'file_name': 'b.pdf', 'dropbox_link': 'https://example.com'})
+    assert client.get(f'/api/files/{test_deal}', headers={'If-None-Match': files.headers['ETag']}).status_code == 200
@@ -0,0 +1,41 @@
+import json
+import re
+from bs4 import BeautifulSoup
+from main import app, db, Deal, DEAL_PAGE_SIZE, rebuild_deal_rollups
+
+def add_deals(user_id, count):
+    with app.app_context():
+        db.session.add_all(Deal(deal_name=f'Deal {n}', state='Texas', city='Austin', status='Lead', user_id=user_id)
+                           for n in range(count))
+        db.session.commit()
+        rebuild_deal_rollups()
+
+def embedded_dashboard(html):
+    script = next(s.string for s in BeautifulSoup(html, 'html.parser').find_all('script') if s.string and 'const dashboard' in s.string)
+    return json.loads(re.search(r'const dashboard = (\{.*\});', script).group(1))
+
+def test_home_renders_first_page_and_analytics(authenticated_client):
+    """The home page ships the first deal page, analytics and sync cursor the APIs would return."""
+    add_deals(user_id=1, count=DEAL_PAGE_SIZE + 1)
+    response = authenticated_client.get('/')
+    assert response.status_code == 200
+    rows = BeautifulSoup(response.data, 'html.parser').select('#dealTableBody tr')
+    page = authenticated_client.get('/api/deals').json
+    # The same first page /api/deals serves, already in the table
+    assert [int(row['data-deal-id']) for row in rows] == [d['id'] for d in page['deals']]
+    dashboard = embedded_dashboard(response.data.decode())
+    assert dashboard['analytics'] == authenticated_client.get('/api/analytics').json
+    assert dashboard['next_cursor'] == page['next_cursor']
+    assert dashboard['cursor'] == authenticated_client.get('/api/deals/sync').json['cursor']
+
+def test_dashboard_endpoint_returns_deals_and_analytics(authenticated_client):
+    """/api/dashboard combines the deals and analytics responses and honours If-None-Match."""
+    add_deals(user_id=1, count=3)
+    response = authenticated_client.get('/api/dashboard')
+    assert response.status_code == 200
+    body = response.json
+    assert body['deals'] == authenticated_client.get('/api/deals').json
+    assert body['analytics'] == authenticated_client.get('/api/analytics').json
+    assert body['analytics']['status_counts'] == {'Lead': 3}
+    # Conditional like the endpoints it combines
+    assert authenticated_client.get('/api/dashboard', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
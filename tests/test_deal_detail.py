@@ -1,9 +1,10 @@
 import os
 import sys
+from datetime import datetime, timedelta
 import pytest
 from flask import url_for
 from bs4 import BeautifulSoup
-from main import app, db, Deal, File, DealStatusHistory
+from main import app, db, User, Deal, File, DealStatusHistory
 
 # Import helper functions from conftest
 from conftest import login
@@ -42,4 +43,34 @@ def test_deal_edit(client, test_deal):
         assert deal.deal_name == 'Updated Test Deal'
         assert deal.state == 'Texas'
         assert deal.city == 'Austin'
-        assert deal.status == 'Active'
\ No newline at end of file
+        assert deal.status == 'Active'
+
+def test_deal_detail_query_count(client, test_deal, sql_statements):
+    """Rendering a deal with a long history from many users takes a fixed number of queries."""
+    with app.app_context():
+        users = []
+        for i in range(20):
+            users.append(User(username=f'changer{i}', password='unused', role_id=2))
+        db.session.add_all(users)
+        db.session.flush()
+        start = datetime(2025, 1, 1)
+        for i in range(300):
+            db.session.add(DealStatusHistory(deal_id=test_deal, status=f'Status {i}',
+                                             changed_by_user_id=users[i % 20].id,
+                                             changed_at=start + timedelta(hours=i)))
+        for i in range(10):
+            db.session.add(File(deal_id=test_deal, file_name=f'file{i}.pdf', dropbox_link='https://example.com'))
+        db.session.commit()
+
+    login(client, 'testuser', 'testpassword')
+    client.get(f'/deal/{test_deal}')
+    with sql_statements() as statements:
+        response = client.get(f'/deal/{test_deal}')
+
+    assert response.status_code == 200
+    assert len(statements) <= 3, statements
+    text = response.data.decode()
+    # Newest change first, with the changing user's name
+    assert text.index('Status 299 changed by changer19') < text.index('Status 0 changed by changer0')
+    soup = BeautifulSoup(response.data, 'html.parser')
+    assert len(soup.find('ul', id='fileList').find_all('li')) == 10
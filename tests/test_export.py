@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+import os
+import pytest
+from sqlalchemy import text
+from main import app, db, User, Role, Deal, File, DealStatusHistory
+
+# Import the login function from conftest
+from conftest import login
+
+def seed(username, count):
+    with app.app_context():
+        user = User.query.filter_by(username=username).first()
+        for i in range(count):
+            deal = Deal(deal_name=f'{username} {i}', state='Texas', city='Austin', status='Pending', user_id=user.id)
+            db.session.add(deal)
+            db.session.flush()
+            db.session.add(File(deal_id=deal.id, file_name=f'{i}.pdf', dropbox_link='https://example.com'))
+            db.session.add(DealStatusHistory(deal_id=deal.id, status='Pending', changed_by_user_id=user.id))
+        db.session.commit()
+
+def test_export_ndjson_with_files_and_history(client, monkeypatch):
+    """NDJSON export nests files and history and only includes the caller's deals."""
+    monkeypatch.setitem(app.config, 'EXPORT_BATCH_SIZE', 2)
+    with app.app_context():
+        other = User(username='other', role_id=Role.query.filter_by(name='User').first().id)
+        other.set_password('password')
+        db.session.add(other)
+        db.session.commit()
+    seed('other', 2)
+    seed('testuser', 3)
+    login(client, 'testuser', 'testpassword')
+    response = client.get('/api/deals/export?format=ndjson&include=files,history')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [r['deal_name'] for r in records] == ['testuser 0', 'testuser 1', 'testuser 2']
+    assert [f['file_name'] for f in records[1]['files']] == ['1.pdf']
+    assert [h['status'] for h in records[2]['history']] == ['Pending']
+
+def test_export_csv_with_filters(client):
+    """CSV export applies the status filter and rejects unknown formats and includes."""
+    seed('testuser', 3)
+    with app.app_context():
+        Deal.query.filter_by(deal_name='testuser 1').first().status = 'Closed'
+        db.session.commit()
+    login(client, 'testuser', 'testpassword')
+    response = client.get('/api/deals/export?status=Pending&include=files')
+    assert response.mimetype == 'text/csv'
+    assert 'attachment; filename=deals.csv' == response.headers['Content-Disposition']
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [r['deal_name'] for r in rows] == ['testuser 0', 'testuser 2']
+    assert json.loads(rows[0]['files'])[0]['file_name'] == '0.pdf'
+    assert client.get('/api/deals/export?format=xml').status_code == 400
+    assert client.get('/api/deals/export?include=secrets').status_code == 400
+
+def current_rss_kb():
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/status'), reason='RSS is read from /proc on Linux')
+def test_export_memory_stays_bounded(client):
+    """Exporting 500k deals streams in batches instead of building the whole list in memory."""
+    total = 500000
+    with app.app_context():
+        user_id = User.query.filter_by(username='testuser').first().id
+        db.session.execute(text(
+            "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < :total) "
+            "INSERT INTO deal (deal_name, state, city, status, user_id, created_at, updated_at) "
+            "SELECT 'Deal ' || i, 'Texas', 'Austin', 'Pending', :user_id, '2024-01-01 00:00:00', '2024-01-01 00:00:00' FROM n"
+        ), {'total': total, 'user_id': user_id})
+        db.session.commit()
+    login(client, 'testuser', 'testpassword')
+    baseline = current_rss_kb()
+    peak = baseline
+    lines = 0
+    response = client.get('/api/deals/export?format=ndjson', buffered=False)
+    for n, chunk in enumerate(response.response):
+        lines += chunk.count(b'\n')
+        if n % 100 == 0:
+            peak = max(peak, current_rss_kb())
+    response.close()
+    assert lines == total
+    # Materialising 500k deal dicts would take hundreds of MB
+    assert peak - baseline < 50 * 1024
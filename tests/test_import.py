@@ -0,0 +1,87 @@
+import io
+import json
+from main import app, db, Deal, DealStatusHistory, NotificationOutbox, User, verify_deal_rollups
+
+# Import the login function from conftest
+from conftest import login
+
+ROWS = [
+    {'deal_name': 'Import A', 'state': 'Texas', 'city': 'Austin', 'status': 'Pending'},
+    {'deal_name': 'Import B', 'state': 'Ohio', 'city': 'Dayton', 'status': 'Closed'},
+    {'deal_name': 'Import C', 'state': 'Texas', 'city': 'Dallas', 'status': 'Pending'}
+]
+
+def test_import_json_array_in_chunks(client, monkeypatch):
+    """A JSON array is inserted in chunks with one history row per deal and consistent rollups."""
+    monkeypatch.setitem(app.config, 'IMPORT_CHUNK_SIZE', 2)
+    login(client, 'testuser', 'testpassword')
+    response = client.post('/api/deals/import', json=ROWS)
+    assert response.status_code == 201
+    assert response.get_json()['created'] == 3
+    with app.app_context():
+        deals = Deal.query.order_by(Deal.id).all()
+        assert [d.deal_name for d in deals] == ['Import A', 'Import B', 'Import C']
+        histories = DealStatusHistory.query.order_by(DealStatusHistory.deal_id).all()
+        assert [(h.deal_id, h.status) for h in histories] == [(d.id, d.status) for d in deals]
+        assert verify_deal_rollups() == {}
+
+def test_import_reports_row_errors_without_aborting(client):
+    """Invalid NDJSON rows are reported by line number while the valid ones are still imported."""
+    login(client, 'testuser', 'testpassword')
+    body = '\n'.join([
+        json.dumps(ROWS[0]),
+        '{not json',
+        json.dumps(dict(ROWS[1], city='')),
+        json.dumps(ROWS[2])
+    ])
+    response = client.post('/api/deals/import', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 201
+    data = response.get_json()
+    assert data['created'] == 2
+    assert data['errors'] == [
+        {'row': 2, 'error': 'Invalid JSON'},
+        {'row': 3, 'error': 'Missing required field: city'}
+    ]
+
+def test_import_csv_upload_queues_one_notification(client):
+    """A CSV file upload creates every deal and queues a single summary email for the batch."""
+    with app.app_context():
+        User.query.filter_by(username='testuser').first().email = 'testuser@example.com'
+        db.session.commit()
+    login(client, 'testuser', 'testpassword')
+    csv_body = 'deal_name,state,city,status\n' + ''.join(
+        f"{r['deal_name']},{r['state']},{r['city']},{r['status']}\n" for r in ROWS
+    )
+    response = client.post('/api/deals/import', data={'file': (io.BytesIO(csv_body.encode()), 'deals.csv')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 201
+    assert response.get_json()['created'] == 3
+    with app.app_context():
+        notification = NotificationOutbox.query.one()
+        assert notification.subject == 'Deals Imported: 3'
+
+def test_import_rejects_unsupported_body(client):
+    """Unknown formats and incomplete records are refused."""
+    login(client, 'testuser', 'testpassword')
+    response = client.post('/api/deals/import', data='deal_name=x', content_type='text/plain')
+    assert response.status_code == 400
+    assert client.post('/api/deals/import', json=[{'deal_name': 'x'}]).status_code == 400
+
+def test_import_rejects_malformed_json_and_too_many_rows(client, monkeypatch):
+    """Unparseable JSON is a 400, and the row limit counts deals the same way in every format."""
+    login(client, 'testuser', 'testpassword')
+    response = client.post('/api/deals/import', data='[{"deal_name": ', content_type='application/json')
+    assert response.status_code == 400
+    assert 'Invalid JSON' in response.get_json()['error']
+    upload = {'file': (io.BytesIO(b'[{"deal_name": '), 'deals.json')}
+    response = client.post('/api/deals/import', data=upload, content_type='multipart/form-data')
+    assert response.status_code == 400
+    assert 'Invalid JSON' in response.get_json()['error']
+
+    monkeypatch.setitem(app.config, 'IMPORT_MAX_ROWS', 2)
+    assert client.post('/api/deals/import', json=ROWS).status_code == 400
+    csv_body = 'deal_name,state,city,status\n' + ''.join(f"{r['deal_name']},{r['state']},{r['city']},{r['status']}\n" for r in ROWS)
+    assert client.post('/api/deals/import', data=csv_body, content_type='text/csv').status_code == 400
+    assert client.post('/api/deals/import', json=ROWS[:2]).status_code == 201
+    with app.app_context():
+        assert Deal.query.count() == 2
@@ -0,0 +1,62 @@
+import json
+import logging
+import queue
+import pytest
+import main
+from main import app
+from jsonlog import JSONFormatter, QueueLogging, redact
+
+def log_lines(capsys):
+    """Flush the log queue and return the JSON lines written to stdout since the last read."""
+    main.queue_logging.flush()
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{')]
+
+def test_login_is_logged_without_credentials(client, capsys):
+    """A login is logged with its request id and user, never the password."""
+    capsys.readouterr()
+    client.post('/login', data={'username': 'testuser', 'password': 'testpassword'},
+                headers={'X-Request-ID': 'req-123'})
+
+    output = [line for line in log_lines(capsys) if line.get('route') == 'main.login']
+    assert 'testpassword' not in json.dumps(output)
+    request_line = next(line for line in output if line['message'] == 'request')
+    assert request_line['request_id'] == 'req-123'
+    assert request_line['status'] == 302
+    assert request_line['latency_ms'] >= 0
+    logged_in = next(line for line in output if line['message'] == 'User logged in')
+    assert logged_in['username'] == 'testuser'
+
+def test_sampled_routes_still_log_errors(authenticated_client, capsys, monkeypatch):
+    """A route sampled at 0 drops its successful requests from the log but keeps the errors."""
+    monkeypatch.setitem(app.config, 'LOG_SAMPLE_RATES', {'main.deals': 0.0})
+    capsys.readouterr()
+
+    ok = authenticated_client.get('/api/deals')
+    bad = authenticated_client.get('/api/deals?cursor=not-a-cursor')
+
+    requests = [line for line in log_lines(capsys) if line['message'] == 'request']
+    assert ok.headers['X-Request-ID'] not in {line['request_id'] for line in requests}
+    assert [line['status'] for line in requests] == [400]
+    assert requests[0]['request_id'] == bad.headers['X-Request-ID']
+    assert requests[0]['user_id'] is not None
+
+def test_redaction_and_full_queue_never_blocks():
+    """Secrets are redacted, and a full log queue drops records instead of blocking the caller."""
+    assert redact({'user': {'Password': 'x', 'name': 'a'}, 'items': [{'token': 'y'}]}) == {
+        'user': {'Password': '[REDACTED]', 'name': 'a'}, 'items': [{'token': '[REDACTED]'}]}
+
+    logger = logging.getLogger('wildoak.test.full')
+    logger.propagate = False
+    handler = logging.StreamHandler()
+    handler.setFormatter(JSONFormatter())
+    # The listener is never started, so nothing drains the single slot
+    logging_queue = QueueLogging(logger, handler, maxsize=1)
+    for n in range(5):
+        logger.warning('event %d', n, extra={'secret_key': 'nope'})
+    assert logging_queue.dropped == 4
+    record = logging_queue.queue_handler.queue.get_nowait()
+    assert record.getMessage() == 'event 0'
+    assert 'nope' not in JSONFormatter().format(record)
+    with pytest.raises(queue.Empty):
+        logging_queue.queue_handler.queue.get_nowait()
+    logger.removeHandler(logging_queue.queue_handler)
@@ -0,0 +1,88 @@
+import socket
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+from mailer import SMTPMailer
+from main import app, db, User, NotificationOutbox, drain_notification_outbox
+
+# Import the login function from conftest
+from conftest import login
+
+def make_mailer(**overrides):
+    config = dict(app.config)
+    config.update(overrides)
+    return SMTPMailer.from_config(config)
+
+def message(n):
+    msg = MIMEText(f'body {n}')
+    msg['Subject'] = f'subject {n}'
+    msg['From'] = 'sender@example.com'
+    msg['To'] = 'to@example.com'
+    return msg
+
+def test_one_session_for_many_messages(smtp_sink):
+    """Messages share one SMTP connection until the per-connection cap is reached."""
+    mailer = make_mailer(MAIL_MAX_MESSAGES_PER_CONNECTION=4)
+    for n in range(10):
+        mailer.send(message(n))
+    mailer.close()
+    assert len(smtp_sink.messages) == 10
+    assert mailer.connections_opened == 3
+    assert len(smtp_sink.connections) == 3
+
+def test_reconnects_after_dropped_session(smtp_sink):
+    """A session the server dropped is reopened and the message still goes out."""
+    mailer = make_mailer()
+    mailer.send(message(1))
+    mailer._server.sock.shutdown(socket.SHUT_RDWR)
+    mailer.send(message(2))
+    mailer.close()
+    assert len(smtp_sink.messages) == 2
+    assert mailer.connections_opened == 2
+
+def queue_status_changes(client, statuses):
+    with app.app_context():
+        User.query.filter_by(username='testuser').first().email = 'testuser@example.com'
+        db.session.commit()
+    login(client, 'testuser', 'testpassword')
+    deal = {'deal_name': 'Digest Deal', 'state': 'Texas', 'city': 'Austin', 'status': statuses[0]}
+    deal_id = client.post('/api/deals', data=deal).get_json()['id']
+    for status in statuses[1:]:
+        client.put(f'/api/deals/{deal_id}', data=dict(deal, status=status))
+
+def test_drain_reuses_one_session(client, smtp_sink):
+    """The outbox worker sends a whole batch over the shared session."""
+    queue_status_changes(client, ['Lead', 'Pending', 'Under Contract', 'Closed'])
+    with app.app_context():
+        assert drain_notification_outbox() == 4
+    assert len(smtp_sink.messages) == 4
+    assert len(smtp_sink.connections) == 1
+
+def test_digest_coalesces_changes_per_recipient(client, smtp_sink, monkeypatch):
+    """In digest mode changes queued within the window are sent as one email once it closes."""
+    monkeypatch.setitem(app.config, 'NOTIFY_DIGEST_SECONDS', 300)
+    queue_status_changes(client, ['Lead', 'Pending', 'Closed'])
+    with app.app_context():
+        queued = NotificationOutbox.query.all()
+        assert len({n.next_attempt_at for n in queued}) == 1
+        # Nothing goes out while the window is open
+        assert drain_notification_outbox() == 0
+        NotificationOutbox.query.update({'next_attempt_at': datetime.utcnow()})
+        db.session.commit()
+        assert drain_notification_outbox() == 3
+        assert {n.status for n in NotificationOutbox.query.all()} == {'sent'}
+    assert len(smtp_sink.messages) == 1
+    content = smtp_sink.messages[0].content
+    assert b'3 changes' in content
+    assert b'Lead' in content and b'Pending' in content and b'Closed' in content
+
+def test_digest_window_ignores_retry_backoff(client, monkeypatch):
+    """A change queued behind a notification waiting out a retry still goes out after the digest window."""
+    monkeypatch.setitem(app.config, 'NOTIFY_DIGEST_SECONDS', 60)
+    with app.app_context():
+        db.session.add(NotificationOutbox(recipient='testuser@example.com', subject='s', body='b', attempts=3,
+                                          next_attempt_at=datetime.utcnow() + timedelta(hours=1)))
+        db.session.commit()
+    queue_status_changes(client, ['Lead'])
+    with app.app_context():
+        queued = NotificationOutbox.query.filter_by(attempts=0).one()
+        assert (queued.next_attempt_at - datetime.utcnow()).total_seconds() <= 60
@@ -0,0 +1,86 @@
+import os
+import re
+import pytest
+from sqlalchemy.exc import OperationalError
+from main import app, db, User, Role, request_metrics
+from metrics import Histogram, LATENCY_BUCKETS
+
+# Import the login function from conftest
+from conftest import login
+
+REMOTE = {'REMOTE_ADDR': '203.0.113.7'}
+
+def sample(body, name, **labels):
+    """Value of the sample with exactly these labels, plus this process's worker label, in a Prometheus text body."""
+    label_text = ','.join(f'{key}="{value}"' for key, value in dict(worker=os.getpid(), **labels).items())
+    match = re.search(rf'^{re.escape(name)}{{{re.escape(label_text)}}} (\S+)$', body, re.M)
+    return float(match.group(1)) if match else None
+
+def test_metrics_restricted_to_admins_or_scrapers(client, monkeypatch):
+    """Only Admins and scrapers holding METRICS_TOKEN may read /metrics, unless loopback is trusted."""
+    # Loopback is not trusted by default: behind a local proxy every request comes from it
+    assert client.get('/metrics').status_code == 403
+    login(client, 'testuser', 'testpassword')
+    assert client.get('/metrics', environ_base=REMOTE).status_code == 403
+
+    with app.app_context():
+        admin = User(username='admin', role_id=Role.query.filter_by(name='Admin').one().id)
+        admin.set_password('password')
+        db.session.add(admin)
+        db.session.commit()
+    login(client, 'admin', 'password')
+    assert client.get('/metrics', environ_base=REMOTE).status_code == 200
+
+    client.get('/logout')
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', 's3cret')
+    assert client.get('/metrics', environ_base=REMOTE, headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    response = client.get('/metrics', environ_base=REMOTE, headers={'Authorization': 'Bearer s3cret'})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+
+    monkeypatch.setitem(app.config, 'METRICS_ALLOW_LOCAL', True)
+    assert client.get('/metrics').status_code == 200
+
+def test_requests_recorded_per_endpoint_with_sql(authenticated_client, monkeypatch):
+    """Requests are counted per endpoint and status, with their latency and SQL work."""
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', 's3cret')
+    request_metrics.clear()
+    for _ in range(3):
+        authenticated_client.get('/api/deals')
+    authenticated_client.get('/api/deals?cursor=not-a-cursor')
+
+    body = authenticated_client.get('/metrics', headers={'Authorization': 'Bearer s3cret'}).get_data(as_text=True)
+    assert sample(body, 'wildoak_http_requests_total', endpoint='main.deals', method='GET', status='200') == 3
+    assert sample(body, 'wildoak_http_requests_total', endpoint='main.deals', method='GET', status='400') == 1
+    assert sample(body, 'wildoak_http_request_duration_seconds_count', endpoint='main.deals') == 4
+    assert sample(body, 'wildoak_http_request_duration_seconds_bucket', endpoint='main.deals', le='+Inf') == 4
+    # Listing deals runs SQL, and its time is charged to the request
+    assert sample(body, 'wildoak_db_statements_sum', endpoint='main.deals') >= 3
+    assert sample(body, 'wildoak_db_duration_seconds_sum', endpoint='main.deals') > 0
+    assert sample(body, 'wildoak_http_request_duration_quantile_seconds', endpoint='main.deals', quantile='0.99') > 0
+    # Every series, including values kept outside RequestMetrics, names the worker that counted it
+    assert sample(body, 'wildoak_user_cache_size') is not None
+
+def test_failed_statements_leave_no_timer_on_the_connection():
+    """A statement that raises never reaches after_cursor_execute, so its start time must not outlive it."""
+    with app.app_context(), db.engine.connect() as conn:
+        conn.exec_driver_sql('SELECT 1')
+        before = {key: list(value) if isinstance(value, list) else value for key, value in conn.info.items()}
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.exec_driver_sql('SELECT * FROM no_such_table')
+        conn.exec_driver_sql('SELECT 1')
+        assert conn.info == before
+
+def test_histogram_quantiles_interpolate_within_buckets():
+    """Quantiles interpolate inside the bucket that holds them and cap at the top finite bound."""
+    histogram = Histogram(LATENCY_BUCKETS)
+    assert histogram.quantile(0.5) is None
+    for _ in range(90):
+        histogram.observe(0.003)
+    for _ in range(10):
+        histogram.observe(0.2)
+    assert histogram.quantile(0.5) <= 0.005
+    assert 0.1 < histogram.quantile(0.95) <= 0.25
+    histogram.observe(60)
+    assert histogram.quantile(1.0) == 10.0
@@ -0,0 +1,140 @@
+import threading
+import time
+from datetime import datetime
+import main
+from main import app, db, User, NotificationOutbox, drain_notification_outbox, NotificationWorker
+
+# Import the login function from conftest
+from conftest import login, free_port
+
+DEAL = {'deal_name': 'Notify Deal', 'state': 'Texas', 'city': 'Austin', 'status': 'Pending'}
+
+def give_testuser_email():
+    with app.app_context():
+        User.query.filter_by(username='testuser').first().email = 'testuser@example.com'
+        db.session.commit()
+
+def test_status_change_is_queued_not_sent(client, monkeypatch):
+    """Creating a deal stores the email in the outbox instead of talking to SMTP on the request."""
+    give_testuser_email()
+    # Nothing listens on this port, so any inline SMTP call would fail the request
+    monkeypatch.setitem(app.config, 'MAIL_PORT', free_port())
+    login(client, 'testuser', 'testpassword')
+    deal_id = client.post('/api/deals', data=DEAL).get_json()['id']
+    client.put(f'/api/deals/{deal_id}', data=dict(DEAL, status='Closed'))
+    with app.app_context():
+        queued = NotificationOutbox.query.order_by(NotificationOutbox.id).all()
+        assert [n.status for n in queued] == ['pending', 'pending']
+        assert 'Closed' in queued[1].body
+        assert queued[0].recipient == 'testuser@example.com'
+
+def test_drain_delivers_to_smtp(client, smtp_sink):
+    """Draining the outbox sends each queued email once and marks it sent."""
+    give_testuser_email()
+    login(client, 'testuser', 'testpassword')
+    client.post('/api/deals', data=DEAL)
+    with app.app_context():
+        assert drain_notification_outbox() == 1
+        assert drain_notification_outbox() == 0
+        assert NotificationOutbox.query.one().status == 'sent'
+    assert len(smtp_sink.messages) == 1
+    assert smtp_sink.messages[0].rcpt_tos == ['testuser@example.com']
+    assert b'Notify Deal' in smtp_sink.messages[0].content
+
+def test_failed_sends_back_off_then_give_up(client, monkeypatch):
+    """Failures are retried later with growing delays and abandoned after the attempt limit."""
+    monkeypatch.setitem(app.config, 'MAIL_SERVER', '127.0.0.1')
+    monkeypatch.setitem(app.config, 'MAIL_PORT', free_port())
+    monkeypatch.setitem(app.config, 'NOTIFY_MAX_ATTEMPTS', 3)
+    with app.app_context():
+        db.session.add(NotificationOutbox(recipient='a@example.com', subject='s', body='b'))
+        db.session.commit()
+        delays = []
+        for _ in range(3):
+            notification = NotificationOutbox.query.one()
+            notification.next_attempt_at = datetime.utcnow()
+            db.session.commit()
+            assert drain_notification_outbox() == 0
+            notification = NotificationOutbox.query.one()
+            delays.append((notification.next_attempt_at - datetime.utcnow()).total_seconds())
+        assert notification.status == 'failed'
+        assert notification.attempts == 3
+        assert notification.last_error
+        assert 25 < delays[0] < delays[1]
+
+def test_worker_sends_after_commit(client, smtp_sink, monkeypatch):
+    """The background worker is woken by the commit and delivers without waiting for its next poll."""
+    give_testuser_email()
+    login(client, 'testuser', 'testpassword')
+    monkeypatch.setitem(app.config, 'NOTIFY_POLL_SECONDS', 60)
+    # The in-memory test database is one connection shared by every thread, so the worker only
+    # drains while no request is running
+    request_idle, drained = threading.Event(), threading.Event()
+    request_idle.set()
+    def drain_between_requests():
+        request_idle.wait(5)
+        try:
+            return drain_notification_outbox()
+        finally:
+            drained.set()
+    monkeypatch.setattr(main, 'drain_notification_outbox', drain_between_requests)
+    worker = NotificationWorker(app)
+    monkeypatch.setattr(main, 'notification_worker', worker)
+    worker.start()
+    try:
+        # Let the drain the worker runs on start finish first
+        assert drained.wait(5)
+        request_idle.clear()
+        assert client.post('/api/deals', data=DEAL).status_code == 201
+        request_idle.set()
+        deadline = time.time() + 5
+        while not smtp_sink.messages and time.time() < deadline:
+            time.sleep(0.05)
+        assert len(smtp_sink.messages) == 1
+    finally:
+        request_idle.set()
+        worker.stop(timeout=5)
+
+def test_rejected_message_only_fails_itself(client, smtp_sink, monkeypatch):
+    """A message refused partway through a batch is retried alone; the ones around it go out once."""
+    handle_data = smtp_sink.handle_DATA
+    async def reject_second(server, session, envelope):
+        if b'b1' in envelope.content:
+            return '550 Message rejected'
+        return await handle_data(server, session, envelope)
+    monkeypatch.setattr(smtp_sink, 'handle_DATA', reject_second)
+    with app.app_context():
+        db.session.add_all(NotificationOutbox(recipient='a@example.com', subject=f's{n}', body=f'b{n}') for n in range(3))
+        db.session.commit()
+        assert drain_notification_outbox() == 2
+        by_body = {n.body: n for n in NotificationOutbox.query.all()}
+        assert [by_body[body].status for body in ('b0', 'b1', 'b2')] == ['sent', 'pending', 'sent']
+        assert by_body['b1'].attempts == 1 and by_body['b1'].next_attempt_at > datetime.utcnow()
+        # Retrying sends only the rejected message
+        by_body['b1'].next_attempt_at = datetime.utcnow()
+        db.session.commit()
+        assert drain_notification_outbox() == 0
+    delivered = [message.content.strip().split(b'\n')[-1] for message in smtp_sink.messages]
+    assert delivered == [b'b0', b'b2']
+
+def test_lease_outlasts_sends_and_guards_updates(client, monkeypatch):
+    """The lease is renewed to cover the group's sends, and a worker that lost its claim records nothing."""
+    monkeypatch.setitem(app.config, 'NOTIFY_LEASE_SECONDS', 1)
+    leases = []
+    def send_email(recipient, subject, body):
+        notification = NotificationOutbox.query.filter_by(body=body).one()
+        leases.append((notification.next_attempt_at - datetime.utcnow()).total_seconds())
+        if body == 'b1':
+            # Another worker claims this row as if our lease had run out mid-send
+            notification.claim_token = 'other-worker'
+            db.session.commit()
+    monkeypatch.setattr(main, 'send_email', send_email)
+    with app.app_context():
+        db.session.add_all(NotificationOutbox(recipient='a@example.com', subject=f's{n}', body=f'b{n}') for n in range(3))
+        db.session.commit()
+        assert drain_notification_outbox() == 2
+        assert min(leases) > 3 * app.config['MAIL_TIMEOUT']
+        by_body = {n.body: n for n in NotificationOutbox.query.all()}
+        assert by_body['b1'].status == 'pending'
+        assert by_body['b1'].claim_token == 'other-worker'
+        assert by_body['b1'].attempts == 0
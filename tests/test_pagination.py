@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+from main import app, db, User, Deal
+
+# Import the login function from conftest
+from conftest import login
+
+def seed_deals(count, **overrides):
+    """Create deals for testuser with distinct, increasing timestamps."""
+    with app.app_context():
+        user = User.query.filter_by(username='testuser').first()
+        start = datetime(2025, 1, 1)
+        for i in range(count):
+            fields = dict(deal_name=f'Deal {i}', state='Texas', city='Austin', status='Pending',
+                          user_id=user.id, created_at=start + timedelta(days=i),
+                          updated_at=start + timedelta(days=i))
+            fields.update(overrides)
+            db.session.add(Deal(**fields))
+        db.session.commit()
+
+def test_keyset_pages_cover_every_deal_once(client):
+    """Following next_cursor walks all deals newest first without gaps or repeats."""
+    seed_deals(7)
+    # Same timestamp on several rows exercises the id tie-breaker
+    seed_deals(3, updated_at=datetime(2025, 1, 3))
+    login(client, 'testuser', 'testpassword')
+    seen, cursor = [], None
+    while True:
+        url = '/api/deals?limit=3' + (f'&cursor={cursor}' if cursor else '')
+        page = client.get(url).get_json()
+        assert len(page['deals']) <= 3
+        seen.extend(d['id'] for d in page['deals'])
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    assert sorted(seen) == list(range(1, 11))
+    assert len(seen) == len(set(seen))
+
+def test_filters_and_date_range(client):
+    """Status, city and created date range filters narrow the result server-side."""
+    seed_deals(5)
+    seed_deals(2, status='Closed', city='Dallas')
+    login(client, 'testuser', 'testpassword')
+    closed = client.get('/api/deals?status=Closed&city=Dallas').get_json()['deals']
+    assert len(closed) == 2
+    ranged = client.get('/api/deals?sort=created_at&created_after=2025-01-02&created_before=2025-01-04')
+    assert [d['id'] for d in ranged.get_json()['deals']] == [3, 7, 2]
+    assert all('2025-01-02' <= d['created_at'] < '2025-01-04' for d in ranged.get_json()['deals'])
+
+def test_users_cannot_page_into_other_users_deals(client):
+    """The user_id filter never widens a User's scope beyond their own deals."""
+    seed_deals(2)
+    with app.app_context():
+        other = User(username='otheruser', role_id=User.query.first().role_id)
+        other.set_password('otherpassword')
+        db.session.add(other)
+        db.session.commit()
+        other_id = other.id
+    login(client, 'otheruser', 'otherpassword')
+    assert client.get('/api/deals').get_json()['deals'] == []
+    assert client.get('/api/deals?user_id=1').get_json()['deals'] == []
+    assert client.get(f'/api/deals?user_id={other_id}').get_json()['deals'] == []
+
+def test_invalid_pagination_arguments(client):
+    """Malformed cursors, sorts and limits are rejected with a 400."""
+    login(client, 'testuser', 'testpassword')
+    assert client.get('/api/deals?cursor=not-a-cursor').status_code == 400
+    assert client.get('/api/deals?sort=deal_name').status_code == 400
+    assert client.get('/api/deals?limit=ten').status_code == 400
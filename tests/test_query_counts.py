@@ -0,0 +1,80 @@
+from main import app, db, User, Role, Deal, File, DealStatusHistory, sql_profiles
+
+# Import the login function from conftest
+from conftest import login
+
+DEAL = {'deal_name': 'Counted Deal', 'state': 'Texas', 'city': 'Austin', 'status': 'Pending'}
+
+def seed_pipeline(user_id, deals=25):
+    """Give the user enough deals, files and history that per-row queries would show up."""
+    with app.app_context():
+        for i in range(deals):
+            deal = Deal(deal_name=f'Deal {i}', state='Texas', city='Austin', status='Pending', user_id=user_id)
+            db.session.add(deal)
+            db.session.flush()
+            db.session.add(File(deal_id=deal.id, file_name=f'{i}.pdf', dropbox_link='https://example.com'))
+            db.session.add(DealStatusHistory(deal_id=deal.id, status='Pending', changed_by_user_id=user_id))
+        db.session.commit()
+
+def request_profiles(requests):
+    """Send each labelled request and return the SQL profile recorded for it."""
+    profiles = []
+    for label, send in requests:
+        response = send()
+        assert response.status_code < 400, label
+        profiles.append(sql_profiles.profiles[-1])
+    return profiles
+
+def assert_within_budgets(profiles):
+    # The same budgets conftest enforces on every request; here each route must have one
+    for profile in profiles:
+        statements = [statement.sql for statement in profile.statements]
+        assert len(statements) <= app.config['SQL_QUERY_BUDGETS'][profile.route], (profile.route, statements)
+        assert not any('FROM role' in statement for statement in statements), profile.route
+
+def api_requests(client):
+    deal_id = client.post('/api/deals', data=DEAL).get_json()['id']
+    file_id = client.post(f'/api/files/{deal_id}', data={'file_name': 'a.pdf', 'dropbox_link': 'https://example.com'}).get_json()['id']
+    return [
+        ('GET /api/deals', lambda: client.get('/api/deals')),
+        ('POST /api/deals', lambda: client.post('/api/deals', data=DEAL)),
+        ('PUT /api/deals', lambda: client.put(f'/api/deals/{deal_id}', data=dict(DEAL, status='Closed', state='Ohio'))),
+        ('GET /api/files', lambda: client.get(f'/api/files/{deal_id}')),
+        ('POST /api/files', lambda: client.post(f'/api/files/{deal_id}', data={'file_name': 'b.pdf', 'dropbox_link': 'https://example.com'})),
+        ('GET /api/analytics', lambda: client.get('/api/analytics')),
+        ('DELETE /api/files', lambda: client.delete(f'/api/files/{file_id}')),
+        ('DELETE /api/deals', lambda: client.delete(f'/api/deals/{deal_id}')),
+    ]
+
+def test_routes_stay_within_query_budget(client):
+    """Each API route issues a fixed, small number of statements and never looks up roles."""
+    seed_pipeline(user_id=1)
+    login(client, 'testuser', 'testpassword')
+    assert_within_budgets(request_profiles(api_requests(client)))
+
+def test_admin_routes_do_not_look_up_roles(client):
+    """Admins are recognised from the cached role names, not a role query per check."""
+    with app.app_context():
+        admin = User(username='admin', role_id=Role.query.filter_by(name='Admin').one().id)
+        admin.set_password('adminpassword')
+        db.session.add(admin)
+        db.session.commit()
+    seed_pipeline(user_id=1)
+    login(client, 'admin', 'adminpassword')
+    assert_within_budgets(request_profiles(api_requests(client)))
+
+def test_role_change_takes_effect(client):
+    """Promoting a user through manage_users() is honoured on their next request, without logging in again."""
+    with app.app_context():
+        admin = User(username='admin', role_id=Role.query.filter_by(name='Admin').one().id)
+        admin.set_password('adminpassword')
+        db.session.add(admin)
+        db.session.commit()
+    seed_pipeline(user_id=2, deals=1)
+    user_client = app.test_client()
+    login(user_client, 'testuser', 'testpassword')
+    assert user_client.get('/api/deals').get_json()['deals'] == []
+    admin_client = app.test_client()
+    login(admin_client, 'admin', 'adminpassword')
+    assert admin_client.put('/api/users', json={'username': 'testuser', 'role': 'Admin'}).status_code == 200
+    assert len(user_client.get('/api/deals').get_json()['deals']) == 1
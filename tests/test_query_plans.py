@@ -0,0 +1,50 @@
+import re
+from main import app, db, User, Role, File, DealStatusHistory
+
+# Import the login function from conftest
+from conftest import login
+
+def full_table_scans(statements):
+    """Run EXPLAIN QUERY PLAN for each SELECT and return the plan steps that scan a whole table."""
+    scans = []
+    with app.app_context():
+        connection = db.session.connection().connection.driver_connection
+        for statement, parameters in statements:
+            if not statement.lstrip().upper().startswith('SELECT'):
+                continue
+            for row in connection.execute(f'EXPLAIN QUERY PLAN {statement}', parameters):
+                detail = row[-1]
+                if re.match(r'SCAN \w+$', detail):
+                    scans.append((detail, statement))
+    return scans
+
+def add_admin():
+    with app.app_context():
+        admin_role = Role.query.filter_by(name='Admin').first()
+        admin = User(username='admin', role_id=admin_role.id)
+        admin.set_password('adminpassword')
+        db.session.add(admin)
+        db.session.commit()
+
+def test_hot_queries_use_indexes(client, test_deal, sql_statements):
+    """The deal list, files, detail page, analytics and search never fall back to full table scans."""
+    with app.app_context():
+        db.session.add(File(deal_id=test_deal, file_name='plan.pdf', dropbox_link='https://example.com/plan.pdf'))
+        db.session.add(DealStatusHistory(deal_id=test_deal, status='Pending', changed_by_user_id=1))
+        db.session.commit()
+    add_admin()
+
+    with sql_statements() as statements:
+        for username, password in (('testuser', 'testpassword'), ('admin', 'adminpassword')):
+            login(client, username, password)
+            assert client.get('/api/deals').status_code == 200
+            assert client.get('/api/deals?sort=created_at').status_code == 200
+            assert client.get('/api/deals?status=Pending').status_code == 200
+            assert client.get(f'/api/files/{test_deal}').status_code == 200
+            assert client.get(f'/deal/{test_deal}').status_code == 200
+            assert client.get('/api/analytics').status_code == 200
+            assert client.get('/api/deals/search?q=test').status_code == 200
+            client.get('/logout')
+
+    assert statements
+    assert full_table_scans(statements) == []
@@ -5,7 +5,7 @@ from bs4 import BeautifulSoup
 
 # Add parent directory to path so we can import the app
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from main import app, db, User, Role
+from main import app, db, User, Role, invalidate_role_cache, user_cache
 
 @pytest.fixture
 def client():
@@ -16,6 +16,7 @@ def client():
 
     with app.test_client() as client:
         with app.app_context():
+            db.drop_all()
             db.create_all()
             # Create roles
             admin_role = Role(name='Admin')
@@ -23,6 +24,8 @@ def client():
             db.session.add(admin_role)
             db.session.add(user_role)
             db.session.commit()
+            invalidate_role_cache()
+            user_cache.clear()
 
         yield client
 
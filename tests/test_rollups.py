@@ -0,0 +1,34 @@
+from main import app, db, Deal, DealRollup, compute_deal_analytics, read_deal_rollups
+from main import verify_deal_rollups, rebuild_deal_rollups
+
+# Import the login function from conftest
+from conftest import login
+
+DEAL = {'deal_name': 'Rollup Deal', 'state': 'Texas', 'city': 'Austin', 'status': 'Pending'}
+
+def test_rollups_follow_deal_writes(client):
+    """Creating, updating and deleting deals keeps the counters in step with the deal table."""
+    login(client, 'testuser', 'testpassword')
+    first = client.post('/api/deals', data=DEAL).get_json()['id']
+    client.post('/api/deals', data=dict(DEAL, state='Ohio'))
+    client.put(f'/api/deals/{first}', data=dict(DEAL, status='Closed', state='Florida'))
+    with app.app_context():
+        assert verify_deal_rollups() == {}
+        assert read_deal_rollups() == compute_deal_analytics()
+        assert read_deal_rollups()['status_counts'] == {'Pending': 1, 'Closed': 1}
+
+    client.delete(f'/api/deals/{first}')
+    with app.app_context():
+        assert verify_deal_rollups() == {}
+        assert read_deal_rollups()['state_counts'] == {'Ohio': 1}
+
+def test_rebuild_repairs_drift(client, test_deal):
+    """Deals written behind the app's back show up as drift until rebuilt."""
+    with app.app_context():
+        drift = verify_deal_rollups()
+        deal = db.session.get(Deal, test_deal)
+        assert drift[(deal.user_id, 'status', 'Pending')] == (0, 1)
+
+        assert rebuild_deal_rollups() == drift
+        assert verify_deal_rollups() == {}
+        assert DealRollup.query.count() == 3
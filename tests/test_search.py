@@ -0,0 +1,62 @@
+from sqlalchemy import text
+from main import app, db, User, Role, Deal, File, rebuild_deal_search
+
+# Import the login function from conftest
+from conftest import login
+
+def add_deal(username, name, city='Austin', status='Pending'):
+    with app.app_context():
+        user = User.query.filter_by(username=username).first()
+        deal = Deal(deal_name=name, state='Texas', city=city, status=status, user_id=user.id)
+        db.session.add(deal)
+        db.session.commit()
+        return deal.id
+
+def search_names(client, query):
+    response = client.get(f'/api/deals/search?{query}')
+    assert response.status_code == 200
+    return [d['deal_name'] for d in response.get_json()['deals']]
+
+def test_search_prefix_ranking_and_scoping(client):
+    """Words match as prefixes, name matches rank first and other users' deals never show up."""
+    with app.app_context():
+        other = User(username='other', role_id=Role.query.filter_by(name='User').first().id)
+        other.set_password('password')
+        db.session.add(other)
+        db.session.commit()
+    add_deal('testuser', 'Lakeside Plaza', city='Oakland')
+    add_deal('testuser', 'Oak Ridge Apartments')
+    add_deal('testuser', 'Main Street Retail', status='Closed')
+    add_deal('other', 'Oak Hollow')
+    login(client, 'testuser', 'testpassword')
+    assert search_names(client, 'q=oak') == ['Oak Ridge Apartments', 'Lakeside Plaza']
+    assert search_names(client, 'q=oak+apart') == ['Oak Ridge Apartments']
+    assert search_names(client, 'q=oak&city=Oakland') == ['Lakeside Plaza']
+    assert search_names(client, 'q=clos') == ['Main Street Retail']
+    assert client.get('/api/deals/search?q=%22*').status_code == 400
+    bad_limit = client.get('/api/deals/search?q=oak&limit=abc')
+    assert bad_limit.status_code == 400
+    assert bad_limit.get_json() == client.get('/api/deals?limit=abc').get_json() == {'error': 'Invalid limit: expected an integer'}
+
+def test_search_follows_deal_and_file_changes(client):
+    """The index tracks edits, deletes and attached file names without a rebuild."""
+    deal_id = add_deal('testuser', 'Harbor View')
+    login(client, 'testuser', 'testpassword')
+    client.post(f'/api/files/{deal_id}', data={'file_name': 'appraisal.pdf', 'dropbox_link': 'https://example.com/a'})
+    assert search_names(client, 'q=apprais') == ['Harbor View']
+    client.put(f'/api/deals/{deal_id}', data={'deal_name': 'Bayfront', 'state': 'Texas', 'city': 'Austin', 'status': 'Pending'})
+    assert search_names(client, 'q=harbor') == []
+    assert search_names(client, 'q=bayfront') == ['Bayfront']
+    client.delete(f'/api/deals/{deal_id}')
+    assert search_names(client, 'q=bayfront') == []
+
+def test_rebuild_deal_search(client):
+    """Rebuilding the search index restores deals and their file names after it is emptied."""
+    deal_id = add_deal('testuser', 'Cedar Point')
+    with app.app_context():
+        db.session.add(File(deal_id=deal_id, file_name='survey.pdf', dropbox_link='https://example.com/s'))
+        db.session.execute(text('DELETE FROM deal_search'))
+        db.session.commit()
+        assert rebuild_deal_search() == 1
+    login(client, 'testuser', 'testpassword')
+    assert search_names(client, 'q=survey') == ['Cedar Point']
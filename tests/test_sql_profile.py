@@ -0,0 +1,58 @@
+import os
+import jinja2
+import pytest
+from flask import g
+from main import app, db, User, DealStatusHistory, sql_profiles
+from sqlprofile import RequestProfile
+
+# Import the login function from conftest
+from conftest import login
+
+def add_history_from_many_users(deal_id, users=8):
+    with app.app_context():
+        changers = [User(username=f'changer{i}', password='unused', role_id=2) for i in range(users)]
+        db.session.add_all(changers)
+        db.session.flush()
+        db.session.add_all(DealStatusHistory(deal_id=deal_id, status='Pending', changed_by_user_id=user.id)
+                           for user in changers)
+        db.session.commit()
+
+def test_profile_records_statements_with_call_sites(client, test_deal):
+    """A request's profile records each statement with its timing and the main.py line that ran it."""
+    add_history_from_many_users(test_deal)
+    login(client, 'testuser', 'testpassword')
+    sql_profiles.clear()
+    client.get(f'/deal/{test_deal}')
+
+    profile = sql_profiles.profiles[-1]
+    assert profile.route == 'main.deal_detail'
+    assert all(statement.call_site.startswith('main.py:') for statement in profile.statements)
+    assert all(statement.seconds >= 0 for statement in profile.statements)
+    assert list(sql_profiles.problems) == []
+
+@pytest.mark.allow_sql_problems
+def test_lazy_loading_in_template_is_flagged(client, test_deal, tmp_path):
+    """A template that lazy-loads each history entry's user runs an N+1, reported at the template line."""
+    add_history_from_many_users(test_deal)
+    (tmp_path / 'history.html').write_text('<ul>\n{% for history in histories %}\n'
+                                           '<li>{{ history.user.username }}</li>\n{% endfor %}\n</ul>\n')
+    templates = jinja2.Environment(loader=jinja2.FileSystemLoader(str(tmp_path)))
+    with app.test_request_context(f'/deal/{test_deal}'):
+        g.sql_profile = profile = RequestProfile('main.deal_detail', 'GET', f'/deal/{test_deal}')
+        histories = DealStatusHistory.query.filter_by(deal_id=test_deal).all()
+        templates.get_template('history.html').render(histories=histories)
+    budget, repeated = profile.problems(budget=3, repeat_threshold=5)
+    assert budget == 'GET main.deal_detail ran 9 SQL statements, budget is 3'
+    assert 'same statement 8 times' in repeated
+    assert f"{os.path.relpath(tmp_path / 'history.html')}:3 in template" in repeated
+
+def test_repeats_need_different_parameters():
+    """Only a statement repeated with different parameters counts as N+1; the budget counts everything."""
+    profile = RequestProfile('main.deals', 'GET', '/api/deals')
+    for _ in range(6):
+        profile.record('SELECT 1 FROM deal WHERE id = ?', (1,), 0.001, 'main.py:1 in f')
+    for deal_id in range(4):
+        profile.record('SELECT * FROM file WHERE deal_id = ?', (deal_id,), 0.001, 'main.py:2 in g')
+    assert profile.problems(budget=10, repeat_threshold=5) == []
+    assert profile.repeated(4) == [('SELECT * FROM file WHERE deal_id = ?', 4, ['main.py:2 in g'])]
+    assert profile.problems(budget=9) == ['GET main.deals ran 10 SQL statements, budget is 9']
@@ -0,0 +1,105 @@
+import json
+import pytest
+from main import app, db, User, Role
+
+# Import the login function from conftest
+from conftest import login
+
+@pytest.fixture(autouse=True)
+def fast_change_feed(monkeypatch):
+    """A fresh change feed per test (each test starts from an empty database) that polls quickly."""
+    monkeypatch.setitem(app.config, 'CHANGE_STREAM_POLL_SECONDS', 0.05)
+    monkeypatch.setitem(app.config, 'CHANGE_STREAM_HEARTBEAT_SECONDS', 0.5)
+    app.extensions.pop('change_feed', None)
+    yield
+    app.extensions.pop('change_feed', None)
+
+def add_user(username, role='User'):
+    with app.app_context():
+        user = User(username=username, role_id=Role.query.filter_by(name=role).one().id)
+        user.set_password('password')
+        db.session.add(user)
+        db.session.commit()
+
+def open_stream(client, **kwargs):
+    response = client.get('/api/deals/stream', **kwargs)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    assert next(chunks).decode().startswith('retry: ')
+    return response, chunks
+
+def next_event(chunks):
+    """The next event on a stream as (id, kind, data), skipping keepalives."""
+    for chunk in chunks:
+        chunk = chunk.decode()
+        if chunk.startswith(':'):
+            continue
+        fields = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+        return int(fields['id']), fields['event'], json.loads(fields['data'])
+
+def deal_fields(name, status):
+    return {'deal_name': name, 'state': 'Texas', 'city': 'Austin', 'status': status}
+
+def create_deal(client, name):
+    response = client.post('/api/deals', json=deal_fields(name, 'Lead'))
+    assert response.status_code == 201
+    return response.json['id']
+
+def test_stream_only_carries_changes_the_user_may_see(client):
+    """Users only receive events for their own deals, while admins receive everyone's."""
+    add_user('other')
+    add_user('admin', role='Admin')
+    # Separate clients: the fixture's client keeps its last request context, and the others would share it
+    client, other, admin = app.test_client(), app.test_client(), app.test_client()
+    login(client, 'testuser', 'testpassword')
+    login(other, 'other', 'password')
+    login(admin, 'admin', 'password')
+    own_response, own = open_stream(client)
+    admin_response, everything = open_stream(admin)
+
+    other_deal = create_deal(other, 'Not yours')
+    deal_id = create_deal(client, 'Yours')
+    assert client.put(f'/api/deals/{deal_id}', json=deal_fields('Yours', 'Pending')).status_code == 200
+    assert client.delete(f'/api/deals/{deal_id}').status_code == 200
+
+    seen = [next_event(own) for _ in range(3)]
+    assert [(kind, data['deal']['id']) for _, kind, data in seen] == [
+        ('deal.created', deal_id), ('deal.status', deal_id), ('deal.deleted', deal_id)]
+    assert seen[1][2]['previous_status'] == 'Lead'
+    assert seen[1][2]['deal']['status'] == 'Pending'
+    # Ids are cursors: they only go up
+    assert seen[0][0] < seen[1][0] < seen[2][0]
+    assert next_event(everything)[2]['deal']['id'] == other_deal
+    assert next_event(everything)[2]['deal']['id'] == deal_id
+    own_response.close()
+    admin_response.close()
+    assert app.extensions['change_feed'].subscribers == 0
+
+def test_reconnect_replays_changes_after_last_event_id(authenticated_client, test_deal):
+    """Reconnecting with Last-Event-ID replays the changes made after that event."""
+    client = authenticated_client
+    first = create_deal(client, 'First')
+    response = client.post(f'/api/files/{first}', json={'file_name': 'loi.pdf', 'dropbox_link': 'https://www.dropbox.com/s/loi'})
+    assert response.status_code == 201
+    second = create_deal(client, 'Second')
+
+    stream, chunks = open_stream(client, headers={'Last-Event-ID': '0'})
+    replayed = [next_event(chunks) for _ in range(3)]
+    assert [kind for _, kind, _ in replayed] == ['deal.created', 'file.added', 'deal.created']
+    assert replayed[1][2]['file']['file_name'] == 'loi.pdf'
+    stream.close()
+
+    # Resuming from the first event skips it
+    stream, chunks = open_stream(client, query_string={'after': replayed[0][0]})
+    assert next_event(chunks)[1] == 'file.added'
+    assert next_event(chunks)[2]['deal']['id'] == second
+    stream.close()
+    assert client.get('/api/deals/stream', headers={'Last-Event-ID': 'soon'}).status_code == 400
+
+def test_idle_stream_sends_keepalives(authenticated_client):
+    """An idle stream sends keepalive comments and closes cleanly."""
+    stream, chunks = open_stream(authenticated_client)
+    assert next(chunks) == b': keepalive\n\n'
+    stream.close()
+    assert authenticated_client.get('/api/deals/stream').status_code == 200
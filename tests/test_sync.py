@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from main import app, db, User, Role, DealChange, prune_deal_changes
+
+# Import the login function from conftest
+from conftest import login
+
+def deal_fields(name, status='Lead'):
+    return {'deal_name': name, 'state': 'Texas', 'city': 'Austin', 'status': status}
+
+def test_sync_returns_changes_since_cursor_with_tombstones(authenticated_client, test_deal):
+    """Sync returns the deals and files changed since the cursor, with tombstones for deletions."""
+    client = authenticated_client
+    cursor = client.get('/api/deals/sync').json['cursor']
+    kept = client.post('/api/deals', json=deal_fields('Kept')).json['id']
+    gone = client.post('/api/deals', json=deal_fields('Gone')).json['id']
+    file_id = client.post(f'/api/files/{kept}', json={'file_name': 'psa.pdf', 'dropbox_link': 'https://www.dropbox.com/s/psa'}).json['id']
+    removed = client.post(f'/api/files/{kept}', json={'file_name': 'old.pdf', 'dropbox_link': 'https://www.dropbox.com/s/old'}).json['id']
+    gone_file = client.post(f'/api/files/{gone}', json={'file_name': 'loi.pdf', 'dropbox_link': 'https://www.dropbox.com/s/loi'}).json['id']
+    assert client.delete(f'/api/files/{removed}').status_code == 200
+    assert client.put(f'/api/deals/{kept}', json=deal_fields('Kept', 'Pending')).status_code == 200
+    assert client.delete(f'/api/deals/{gone}').status_code == 200
+
+    sync = client.get(f'/api/deals/sync?since={cursor}').json
+    # Each deal once, as it is now; the untouched test_deal is not included
+    assert [(d['id'], d['status']) for d in sync['deals']] == [(kept, 'Pending')]
+    assert sync['deleted_deals'] == [gone]
+    assert [f['id'] for f in sync['files']] == [file_id]
+    # Deleting a deal deletes its files too
+    assert sync['deleted_files'] == [removed, gone_file]
+    assert sync['has_more'] is False
+
+    again = client.get(f"/api/deals/sync?since={sync['cursor']}").json
+    assert again['deals'] == again['deleted_deals'] == again['files'] == []
+    assert again['cursor'] == sync['cursor']
+    assert client.get('/api/deals/sync?since=later').status_code == 400
+    assert client.get(f"/api/deals/sync?since={sync['cursor'] + 1}").status_code == 400
+    assert client.get('/api/deals/sync?since=99999999999999999999').status_code == 400
+
+def add_other_user():
+    with app.app_context():
+        other = User(username='other', role_id=Role.query.filter_by(name='User').one().id)
+        other.set_password('password')
+        db.session.add(other)
+        db.session.commit()
+
+def test_sync_pages_and_only_covers_visible_deals(client, monkeypatch):
+    """Sync pages through changes with has_more and leaves out other users' deals."""
+    add_other_user()
+    login(client, 'other', 'password')
+    client.post('/api/deals', json=deal_fields('Not yours'))
+    login(client, 'testuser', 'testpassword')
+    ids = [client.post('/api/deals', json=deal_fields(f'Deal {n}')).json['id'] for n in range(3)]
+
+    monkeypatch.setitem(app.config, 'SYNC_MAX_CHANGES', 2)
+    first = client.get('/api/deals/sync?since=0').json
+    assert [d['id'] for d in first['deals']] == ids[:2]
+    assert first['has_more'] is True
+    second = client.get(f"/api/deals/sync?since={first['cursor']}").json
+    assert [d['id'] for d in second['deals']] == ids[2:]
+    assert second['has_more'] is False
+
+def test_pruned_cursor_must_resync(authenticated_client):
+    """A cursor older than the pruned change log gets 410 so the client does a full resync."""
+    client = authenticated_client
+    for n in range(3):
+        client.post('/api/deals', json=deal_fields(f'Deal {n}'))
+    with app.app_context():
+        # Everything is past retention, but the newest entry stays to keep cursors increasing
+        assert prune_deal_changes(now=datetime.utcnow() + timedelta(days=31)) == 2
+        newest = db.session.query(DealChange.id).scalar()
+    assert client.get('/api/deals/sync?since=0').status_code == 410
+    assert client.get(f'/api/deals/sync?since={newest - 1}').status_code == 200
+    client.post('/api/deals', json=deal_fields('After pruning'))
+    assert client.get(f'/api/deals/sync?since={newest}').json['cursor'] == newest + 1
+
+def test_cursor_advances_past_other_users_changes(client):
+    """A user with nothing new still moves their cursor, so pruning others' changes cannot strand it."""
+    add_other_user()
+    login(client, 'testuser', 'testpassword')
+    cursor = client.get('/api/deals/sync').json['cursor']
+    login(client, 'other', 'password')
+    for n in range(3):
+        client.post('/api/deals', json=deal_fields(f'Not yours {n}'))
+    login(client, 'testuser', 'testpassword')
+    sync = client.get(f'/api/deals/sync?since={cursor}').json
+    assert sync['deals'] == []
+    assert sync['cursor'] > cursor
+    with app.app_context():
+        assert prune_deal_changes(now=datetime.utcnow() + timedelta(days=31)) == 2
+    assert client.get(f"/api/deals/sync?since={sync['cursor']}").status_code == 200
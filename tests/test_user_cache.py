@@ -0,0 +1,72 @@
+import threading
+from cache import LRUTTLCache
+from main import app, db, User, Role, user_cache
+
+# Import the login function from conftest
+from conftest import login
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_cache_expires_and_evicts():
+    """Entries disappear after the TTL and the least recently used one goes first when full."""
+    clock = FakeClock()
+    cache = LRUTTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    clock.now = 11
+    assert cache.get('a') is None
+    assert cache.stats()['hits'] == 2
+    assert cache.stats()['misses'] == 2
+    assert cache.stats()['evictions'] == 1
+
+def test_cache_is_consistent_across_threads():
+    """Concurrent readers and writers never corrupt the counters or exceed maxsize."""
+    cache = LRUTTLCache(maxsize=50, ttl=60)
+    def worker(offset):
+        for i in range(2000):
+            key = (i + offset) % 100
+            if cache.get(key) is None:
+                cache.set(key, key)
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = cache.stats()
+    assert stats['hits'] + stats['misses'] == 8 * 2000
+    assert stats['size'] <= 50
+
+def test_repeat_requests_hit_the_cache(client):
+    """After the first request the user comes from the cache, not the database."""
+    login(client, 'testuser', 'testpassword')
+    before = user_cache.stats()
+    for _ in range(5):
+        assert client.get('/api/deals').status_code == 200
+    after = user_cache.stats()
+    assert after['misses'] - before['misses'] <= 1
+    assert after['hits'] - before['hits'] >= 4
+
+def test_manage_users_update_invalidates(client):
+    """An Admin changing a user's email is visible on that user's next request."""
+    with app.app_context():
+        admin = User(username='admin', role_id=Role.query.filter_by(name='Admin').one().id)
+        admin.set_password('adminpassword')
+        db.session.add(admin)
+        db.session.commit()
+        testuser_id = User.query.filter_by(username='testuser').one().id
+    login(client, 'testuser', 'testpassword')
+    client.get('/api/deals')
+    assert user_cache.get(testuser_id).email is None
+    client.get('/logout')
+    login(client, 'admin', 'adminpassword')
+    client.put('/api/users', json={'username': 'testuser', 'role': 'User', 'email': 'new@example.com'})
+    assert user_cache.get(testuser_id) is None
@@ -0,0 +1,8 @@
+"""
+WSGI entry point for production serving with a pre-fork server:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+main.app is built by create_app() with the default configuration.
+"""
+from main import app